@@ -0,0 +1,69 @@
+"""
+Compares the node timings and peak RSS of two benchmark results.
+
+Example:
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+"""
+import argparse
+import json
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def _describe(results: Dict[str, Any]) -> str:
+    git = results["git"]
+    dirty = " (dirty)" if git["dirty"] else ""
+    return f"{git['commit'][:8]}{dirty} {git['subject']}"
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Returns the lines of a table with the speedup and the peak RSS of each node.
+
+    Args:
+        base (Dict[str, Any]): Results of the base commit
+        new (Dict[str, Any]): Results of the new commit
+
+    Returns:
+        List[str]: Lines of the table
+    """
+    lines = [f"base: {_describe(base)}", f"new:  {_describe(new)}"]
+
+    if base["config"] != new["config"]:
+        lines.append(f"warning: different configs {base['config']} and {new['config']}")
+
+    lines.append(
+        f"{'node':<34} {'base s':>9} {'new s':>9} {'speedup':>8} {'base MB':>8} {'new MB':>8}"
+    )
+
+    for name, new_node in new["nodes"].items():
+        base_node = base["nodes"].get(name)
+
+        if base_node is None:
+            lines.append(f"{name:<34} {'-':>9} {new_node['seconds']:>9.2f}")
+            continue
+
+        lines.append(
+            f"{name:<34} {base_node['seconds']:>9.2f} {new_node['seconds']:>9.2f} "
+            f"{base_node['seconds'] / new_node['seconds']:>7.2f}x "
+            f"{base_node['peak_rss_mb']:>8.0f} {new_node['peak_rss_mb']:>8.0f}"
+        )
+
+    return lines
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compares two benchmark results.")
+    parser.add_argument("base", type=Path, help="Results of the base commit")
+    parser.add_argument("new", type=Path, help="Results of the new commit")
+    args = parser.parse_args(argv)
+
+    base = json.loads(args.base.read_text())
+    new = json.loads(args.new.read_text())
+
+    print("\n".join(compare(base, new)))
+
+
+if __name__ == "__main__":
+    main()
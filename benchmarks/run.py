@@ -0,0 +1,444 @@
+"""
+Times each node of the project on synthetic tweets and saves the results as JSON.
+
+Example:
+
+    python -m benchmarks.run --tweets-per-week 2000 --newspapers 4 --weeks 3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import yaml
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from .stub_analyzer import EMOTION_LABELS, SENTIMENT_LABELS, stub_analyzer
+from .synthetic import NEWSPAPERS, write_raw_tweets
+
+PROJECT_PATH = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(PROJECT_PATH / "src"))
+
+from newspapersAnalysis.extras.datasets.tweets_stream_dataset import (  # noqa: E402
+    TweetsStreamDataset,
+)
+from newspapersAnalysis.pipelines.cleaning_and_preprocessing.nodes import (  # noqa: E402
+    clean_data,
+    compile_raw_data,
+)
+from newspapersAnalysis.pipelines.eda.nodes import (  # noqa: E402
+    create_stats_summary,
+    create_top30,
+    create_unique_words,
+)
+from newspapersAnalysis.pipelines.feature_engineering.nodes import (  # noqa: E402
+    make_corpus,
+    make_data_dtm,
+    make_dtm,
+    make_dtm_newspaper,
+)
+from newspapersAnalysis.pipelines.sentiment_emotion_analysis.nodes import (  # noqa: E402
+    sentiment_emotion_analysis,
+)
+from newspapersAnalysis.pipelines.topic_modeling.nodes import (  # noqa: E402
+    topic_modeling,
+)
+
+
+@dataclass
+class Stage:
+    """A node of the project and where its inputs come from.
+
+    Attributes:
+        name (str): Name of the node in the pipelines
+        func (Callable): Node function
+        inputs (List[str]): Outputs of previous stages, parameters (``params:``) or analyzers passed to the node
+        outputs (List[str]): Names given to the outputs of the node
+        tweets_from (str): Input whose rows are counted as the tweets processed by the node
+    """
+
+    name: str
+    func: Callable
+    inputs: List[str]
+    outputs: List[str]
+    tweets_from: str
+    partitioned_inputs: List[str] = field(init=False)
+
+    def __post_init__(self):
+        self.partitioned_inputs = [
+            name
+            for name in self.inputs
+            if not name.startswith("params:") and not name.endswith("_analyzer")
+        ]
+
+
+STAGES = [
+    Stage(
+        "compile_raw_data_node",
+        compile_raw_data,
+        ["newspapers_raw_tweets"],
+        ["raw_data"],
+        "raw_data",
+    ),
+    Stage(
+        "clean_data_node",
+        clean_data,
+        ["raw_data", "params:non_relevant_phrases", "params:normalizer"],
+        ["clean_data"],
+        "raw_data",
+    ),
+    Stage("make_corpus_node", make_corpus, ["clean_data"], ["corpus"], "clean_data"),
+    Stage(
+        "create_stats_summary_node",
+        create_stats_summary,
+        ["clean_data"],
+        ["stats_summary"],
+        "clean_data",
+    ),
+    Stage(
+        "make_data_dtm_node",
+        make_data_dtm,
+        ["corpus", "params:spacy"],
+        ["data_dtm"],
+        "corpus",
+    ),
+    Stage("make_dtm_node", make_dtm, ["data_dtm"], ["dtm"], "data_dtm"),
+    Stage(
+        "make_dtm_newspaper_node",
+        make_dtm_newspaper,
+        ["corpus", "dtm"],
+        ["dtm_newspaper"],
+        "corpus",
+    ),
+    Stage(
+        "create_top30_df_node",
+        create_top30,
+        ["dtm_newspaper", "params:top_words"],
+        ["top30_df"],
+        "data_dtm",
+    ),
+    Stage(
+        "create_unique_words_node",
+        create_unique_words,
+        ["dtm_newspaper", "corpus"],
+        ["unique_words"],
+        "corpus",
+    ),
+    Stage(
+        "topic_modeling_node",
+        topic_modeling,
+        ["data_dtm", "dtm", "params:lda"],
+        ["corpus_topic", "topic_terms", "lda_models"],
+        "data_dtm",
+    ),
+    Stage(
+        "sentiment_emotion_analysis_node",
+        sentiment_emotion_analysis,
+        ["emotion_analyzer", "sentiment_analyzer", "corpus", "params:inference"],
+        ["corpus_sentiment-emotion"],
+        "corpus",
+    ),
+]
+
+
+def _load_parameters(spacy_model: str = None) -> Dict[str, Any]:
+    """Loads the base parameters of the project, with the settings that would reuse previous results turned off.
+
+    Args:
+        spacy_model (str, optional): Spacy model used to make the Data DTM. Defaults to the model of the parameters.
+
+    Returns:
+        Dict[str, Any]: Parameters by name
+    """
+    parameters = {}
+
+    for parameters_path in sorted((PROJECT_PATH / "conf" / "base").glob("parameters*.yml")):
+        parameters.update(yaml.safe_load(parameters_path.read_text()) or {})
+
+    if spacy_model:
+        parameters["spacy"]["model"] = spacy_model
+    parameters["inference"]["cache"]["enabled"] = False
+    parameters["lda"]["online"]["enabled"] = False
+
+    return parameters
+
+
+def _default_spacy_model(spacy_model: str) -> str:
+    """Returns the spacy model of the parameters if it is installed, or a blank spanish pipeline.
+
+    Args:
+        spacy_model (str): Spacy model of the parameters
+
+    Returns:
+        str: Spacy model to use
+    """
+    import spacy
+
+    if spacy.util.is_package(spacy_model):
+        return spacy_model
+
+    print(f"{spacy_model} is not installed, using blank:es")
+    return "blank:es"
+
+
+def _partitions(data: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    # Partitions are passed to the nodes as load functions, as a PartitionedDataset does
+    return {
+        partition_id: value if callable(value) else (lambda value=value: value)
+        for partition_id, value in data.items()
+    }
+
+
+def _count_tweets(data: Dict[str, Any]) -> int:
+    return sum(len(value) for value in data.values())
+
+
+def _current_rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _max_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return resource.getrusage(who).ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def _run_stage(
+    stage: Stage, arguments: List[Any], outputs_path: str, connection: Any
+) -> None:
+    """Runs a node in a forked process, so its peak RSS is measured apart from the other nodes.
+
+    Args:
+        stage (Stage): Stage to run
+        arguments (List[Any]): Arguments of the node
+        outputs_path (str): File where the outputs of the node are pickled
+        connection (Any): Pipe where the measurements are sent
+    """
+    try:
+        baseline_rss = _current_rss_mb()
+
+        start_time = time.perf_counter()
+        outputs = stage.func(*arguments)
+        seconds = time.perf_counter() - start_time
+
+        # The forked process starts with the memory of the parent, counted in its peak RSS
+        peak_rss = _max_rss_mb(resource.RUSAGE_SELF) - baseline_rss
+        workers_peak_rss = _max_rss_mb(resource.RUSAGE_CHILDREN)
+
+        if len(stage.outputs) == 1:
+            outputs = (outputs,)
+
+        with open(outputs_path, "wb") as outputs_file:
+            pickle.dump(dict(zip(stage.outputs, outputs)), outputs_file)
+
+        connection.send(
+            {
+                "seconds": seconds,
+                "peak_rss_mb": peak_rss,
+                "baseline_rss_mb": baseline_rss,
+                "workers_peak_rss_mb": workers_peak_rss,
+            }
+        )
+    except BaseException as error:
+        connection.send({"error": repr(error)})
+        raise
+
+
+def _measure(
+    stage: Stage, arguments: List[Any], work_dir: Path
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Runs a stage and returns its measurements and outputs.
+
+    Args:
+        stage (Stage): Stage to run
+        arguments (List[Any]): Arguments of the node
+        work_dir (Path): Directory for the outputs of the stage
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: Measurements of the stage and outputs by name
+    """
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    outputs_path = work_dir / f"{stage.name}.pkl"
+
+    process = context.Process(
+        target=_run_stage, args=(stage, arguments, str(outputs_path), sender)
+    )
+    process.start()
+    sender.close()
+
+    measurements = receiver.recv()
+    process.join()
+
+    if "error" in measurements:
+        raise RuntimeError(f"{stage.name} failed: {measurements['error']}")
+
+    with open(outputs_path, "rb") as outputs_file:
+        outputs = pickle.load(outputs_file)
+    outputs_path.unlink()
+
+    return measurements, outputs
+
+
+def _git_commit() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=PROJECT_PATH, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def run_benchmark(
+    tweets_per_week: int,
+    newspapers: int,
+    weeks: int,
+    seed: int,
+    spacy_model: str,
+    nodes: List[str],
+) -> Dict[str, Any]:
+    """Writes synthetic raw tweets and times each node on them, feeding each node the outputs of the previous ones.
+
+    Args:
+        tweets_per_week (int): Tweets of each newspaper in each week
+        newspapers (int): Number of newspapers
+        weeks (int): Number of weeks
+        seed (int): Seed of the synthetic tweets
+        spacy_model (str): Spacy model used to make the Data DTM
+        nodes (List[str]): Nodes to time, every node runs but only these are reported. Empty reports all.
+
+    Returns:
+        Dict[str, Any]: Results of the benchmark
+    """
+    parameters = _load_parameters(spacy_model)
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": _git_commit(),
+        "config": {
+            "tweets_per_week": tweets_per_week,
+            "newspapers": newspapers,
+            "weeks": weeks,
+            "seed": seed,
+            "spacy_model": spacy_model,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "nodes": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="newspapers-benchmark-") as directory:
+        work_dir = Path(directory)
+        raw_paths = write_raw_tweets(
+            work_dir / "tweets", tweets_per_week, newspapers, weeks, seed=seed
+        )
+
+        datasets = {
+            "newspapers_raw_tweets": {
+                path.name: TweetsStreamDataset(str(path)).load for path in raw_paths
+            },
+            "emotion_analyzer": stub_analyzer(
+                EMOTION_LABELS, "multi_label_classification", seed=seed
+            ),
+            "sentiment_analyzer": stub_analyzer(
+                SENTIMENT_LABELS, "single_label_classification", seed=seed
+            ),
+        }
+        datasets.update({f"params:{name}": value for name, value in parameters.items()})
+
+        for stage in STAGES:
+            arguments = [
+                _partitions(datasets[name])
+                if name in stage.partitioned_inputs
+                else datasets[name]
+                for name in stage.inputs
+            ]
+
+            measurements, outputs = _measure(stage, arguments, work_dir)
+            datasets.update(outputs)
+
+            tweets = _count_tweets(datasets[stage.tweets_from])
+            measurements["tweets"] = tweets
+            measurements["tweets_per_second"] = tweets / measurements["seconds"]
+
+            if not nodes or stage.name in nodes:
+                results["nodes"][stage.name] = measurements
+
+            print(
+                f"{stage.name:<34} {measurements['seconds']:>9.2f} s "
+                f"{measurements['tweets_per_second']:>11.0f} tweets/s "
+                f"{measurements['peak_rss_mb']:>8.0f} MB peak RSS above the baseline"
+            )
+
+    return results
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Times each node of the project on synthetic tweets."
+    )
+    parser.add_argument(
+        "--tweets-per-week", type=int, default=1000, help="Tweets of each newspaper in each week"
+    )
+    parser.add_argument(
+        "--newspapers", type=int, default=4, choices=range(1, len(NEWSPAPERS) + 1), metavar="N",
+        help=f"Number of newspapers, up to {len(NEWSPAPERS)}",
+    )
+    parser.add_argument("--weeks", type=int, default=2, help="Number of weeks")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic tweets")
+    parser.add_argument(
+        "--spacy-model",
+        default=None,
+        help="Spacy model, defaults to the model of the parameters or blank:es if it is not installed",
+    )
+    parser.add_argument(
+        "--node", action="append", default=[], dest="nodes", help="Only report this node, can be repeated"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="JSON file for the results, defaults to benchmarks/results/<timestamp>-<commit>.json",
+    )
+    args = parser.parse_args(argv)
+
+    spacy_model = args.spacy_model or _default_spacy_model(
+        _load_parameters()["spacy"]["model"]
+    )
+
+    results = run_benchmark(
+        args.tweets_per_week, args.newspapers, args.weeks, args.seed, spacy_model, args.nodes
+    )
+
+    output = args.output or (
+        PROJECT_PATH
+        / "benchmarks"
+        / "results"
+        / f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{results['git']['commit'][:8] or 'nogit'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
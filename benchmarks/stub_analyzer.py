@@ -0,0 +1,67 @@
+"""
+Tiny randomly initialized analyzers with the interface of the PySentimiento models, to run offline
+"""
+import tempfile
+import torch
+
+from pathlib import Path
+from pysentimiento.analyzer import AnalyzerForSequenceClassification
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+from typing import List
+
+from .synthetic import WORDS
+
+
+SENTIMENT_LABELS = ["NEG", "NEU", "POS"]
+
+EMOTION_LABELS = ["others", "joy", "sadness", "anger", "surprise", "disgust", "fear"]
+
+_SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def stub_analyzer(
+    labels: List[str], problem_type: str, hidden_size: int = 64, seed: int = 0
+) -> AnalyzerForSequenceClassification:
+    """Builds an analyzer with a one layer BERT model over the vocabulary of the synthetic tweets.
+
+    The predictions are meaningless, but the tokenization, padding and forward passes follow the
+    same path as the real models, with a much smaller model.
+
+    Args:
+        labels (List[str]): Labels of the model
+        problem_type (str): ``single_label_classification`` as the sentiment model or
+            ``multi_label_classification`` as the emotion model
+        hidden_size (int, optional): Size of the hidden layer. Defaults to 64.
+        seed (int, optional): Seed of the model weights. Defaults to 0.
+
+    Returns:
+        AnalyzerForSequenceClassification: Analyzer
+    """
+    torch.manual_seed(seed)
+
+    vocabulary = _SPECIAL_TOKENS + sorted(set(WORDS)) + ["emoji", "usuario", "url", "hashtag"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        vocabulary_path = Path(directory) / "vocab.txt"
+        vocabulary_path.write_text("\n".join(vocabulary), encoding="utf-8")
+        tokenizer = BertTokenizerFast(str(vocabulary_path), strip_accents=False)
+
+    config = BertConfig(
+        vocab_size=len(vocabulary),
+        hidden_size=hidden_size,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=hidden_size * 2,
+        num_labels=len(labels),
+        id2label=dict(enumerate(labels)),
+        label2id={label: i for i, label in enumerate(labels)},
+        problem_type=problem_type,
+    )
+    config._name_or_path = f"benchmarks/stub-{'-'.join(labels)}"
+
+    return AnalyzerForSequenceClassification(
+        BertForSequenceClassification(config),
+        tokenizer,
+        "sentiment" if problem_type == "single_label_classification" else "emotion",
+        preprocessing_args={"lang": "es"},
+    )
@@ -0,0 +1,163 @@
+"""
+Synthetic Spanish tweets, written as the raw files returned by the Twitter API
+"""
+import json
+import numpy as np
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+
+NEWSPAPERS = [
+    "elcomercio_peru",
+    "larepublica_pe",
+    "peru21noticias",
+    "tromepe",
+    "Gestionpe",
+    "diariocorreo",
+    "ExpresoPeru",
+    "diarioojo",
+    "DiarioElPeruano",
+    "larazon_pe",
+    "elbuhoperu",
+    "ensustrece",
+]
+
+WORDS = """
+el la los las un una de del en con por para sobre entre tras según desde hasta que y o pero
+gobierno congreso presidente presidenta ministro ministra ley proyecto elecciones candidato
+partido votación fiscal fiscalía juez tribunal policía investigación denuncia corrupción
+economía precio precios dólar mercado inflación empresa empresas trabajo empleo sueldo
+minería exportaciones inversión banco crédito impuesto impuestos presupuesto obras
+fútbol selección gol goles partido campeonato universitario alianza cristal jugador técnico
+estadio liga copa victoria derrota empate clásico hinchas
+lima perú arequipa cusco piura trujillo chiclayo callao región regiones ciudad distrito
+lluvias huaico sismo temperatura clima frío calor alerta emergencia damnificados
+salud hospital vacuna pacientes médicos educación colegio universidad estudiantes docentes
+cultura música concierto película cine artista festival libro teatro
+nuevo nueva gran mayor menor primer primera último última importante grave urgente oficial
+anuncia confirma rechaza aprueba denuncia revela advierte pide exige señala afirma asegura
+hoy mañana ayer semana mes año domingo lunes martes miércoles jueves viernes sábado
+""".split()
+
+BOILERPLATE = [
+    "click aquí",
+    "lee aquí",
+    "lee más",
+    "nota completa",
+    "en vivo",
+    "entrevista exclusiva",
+    "escrito por",
+    "lee la columna de",
+]
+
+NON_RELEVANT = [
+    "horóscopo de hoy",
+    "buenos días",
+    "portada de hoy",
+    "caricatura de",
+]
+
+EMOJIS = ["😀", "🔴", "⚽", "🇵🇪", "📰", "👉", "🚨", "🎥"]
+
+HASHTAGS = ["#Perú", "#Lima", "#Congreso", "#Fútbol", "#Economía", "#Elecciones", "#Clima"]
+
+
+def _tweet_text(rng: np.random.Generator) -> str:
+    words = list(rng.choice(WORDS, size=rng.integers(8, 30)))
+
+    if rng.random() < 0.4:
+        words.insert(rng.integers(len(words)), str(rng.choice([2023, 10, 3, 1, 100, 45, 2])))
+    if rng.random() < 0.3:
+        words.insert(0, str(rng.choice(BOILERPLATE)))
+    if rng.random() < 0.03:
+        words.insert(0, str(rng.choice(NON_RELEVANT)))
+    if rng.random() < 0.3:
+        words.append(str(rng.choice(HASHTAGS)))
+    if rng.random() < 0.2:
+        words.insert(0, f"@{rng.choice(NEWSPAPERS)}")
+    if rng.random() < 0.3:
+        words.append(str(rng.choice(EMOJIS)))
+    if rng.random() < 0.8:
+        words.append(f"https://t.co/{rng.integers(10**9, 10**10)}")
+
+    text = " ".join(words)
+    return text[0].upper() + text[1:]
+
+
+def _tweet(rng: np.random.Generator, created_at: datetime) -> dict:
+    tweet_id = str(rng.integers(10**18, 2 * 10**18))
+
+    tweet = {
+        "edit_history_tweet_ids": [tweet_id],
+        "public_metrics": {
+            "retweet_count": int(rng.poisson(5)),
+            "reply_count": int(rng.poisson(3)),
+            "like_count": int(rng.poisson(20)),
+            "quote_count": int(rng.poisson(1)),
+            "bookmark_count": int(rng.poisson(1)),
+            "impression_count": int(rng.poisson(2000)),
+        },
+        "conversation_id": tweet_id,
+        "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "text": _tweet_text(rng),
+        "id": tweet_id,
+        "possibly_sensitive": bool(rng.random() < 0.02),
+    }
+
+    if rng.random() < 0.2:
+        tweet["referenced_tweets"] = [
+            {"type": "quoted", "id": str(rng.integers(10**18, 2 * 10**18))}
+        ]
+
+    return tweet
+
+
+def write_raw_tweets(
+    directory: Path,
+    tweets_per_week: int,
+    newspapers: int,
+    weeks: int,
+    first_week: str = "2023w23",
+    seed: int = 0,
+) -> List[Path]:
+    """Writes one raw tweets file per newspaper and week, named as the files of the data retrieval.
+
+    As in the real files, the file of a week holds the tweets of the previous week.
+
+    Args:
+        directory (Path): Directory of the raw tweets files
+        tweets_per_week (int): Tweets of each newspaper in each week
+        newspapers (int): Number of newspapers, up to 12
+        weeks (int): Number of weeks
+        first_week (str, optional): Retrieval week of the first file. Defaults to "2023w23".
+        seed (int, optional): Seed of the generator. Defaults to 0.
+
+    Returns:
+        List[Path]: Paths of the files written
+    """
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    year, week = map(int, first_week.split("w"))
+    first_monday = datetime.fromisocalendar(year, week, 1).replace(tzinfo=timezone.utc)
+
+    paths = []
+
+    for week_number in range(weeks):
+        retrieval_monday = first_monday + timedelta(weeks=week_number)
+        iso_calendar = retrieval_monday.isocalendar()
+
+        for newspaper in NEWSPAPERS[:newspapers]:
+            minutes = np.sort(rng.integers(0, 7 * 24 * 60, size=tweets_per_week))[::-1]
+            tweets = [
+                _tweet(rng, retrieval_monday - timedelta(weeks=1, minutes=-int(minute)))
+                for minute in minutes
+            ]
+
+            path = directory / f"{iso_calendar.year}w{iso_calendar.week}_data_{newspaper}.json"
+            path.write_text(json.dumps({"data": tweets}, ensure_ascii=False))
+            paths.append(path)
+
+    return paths
@@ -0,0 +1 @@
+"""Custom code used across the project pipelines."""
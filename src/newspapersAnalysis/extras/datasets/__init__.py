@@ -0,0 +1 @@
+"""Custom Kedro datasets for the project."""
@@ -0,0 +1,389 @@
+"""``HivePartitionedDataset`` loads/saves weekly ``Dataframes`` as Parquet files partitioned by year,
+week and newspaper, reading only the files, columns and row groups that match the projection and
+filters requested, using an underlying filesystem (e.g.: local, S3, GCS).
+"""
+import fsspec
+import operator
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from collections import defaultdict
+from copy import deepcopy
+from kedro.io.core import (
+    AbstractDataset,
+    DatasetError,
+    get_filepath_str,
+    get_protocol_and_path,
+)
+from pathlib import PurePosixPath
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from newspapersAnalysis.extras.partitions import (
+    hive_week_directory,
+    partition_key,
+    partition_week,
+)
+
+
+PARTITION_COLUMNS = ["year", "week", "newspaper"]
+
+# Type of the values of each partition column, as parsed from the directories
+_PARTITION_TYPES = {"year": int, "week": int, "newspaper": str}
+
+_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+_FILE_NAME = "part-0.parquet"
+
+_OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, values: value in values,
+    "not in": lambda value, values: value not in values,
+}
+
+Filters = List[List[Tuple[str, str, Any]]]
+
+
+def _is_predicate(item: Any) -> bool:
+    return isinstance(item, (list, tuple)) and len(item) == 3 and isinstance(item[0], str)
+
+
+def _partition_value(predicate: Tuple[str, str, Any]) -> Any:
+    """Casts the value of a predicate on a partition column to the type of the column, e.g. ``"14"`` to
+    ``14`` for ``week``, or the values of ``in`` and ``not in`` predicates.
+    """
+    column, op, value = predicate
+    cast = _PARTITION_TYPES[column]
+
+    try:
+        if op in ("in", "not in"):
+            return [cast(item) for item in value]
+        return cast(value)
+    except (TypeError, ValueError) as error:
+        raise DatasetError(
+            f"Invalid filter {predicate}, the values of '{column}' are of type {cast.__name__}"
+        ) from error
+
+
+def _to_dnf(filters: Optional[List[Any]]) -> Optional[Filters]:
+    """Converts a conjunction of predicates or a disjunction of conjunctions into the latter, checking
+    the operators and casting the values of the partition columns. Predicates can be tuples or, as
+    written in YAML, lists.
+    """
+    if not filters:
+        return None
+
+    dnf = [filters] if _is_predicate(filters[0]) else filters
+    dnf = [[tuple(predicate) for predicate in conjunction] for conjunction in dnf]
+
+    for conjunction in dnf:
+        for predicate in conjunction:
+            if not _is_predicate(predicate) or predicate[1] not in _OPERATORS:
+                raise DatasetError(
+                    f"Invalid filter {predicate}, expected (column, operator, value) with one of "
+                    f"the operators {list(_OPERATORS)}"
+                )
+
+    return [
+        [
+            (column, op, _partition_value((column, op, value)))
+            if column in PARTITION_COLUMNS
+            else (column, op, value)
+            for column, op, value in conjunction
+        ]
+        for conjunction in dnf
+    ]
+
+
+def _matches(partition_value: Any, op: str, value: Any) -> bool:
+    # Rows without a newspaper only match ``not in``, as nulls in Arrow, where ``!=`` drops them too
+    if partition_value is None:
+        return op == "not in"
+
+    return _OPERATORS[op](partition_value, value)
+
+
+def _file_filters(
+    dnf: Optional[Filters], values: Dict[str, Any]
+) -> Tuple[bool, Optional[Filters]]:
+    """Evaluates the predicates on the partition columns with the values of a file.
+
+    Returns whether the file can have matching rows, and the predicates left for its row groups, None
+    if all its rows match.
+    """
+    if dnf is None:
+        return True, None
+
+    remaining = []
+
+    for conjunction in dnf:
+        if not all(
+            _matches(values[column], op, value)
+            for column, op, value in conjunction
+            if column in PARTITION_COLUMNS
+        ):
+            continue
+
+        row_predicates = [
+            predicate for predicate in conjunction if predicate[0] not in PARTITION_COLUMNS
+        ]
+
+        if not row_predicates:
+            return True, None
+
+        remaining.append(row_predicates)
+
+    return bool(remaining), remaining or None
+
+
+class HivePartitionedDataset(AbstractDataset[Dict[str, Any], Dict[str, Callable[[], Any]]]):
+    """``HivePartitionedDataset`` stores the ``Dataframe`` of each week as one Parquet file per
+    newspaper, in ``year={year}/week={week}/newspaper={newspaper}`` directories, and loads them, as a
+    ``PartitionedDataset``, as a dictionary of load functions by partition id.
+
+    The ids of the partitions are built from the ``partition_id`` template, so the nodes keep the ids
+    of the Feather partitions. Saving a week replaces all its files. The rows of each file are sorted
+    by ``sort_by`` and written in row groups of ``row_group_size`` rows, and the index is stored with
+    them, so the rows of a week are loaded in their original order.
+
+    The ``columns`` and ``filters`` of ``load_args``, or of ``query``, are pushed down to the files:
+    filters use the ``pyarrow`` disjunctive normal form, e.g.
+    ``[("newspaper", "==", "elcomercio_peru"), ("week", ">=", 14)]``. Predicates on ``year``, ``week``
+    and ``newspaper`` are evaluated on the directories, so the files of other weeks and newspapers are
+    never opened, and predicates on other columns skip the row groups whose statistics don't match.
+    Weeks without matching files are left out.
+
+    Example usage for the YAML API:
+
+    .. code-block:: yaml
+
+        corpus:
+          type: newspapersAnalysis.extras.datasets.hive_partitioned_dataset.HivePartitionedDataset
+          path: data/05_model_input/corpus
+          partition_id: corpus-({year}, {week}).feather
+
+        corpus_sentiment-emotion@elcomercio:
+          type: newspapersAnalysis.extras.datasets.hive_partitioned_dataset.HivePartitionedDataset
+          path: data/07_model_output/corpus-sentiment-emotion
+          partition_id: corpus_emotion-({year}, {week}).feather
+          load_args:
+            columns: [id, created_at, sentiment_output]
+            filters: [[newspaper, ==, elcomercio_peru], [year, ==, 2023], [week, ">=", 14]]
+    """
+
+    DEFAULT_SAVE_ARGS = {"row_group_size": 10000, "compression": "snappy"}
+
+    def __init__(
+        self,
+        path: str,
+        partition_id: str = "({year}, {week})",
+        sort_by: str = "created_at",
+        load_args: Dict[str, Any] = None,
+        save_args: Dict[str, Any] = None,
+        credentials: Dict[str, Any] = None,
+        fs_args: Dict[str, Any] = None,
+    ) -> None:
+        """Creates a new instance of ``HivePartitionedDataset`` pointing to a directory.
+
+        Args:
+            path (str): Path in POSIX format to the directory of the partitions, optionally prefixed
+                with a protocol like `s3://`.
+            partition_id (str, optional): Template of the partition ids, formatted with the ``year``
+                and ``week`` of each partition. Defaults to "({year}, {week})".
+            sort_by (str, optional): Column the rows of each file are sorted by, so its row groups
+                cover ranges of it. Not sorted if the column is missing. Defaults to "created_at".
+            load_args (Dict[str, Any], optional): ``columns`` to load and ``filters`` of the rows.
+                Defaults to None.
+            save_args (Dict[str, Any], optional): Extra arguments to pass into ``pyarrow.parquet.write_table``.
+                Defaults to ``{"row_group_size": 10000, "compression": "snappy"}``.
+            credentials (Dict[str, Any], optional): Credentials required to get access to the
+                underlying filesystem. Defaults to None.
+            fs_args (Dict[str, Any], optional): Extra arguments to pass into the underlying filesystem
+                class constructor. Defaults to None.
+        """
+        _fs_args = deepcopy(fs_args) or {}
+        _credentials = deepcopy(credentials) or {}
+
+        protocol, fs_path = get_protocol_and_path(path)
+
+        self._protocol = protocol
+        self._path = PurePosixPath(fs_path)
+        self._partition_id = partition_id
+        self._sort_by = sort_by
+        self._load_args = deepcopy(load_args) or {}
+        self._filters = _to_dnf(self._load_args.get("filters"))
+        self._save_args = {**self.DEFAULT_SAVE_ARGS, **(save_args or {})}
+        self._fs = fsspec.filesystem(self._protocol, **_credentials, **_fs_args)
+
+    def _root(self) -> str:
+        return get_filepath_str(self._path, self._protocol).rstrip("/")
+
+    def _files_by_week(self) -> Dict[Tuple[int, int], List[Tuple[str, Dict[str, Any]]]]:
+        """Returns the files of each week, with the values of their partition columns."""
+        files = defaultdict(list)
+
+        for file_path in sorted(
+            self._fs.glob(f"{self._root()}/year=*/week=*/newspaper=*/*.parquet")
+        ):
+            values = dict(
+                part.split("=", 1) for part in PurePosixPath(file_path).parts[-4:-1]
+            )
+            year, week = int(values["year"]), int(values["week"])
+            newspaper = values["newspaper"]
+
+            files[(year, week)].append(
+                (
+                    file_path,
+                    {
+                        "year": year,
+                        "week": week,
+                        "newspaper": None
+                        if newspaper == _DEFAULT_PARTITION
+                        else unquote(newspaper),
+                    },
+                )
+            )
+
+        return dict(sorted(files.items()))
+
+    def _partitions(
+        self, columns: Optional[List[str]], dnf: Optional[Filters]
+    ) -> Dict[str, Callable[[], pd.DataFrame]]:
+        partitions = {}
+
+        for (year, week), week_files in self._files_by_week().items():
+            selected = []
+
+            for file_path, values in week_files:
+                matches, row_filters = _file_filters(dnf, values)
+                if matches:
+                    selected.append((file_path, row_filters))
+
+            if selected:
+                partition_id = self._partition_id.format(year=year, week=week)
+                partitions[partition_id] = lambda selected=selected: self._load_week(
+                    selected, columns
+                )
+
+        return partitions
+
+    def _load_week(
+        self, selected: List[Tuple[str, Optional[Filters]]], columns: Optional[List[str]]
+    ) -> pd.DataFrame:
+        frames = [
+            pq.read_table(
+                file_path,
+                columns=columns,
+                filters=row_filters,
+                filesystem=self._fs,
+                partitioning=None,
+                use_pandas_metadata=True,
+            ).to_pandas()
+            for file_path, row_filters in selected
+        ]
+
+        data = pd.concat(frames) if len(frames) > 1 else frames[0]
+        data = data.sort_index(kind="stable")
+
+        if data.index.equals(pd.RangeIndex(len(data))):
+            data.index = pd.RangeIndex(len(data))
+
+        return data
+
+    def _load(self) -> Dict[str, Callable[[], pd.DataFrame]]:
+        return self._partitions(self._load_args.get("columns"), self._filters)
+
+    def query(
+        self, columns: List[str] = None, filters: List[Any] = None
+    ) -> pd.DataFrame:
+        """Loads the rows of all the weeks that match ``filters`` in a single ``Dataframe``, e.g. the
+        sentiment of a newspaper during a quarter.
+
+        Args:
+            columns (List[str], optional): Columns to load. Defaults to all the columns.
+            filters (List[Any], optional): Filters of the rows, in the ``pyarrow`` disjunctive normal
+                form. Defaults to all the rows.
+
+        Returns:
+            pd.DataFrame: Matching rows, in chronological order of their weeks
+        """
+        partitions = self._partitions(columns, _to_dnf(filters))
+
+        if not partitions:
+            return pd.DataFrame(columns=columns)
+
+        return pd.concat(
+            [load_function() for load_function in partitions.values()],
+            ignore_index=True,
+        )
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        weeks = {}
+
+        for partition_id, partition_data in data.items():
+            key = partition_key(partition_id)
+
+            if key is None:
+                raise DatasetError(f"Partition {partition_id} has no week key")
+            if key in weeks:
+                raise DatasetError(
+                    f"Partitions {weeks[key]} and {partition_id} have the same week {key}"
+                )
+
+            weeks[key] = partition_id
+
+        for key, partition_id in sorted(weeks.items(), key=lambda item: partition_week(item[0])):
+            partition_data = data[partition_id]
+            if callable(partition_data):
+                partition_data = partition_data()
+
+            self._save_week(f"{self._root()}/{hive_week_directory(key)}", partition_data)
+
+    def _save_week(self, week_path: str, data: pd.DataFrame) -> None:
+        if "newspaper" not in data.columns:
+            raise DatasetError(
+                f"{self.__class__.__name__} needs a 'newspaper' column to partition the rows"
+            )
+
+        if self._fs.exists(week_path):
+            self._fs.rm(week_path, recursive=True)
+
+        if self._sort_by in data.columns:
+            data = data.sort_values(self._sort_by, kind="stable")
+
+        groups = (
+            data.groupby("newspaper", sort=True, dropna=False)
+            if len(data)
+            else [(None, data)]
+        )
+
+        for newspaper, newspaper_data in groups:
+            directory = (
+                f"{week_path}/newspaper="
+                f"{_DEFAULT_PARTITION if pd.isna(newspaper) else quote(str(newspaper), safe='')}"
+            )
+            table = pa.Table.from_pandas(newspaper_data, preserve_index=True)
+
+            self._fs.makedirs(directory, exist_ok=True)
+            with self._fs.open(f"{directory}/{_FILE_NAME}", mode="wb") as fs_file:
+                pq.write_table(table, fs_file, **self._save_args)
+
+    def _exists(self) -> bool:
+        return bool(self._files_by_week())
+
+    def _describe(self) -> Dict[str, Any]:
+        return {
+            "path": self._path,
+            "protocol": self._protocol,
+            "partition_id": self._partition_id,
+            "sort_by": self._sort_by,
+            "load_args": self._load_args,
+            "save_args": self._save_args,
+        }
@@ -0,0 +1,193 @@
+"""``SparseDTMDataset`` loads/saves a sparse Document-Term Matrix from/to a compressed
+NumPy ``.npz`` file using an underlying filesystem (e.g.: local, S3, GCS).
+"""
+import fsspec
+import io
+import numpy as np
+import pandas as pd
+
+from copy import deepcopy
+from dataclasses import dataclass
+from kedro.io.core import AbstractDataset, get_filepath_str, get_protocol_and_path
+from pathlib import PurePosixPath
+from scipy import sparse
+from typing import Any, Dict
+
+
+_ROWS_PREFIX = "rows."
+
+
+def _to_plain_array(column: pd.Series) -> np.ndarray:
+    """Converts a column into a NumPy array that can be stored without pickling."""
+    array = column.to_numpy()
+    if array.dtype.kind == "O":
+        array = array.astype(str)
+    return array
+
+
+@dataclass
+class SparseDTM:
+    """Document-Term Matrix stored as CSR counts together with its row and vocabulary indexes.
+
+    Attributes:
+        matrix (sparse.csr_matrix): Term counts, one row per document and one column per term.
+        vocabulary (np.ndarray): Term of each column of the matrix.
+        rows (pd.DataFrame): Index of the matrix rows, one record per row (e.g. the tweet ``id``).
+    """
+
+    matrix: sparse.csr_matrix
+    vocabulary: np.ndarray
+    rows: pd.DataFrame
+
+    @classmethod
+    def from_documents(cls, doc_ids: pd.Series, documents: pd.Series) -> "SparseDTM":
+        """Builds a DTM from a Series of token lists. Repeated ids are merged into a single row.
+
+        Args:
+            doc_ids (pd.Series): Id of each document.
+            documents (pd.Series): List of tokens of each document, aligned with ``doc_ids``.
+
+        Returns:
+            SparseDTM: DTM with one row per unique id and one column per unique token.
+        """
+        doc_codes, doc_index = pd.factorize(doc_ids.to_numpy())
+
+        tokens = pd.Series(documents.to_numpy()).explode()
+        tokens = tokens[tokens.notna()]
+
+        term_codes, vocabulary = pd.factorize(tokens.to_numpy(), sort=True)
+        row_codes = doc_codes[tokens.index.to_numpy()]
+
+        matrix = sparse.coo_matrix(
+            (np.ones(term_codes.size, dtype=np.int32), (row_codes, term_codes)),
+            shape=(doc_index.size, vocabulary.size),
+        ).tocsr()
+
+        return cls(
+            matrix=matrix,
+            vocabulary=np.asarray(vocabulary, dtype=str),
+            rows=pd.DataFrame({doc_ids.name or "id": doc_index}),
+        )
+
+    def row_positions(self, column: str, values: Any) -> np.ndarray:
+        """Returns the positions of the rows whose ``column`` value is in ``values``.
+
+        Args:
+            column (str): Column of ``rows`` to look up.
+            values (Any): Values to look for.
+
+        Returns:
+            np.ndarray: Positions of the matching rows.
+        """
+        return np.flatnonzero(self.rows[column].isin(values).to_numpy())
+
+    def to_frame(self, index: str = "id") -> pd.DataFrame:
+        """Densifies the DTM into a ``Dataframe``. Meant for exploration of small matrices only.
+
+        Args:
+            index (str, optional): Column of ``rows`` to use as index. Defaults to "id".
+
+        Returns:
+            pd.DataFrame: Dense DTM with the vocabulary as columns.
+        """
+        return pd.DataFrame(
+            self.matrix.toarray(),
+            index=self.rows[index].to_numpy(),
+            columns=self.vocabulary,
+        )
+
+
+class SparseDTMDataset(AbstractDataset[SparseDTM, SparseDTM]):
+    """``SparseDTMDataset`` loads/saves a ``SparseDTM`` from/to a compressed ``.npz`` file.
+
+    The CSR arrays, the vocabulary and every column of the row index are stored as separate
+    arrays, so no pickling is involved and the file size scales with the non-zero counts.
+
+    Example usage for the YAML API:
+
+    .. code-block:: yaml
+
+        dtm:
+          type: PartitionedDataset
+          dataset: newspapersAnalysis.extras.datasets.sparse_dtm_dataset.SparseDTMDataset
+          path: data/04_feature/dtm-sparse
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        credentials: Dict[str, Any] = None,
+        fs_args: Dict[str, Any] = None,
+    ) -> None:
+        """Creates a new instance of ``SparseDTMDataset`` pointing to a concrete ``.npz`` file.
+
+        Args:
+            filepath (str): Filepath in POSIX format to a ``.npz`` file, optionally prefixed with a
+                protocol like `s3://`.
+            credentials (Dict[str, Any], optional): Credentials required to get access to the
+                underlying filesystem. Defaults to None.
+            fs_args (Dict[str, Any], optional): Extra arguments to pass into the underlying filesystem
+                class constructor. Defaults to None.
+        """
+        _fs_args = deepcopy(fs_args) or {}
+        _credentials = deepcopy(credentials) or {}
+
+        protocol, path = get_protocol_and_path(filepath)
+        if protocol == "file":
+            _fs_args.setdefault("auto_mkdir", True)
+
+        self._protocol = protocol
+        self._filepath = PurePosixPath(path)
+        self._fs = fsspec.filesystem(self._protocol, **_credentials, **_fs_args)
+
+    def _load(self) -> SparseDTM:
+        load_path = get_filepath_str(self._filepath, self._protocol)
+
+        with self._fs.open(load_path, mode="rb") as fs_file:
+            arrays = np.load(io.BytesIO(fs_file.read()), allow_pickle=False)
+
+            matrix = sparse.csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=tuple(arrays["shape"]),
+            )
+            rows = pd.DataFrame(
+                {
+                    key.removeprefix(_ROWS_PREFIX): arrays[key]
+                    for key in arrays.files
+                    if key.startswith(_ROWS_PREFIX)
+                }
+            )
+
+            return SparseDTM(matrix=matrix, vocabulary=arrays["vocabulary"], rows=rows)
+
+    def _save(self, data: SparseDTM) -> None:
+        save_path = get_filepath_str(self._filepath, self._protocol)
+
+        matrix = data.matrix.tocsr()
+        rows = {
+            f"{_ROWS_PREFIX}{column}": _to_plain_array(data.rows[column])
+            for column in data.rows.columns
+        }
+
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            data=matrix.data,
+            indices=matrix.indices,
+            indptr=matrix.indptr,
+            shape=np.array(matrix.shape),
+            vocabulary=np.asarray(data.vocabulary, dtype=str),
+            **rows,
+        )
+
+        with self._fs.open(save_path, mode="wb") as fs_file:
+            fs_file.write(buffer.getvalue())
+
+        self._fs.invalidate_cache(save_path)
+
+    def _exists(self) -> bool:
+        load_path = get_filepath_str(self._filepath, self._protocol)
+        return self._fs.exists(load_path)
+
+    def _describe(self) -> Dict[str, Any]:
+        return {"filepath": self._filepath, "protocol": self._protocol}
@@ -0,0 +1,118 @@
+"""``TopicTermsDataset`` loads/saves the topic-term matrices of several topic models from/to a
+compressed NumPy ``.npz`` file using an underlying filesystem (e.g.: local, S3, GCS).
+"""
+import fsspec
+import io
+import numpy as np
+
+from copy import deepcopy
+from dataclasses import dataclass
+from kedro.io.core import AbstractDataset, get_filepath_str, get_protocol_and_path
+from pathlib import PurePosixPath
+from typing import Any, Dict
+
+
+_TOPICS_SUFFIX = "/topics"
+_VOCABULARY_SUFFIX = "/vocabulary"
+
+
+@dataclass
+class TopicTerms:
+    """Topic-term matrix of a topic model together with its vocabulary.
+
+    Attributes:
+        topics (np.ndarray): Probability of each term (columns) in each topic (rows), as float32.
+        vocabulary (np.ndarray): Term of each column of ``topics``.
+    """
+
+    topics: np.ndarray
+    vocabulary: np.ndarray
+
+
+class TopicTermsDataset(AbstractDataset[Dict[str, TopicTerms], Dict[str, TopicTerms]]):
+    """``TopicTermsDataset`` loads/saves a dictionary of ``TopicTerms`` (e.g. one per newspaper)
+    from/to a compressed ``.npz`` file.
+
+    Each model is stored as two arrays, ``{name}/topics`` and ``{name}/vocabulary``, so the file
+    can be read with NumPy alone and no pickling is involved.
+
+    Example usage for the YAML API:
+
+    .. code-block:: yaml
+
+        topic_terms:
+          type: PartitionedDataset
+          dataset: newspapersAnalysis.extras.datasets.topic_terms_dataset.TopicTermsDataset
+          path: data/07_model_output/topic-terms
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        credentials: Dict[str, Any] = None,
+        fs_args: Dict[str, Any] = None,
+    ) -> None:
+        """Creates a new instance of ``TopicTermsDataset`` pointing to a concrete ``.npz`` file.
+
+        Args:
+            filepath (str): Filepath in POSIX format to a ``.npz`` file, optionally prefixed with a
+                protocol like `s3://`.
+            credentials (Dict[str, Any], optional): Credentials required to get access to the
+                underlying filesystem. Defaults to None.
+            fs_args (Dict[str, Any], optional): Extra arguments to pass into the underlying filesystem
+                class constructor. Defaults to None.
+        """
+        _fs_args = deepcopy(fs_args) or {}
+        _credentials = deepcopy(credentials) or {}
+
+        protocol, path = get_protocol_and_path(filepath)
+        if protocol == "file":
+            _fs_args.setdefault("auto_mkdir", True)
+
+        self._protocol = protocol
+        self._filepath = PurePosixPath(path)
+        self._fs = fsspec.filesystem(self._protocol, **_credentials, **_fs_args)
+
+    def _load(self) -> Dict[str, TopicTerms]:
+        load_path = get_filepath_str(self._filepath, self._protocol)
+
+        with self._fs.open(load_path, mode="rb") as fs_file:
+            arrays = np.load(io.BytesIO(fs_file.read()), allow_pickle=False)
+
+            return {
+                key.removesuffix(_TOPICS_SUFFIX): TopicTerms(
+                    topics=arrays[key],
+                    vocabulary=arrays[
+                        key.removesuffix(_TOPICS_SUFFIX) + _VOCABULARY_SUFFIX
+                    ],
+                )
+                for key in arrays.files
+                if key.endswith(_TOPICS_SUFFIX)
+            }
+
+    def _save(self, data: Dict[str, TopicTerms]) -> None:
+        save_path = get_filepath_str(self._filepath, self._protocol)
+
+        arrays = {}
+        for name, topic_terms in data.items():
+            arrays[f"{name}{_TOPICS_SUFFIX}"] = np.asarray(
+                topic_terms.topics, dtype=np.float32
+            )
+            arrays[f"{name}{_VOCABULARY_SUFFIX}"] = np.asarray(
+                topic_terms.vocabulary, dtype=str
+            )
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+
+        with self._fs.open(save_path, mode="wb") as fs_file:
+            fs_file.write(buffer.getvalue())
+
+        self._fs.invalidate_cache(save_path)
+
+    def _exists(self) -> bool:
+        load_path = get_filepath_str(self._filepath, self._protocol)
+        return self._fs.exists(load_path)
+
+    def _describe(self) -> Dict[str, Any]:
+        return {"filepath": self._filepath, "protocol": self._protocol}
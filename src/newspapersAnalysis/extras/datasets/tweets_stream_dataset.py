@@ -0,0 +1,321 @@
+"""``TweetsStreamDataset`` loads the tweets retrieved from the Twitter API in chunks of typed
+``Dataframes``, parsing the JSON or newline-delimited JSON file incrementally using an underlying
+filesystem (e.g.: local, S3, GCS).
+"""
+import fsspec
+import json
+import numpy as np
+import pandas as pd
+
+from copy import deepcopy
+from fsspec.utils import infer_compression
+from kedro.io.core import (
+    AbstractDataset,
+    DatasetError,
+    get_filepath_str,
+    get_protocol_and_path,
+)
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+
+PUBLIC_METRICS = [
+    "retweet_count",
+    "reply_count",
+    "like_count",
+    "quote_count",
+    "bookmark_count",
+    "impression_count",
+]
+
+_STRING_FIELDS = ["created_at", "id", "conversation_id", "text"]
+
+_OBJECT_FIELDS = ["edit_history_tweet_ids", "referenced_tweets"]
+
+_READ_SIZE = 1 << 20
+
+_DECODER = json.JSONDecoder()
+
+_NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+
+
+class _JSONStream:
+    """Reads JSON values one at a time from a text file, keeping only the unparsed text in memory."""
+
+    def __init__(self, text_file: TextIO) -> None:
+        self._file = text_file
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Reads the next block of the file, dropping the text already parsed."""
+        if self._eof:
+            return False
+
+        block = self._file.read(_READ_SIZE)
+        self._buffer = self._buffer[self._position :] + block
+        self._position = 0
+        self._eof = not block
+
+        return bool(block)
+
+    def next_char(self) -> Optional[str]:
+        """Returns the next non whitespace character without consuming it, None at the end of the file."""
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position].isspace()
+            ):
+                self._position += 1
+
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+
+            if not self._fill():
+                return None
+
+    def expect(self, characters: str) -> str:
+        """Consumes the next non whitespace character, which has to be one of ``characters``."""
+        character = self.next_char()
+
+        if character is None or character not in characters:
+            raise DatasetError(
+                f"Malformed tweets file, expected one of '{characters}' and found '{character}'"
+            )
+
+        self._position += 1
+        return character
+
+    def value(self) -> Any:
+        """Parses the next JSON value, reading more of the file until the value is complete."""
+        self.next_char()
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A number could continue in the part of the file not read yet
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+
+            self._position = end
+            return value
+
+
+def _array_items(stream: _JSONStream, key: str) -> Iterator[Dict[str, Any]]:
+    """Yields the items of the array stored in ``key`` of the top level object, one at a time."""
+    stream.expect("{")
+
+    if stream.next_char() == "}":
+        return
+
+    while True:
+        name = stream.value()
+        stream.expect(":")
+
+        if name == key:
+            stream.expect("[")
+
+            if stream.next_char() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.expect(",]") == "]":
+                        break
+        else:
+            stream.value()
+
+        if stream.expect(",}") == "}":
+            return
+
+
+class _ColumnBuffers:
+    """Accumulates the fields of the tweets of a chunk in one list per column of the fixed schema."""
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self._columns = {
+            column: []
+            for column in [
+                *_STRING_FIELDS,
+                *_OBJECT_FIELDS,
+                "possibly_sensitive",
+                *PUBLIC_METRICS,
+            ]
+        }
+
+    def __len__(self) -> int:
+        return len(self._columns["id"])
+
+    def append(self, tweet: Dict[str, Any]) -> None:
+        for field in [*_STRING_FIELDS, *_OBJECT_FIELDS]:
+            self._columns[field].append(tweet.get(field))
+
+        self._columns["possibly_sensitive"].append(
+            bool(tweet.get("possibly_sensitive", False))
+        )
+
+        public_metrics = tweet.get("public_metrics", {})
+        for metric in PUBLIC_METRICS:
+            self._columns[metric].append(public_metrics.get(metric))
+
+    def to_frame(self, start: int) -> pd.DataFrame:
+        """Builds the typed ``Dataframe`` of the chunk, indexed from ``start``."""
+        columns = self._columns
+        index = pd.RangeIndex(start, start + len(self))
+
+        data = pd.DataFrame(
+            {
+                "edit_history_tweet_ids": pd.Series(
+                    columns["edit_history_tweet_ids"], index=index, dtype="object"
+                ),
+                "created_at": pd.to_datetime(
+                    pd.Series(columns["created_at"], index=index), format="ISO8601"
+                ),
+                "id": pd.Series(columns["id"], index=index, dtype="object"),
+                "conversation_id": pd.Series(
+                    columns["conversation_id"], index=index, dtype="object"
+                ),
+                "possibly_sensitive": pd.Series(
+                    columns["possibly_sensitive"], index=index, dtype=bool
+                ),
+                "text": pd.Series(columns["text"], index=index, dtype="object"),
+                **{
+                    metric: pd.Series(
+                        np.array(columns[metric], dtype=float), index=index
+                    ).astype("Int64")
+                    for metric in PUBLIC_METRICS
+                },
+                "referenced_tweets": pd.Series(
+                    columns["referenced_tweets"], index=index, dtype="object"
+                ),
+            }
+        )
+
+        self._reset()
+
+        return data
+
+
+def _ndjson_items(text_file: TextIO) -> Iterator[Dict[str, Any]]:
+    """Yields the tweets of a newline-delimited JSON file, one per line."""
+    for line in text_file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class TweetsStreamDataset(AbstractDataset[Iterator[pd.DataFrame], None]):
+    """``TweetsStreamDataset`` loads a ``{"data": [...]}`` JSON file of tweets, or a newline-delimited
+    JSON file with a tweet per line, as an iterator of ``Dataframes`` with at most ``chunk_size``
+    tweets each.
+
+    The tweets array is parsed one tweet at a time and each tweet is stored in column buffers of a
+    fixed schema (the columns of ``raw_data`` before the newspaper and week), so memory use is bounded by the chunk size instead
+    of the size of the file. The index of each chunk continues the index of the previous one. The
+    dataset is read only.
+
+    Example usage for the YAML API:
+
+    .. code-block:: yaml
+
+        newspapers_raw_tweets:
+          type: PartitionedDataset
+          path: data/01_raw/tweets
+          dataset:
+            type: newspapersAnalysis.extras.datasets.tweets_stream_dataset.TweetsStreamDataset
+            chunk_size: 10000
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        chunk_size: int = 10000,
+        file_format: str = None,
+        credentials: Dict[str, Any] = None,
+        fs_args: Dict[str, Any] = None,
+    ) -> None:
+        """Creates a new instance of ``TweetsStreamDataset`` pointing to a concrete JSON file.
+
+        Args:
+            filepath (str): Filepath in POSIX format to a JSON file, optionally prefixed with a
+                protocol like `s3://`.
+            chunk_size (int, optional): Maximum number of tweets of each ``Dataframe``. Defaults to 10000.
+            file_format (str, optional): ``json`` or ``ndjson``. Defaults to ``ndjson`` for files ending
+                in ``.ndjson`` or ``.jsonl``, optionally followed by the extension of a compression like
+                ``.gz`` or ``.zst``, and ``json`` otherwise.
+            credentials (Dict[str, Any], optional): Credentials required to get access to the
+                underlying filesystem. Defaults to None.
+            fs_args (Dict[str, Any], optional): Extra arguments to pass into the underlying filesystem
+                class constructor. Defaults to None.
+        """
+        _fs_args = deepcopy(fs_args) or {}
+        _credentials = deepcopy(credentials) or {}
+
+        protocol, path = get_protocol_and_path(filepath)
+
+        self._protocol = protocol
+        self._filepath = PurePosixPath(path)
+        self._chunk_size = chunk_size
+        # Compressed files, e.g. ``.ndjson.gz``, are decompressed as they are read
+        self._compression = infer_compression(path)
+        uncompressed_path = (
+            self._filepath.with_suffix("") if self._compression else self._filepath
+        )
+        self._file_format = file_format or (
+            "ndjson" if uncompressed_path.suffix in _NDJSON_SUFFIXES else "json"
+        )
+        if self._file_format not in ("json", "ndjson"):
+            raise DatasetError(
+                f"Unknown file format '{file_format}', expected 'json' or 'ndjson'"
+            )
+        self._fs = fsspec.filesystem(self._protocol, **_credentials, **_fs_args)
+
+    def _load(self) -> Iterator[pd.DataFrame]:
+        return self._chunks(get_filepath_str(self._filepath, self._protocol))
+
+    def _chunks(self, load_path: str) -> Iterator[pd.DataFrame]:
+        buffers = _ColumnBuffers()
+        start = 0
+
+        with self._fs.open(
+            load_path, mode="r", encoding="utf-8", compression=self._compression
+        ) as fs_file:
+            tweets = (
+                _ndjson_items(fs_file)
+                if self._file_format == "ndjson"
+                else _array_items(_JSONStream(fs_file), "data")
+            )
+
+            for tweet in tweets:
+                buffers.append(tweet)
+
+                if len(buffers) == self._chunk_size:
+                    yield buffers.to_frame(start)
+                    start += self._chunk_size
+
+        if len(buffers) or not start:
+            yield buffers.to_frame(start)
+
+    def _save(self, data: Iterator[pd.DataFrame]) -> None:
+        raise DatasetError(f"{self.__class__.__name__} is a read only dataset")
+
+    def _exists(self) -> bool:
+        load_path = get_filepath_str(self._filepath, self._protocol)
+        return self._fs.exists(load_path)
+
+    def _describe(self) -> Dict[str, Any]:
+        return {
+            "filepath": self._filepath,
+            "protocol": self._protocol,
+            "chunk_size": self._chunk_size,
+            "file_format": self._file_format,
+            "compression": self._compression,
+        }
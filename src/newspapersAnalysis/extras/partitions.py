@@ -0,0 +1,122 @@
+"""Helpers to work with the weekly partitions of the Partitioned Datasets."""
+import re
+
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+
+_PARTITION_KEY_PATTERN = re.compile(
+    r"\((?P<year>\d{4}), (?P<week>\d{1,2})\)|(?P<raw_year>\d{4})w(?P<raw_week>\d{1,2})"
+)
+
+
+def partition_key(partition_id: str) -> Optional[str]:
+    """Returns the week key of a partition, e.g. ``(2023, 22)`` for ``corpus-(2023, 22).feather``.
+
+    Raw tweets files, named ``{year}w{week}_data_{newspaper}.json``, use the week they were retrieved.
+
+    Args:
+        partition_id (str): Id of the partition, as given by a Partitioned Dataset
+
+    Returns:
+        Optional[str]: Week key of the partition, None if the id doesn't contain a week
+    """
+    match = _PARTITION_KEY_PATTERN.search(partition_id)
+
+    if match is None:
+        return None
+
+    year = match["year"] or match["raw_year"]
+    week = match["week"] or match["raw_week"]
+
+    return f"({int(year)}, {int(week)})"
+
+
+def weeks_between(key: str, other_key: str) -> int:
+    """Returns the number of ISO weeks from ``key`` to ``other_key``.
+
+    Args:
+        key (str): Week key, e.g. ``(2023, 22)``
+        other_key (str): Week key, e.g. ``(2023, 24)``
+
+    Returns:
+        int: Number of weeks between both keys, negative if ``other_key`` is before ``key``
+    """
+    return (_monday(other_key) - _monday(key)).days // 7
+
+
+def partition_week(key: str) -> Tuple[int, int]:
+    """Returns the ISO year and week of a week key, e.g. to sort weeks chronologically.
+
+    Args:
+        key (str): Week key, e.g. ``(2023, 22)``
+
+    Returns:
+        Tuple[int, int]: Year and week
+    """
+    match = _PARTITION_KEY_PATTERN.search(key)
+    return int(match["year"]), int(match["week"])
+
+
+def hive_week_directory(key: str) -> str:
+    """Returns the directory of a week in a hive partitioned dataset, e.g. ``year=2023/week=22``.
+
+    Args:
+        key (str): Week key, e.g. ``(2023, 22)``
+
+    Returns:
+        str: Directory of the week, relative to the path of the dataset
+    """
+    year, week = partition_week(key)
+    return f"year={year}/week={week}"
+
+
+def _monday(key: str) -> date:
+    return date.fromisocalendar(*partition_week(key), 1)
+
+
+def align_partitions(*partitioned_datasets: Dict[str, Any]) -> Dict[str, Tuple[str, ...]]:
+    """Pairs the partitions of several Partitioned Datasets by their week key.
+
+    Args:
+        *partitioned_datasets (Dict[str, Any]): Partitions of each dataset, by partition id
+
+    Raises:
+        ValueError: If a partition has no week key, two partitions of a dataset share a week, or the
+            datasets don't have the same weeks
+
+    Returns:
+        Dict[str, Tuple[str, ...]]: Partition id of each dataset, by week key, in the order of the first dataset
+    """
+    partition_ids_by_key = []
+
+    for partitions in partitioned_datasets:
+        partition_ids = {}
+
+        for partition_id in partitions:
+            key = partition_key(partition_id)
+
+            if key is None:
+                raise ValueError(f"Partition {partition_id} has no week key")
+            if key in partition_ids:
+                raise ValueError(
+                    f"Partitions {partition_ids[key]} and {partition_id} have the same week {key}"
+                )
+
+            partition_ids[key] = partition_id
+
+        partition_ids_by_key.append(partition_ids)
+
+    keys = partition_ids_by_key[0].keys() if partition_ids_by_key else {}
+
+    for partition_ids in partition_ids_by_key[1:]:
+        if partition_ids.keys() != keys:
+            raise ValueError(
+                f"Partitioned datasets don't have the same weeks: {sorted(keys ^ partition_ids.keys())} "
+                "are missing in some of them"
+            )
+
+    return {
+        key: tuple(partition_ids[key] for partition_ids in partition_ids_by_key)
+        for key in keys
+    }
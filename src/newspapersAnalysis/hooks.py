@@ -0,0 +1,379 @@
+"""Project hooks."""
+import fsspec
+import hashlib
+import json
+import logging
+import os
+
+from collections import defaultdict
+from kedro.framework.hooks import hook_impl
+from kedro.pipeline.node import Node
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from newspapersAnalysis.extras.partitions import (
+    hive_week_directory,
+    partition_key,
+    weeks_between,
+)
+
+
+logger = logging.getLogger("nlp-newpapersAnalysis")
+
+
+class PartitionManifest:
+    """JSON manifest recording, for each node and week, the fingerprints of the inputs used and the
+    output partitions produced from them.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        """Loads the manifest stored in ``filepath``, or starts an empty one.
+
+        Args:
+            filepath (str): Path to the JSON file of the manifest
+        """
+        self._filepath = Path(filepath)
+
+        if self._filepath.exists():
+            self._entries = json.loads(self._filepath.read_text())
+        else:
+            self._entries = {}
+
+    def get(self, node_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the entry of a node for a week, None if the week was never processed by the node."""
+        return self._entries.get(node_name, {}).get(key)
+
+    def entries(self, node_name: str) -> Dict[str, Dict[str, Any]]:
+        """Returns the entries of a node by week."""
+        return self._entries.get(node_name, {})
+
+    def invalidate(self, node_name: str, key: str) -> None:
+        """Forgets the input fingerprints of a node for a week, so the week is processed in the next run,
+        keeping its output partitions to find the weeks that have to be processed with it.
+        """
+        entry = self._entries.get(node_name, {}).get(key)
+        if entry is not None:
+            entry["inputs"] = {}
+
+    def record(
+        self,
+        node_name: str,
+        key: str,
+        inputs: Dict[str, str],
+        outputs: Dict[str, list],
+    ) -> None:
+        """Records the input fingerprints and the output partitions of a node for a week."""
+        self._entries.setdefault(node_name, {})[key] = {
+            "inputs": inputs,
+            "outputs": outputs,
+        }
+
+    def save(self) -> None:
+        """Writes the manifest, replacing the previous file only once it is fully written."""
+        self._filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        temporary_path = self._filepath.with_suffix(".tmp")
+        temporary_path.write_text(json.dumps(self._entries, indent=2, sort_keys=True))
+        os.replace(temporary_path, self._filepath)
+
+
+class IncrementalPartitionsHook:
+    """Runs the nodes over Partitioned Datasets only on the weeks that changed since their last run.
+
+    The input partitions of a node are grouped by week. A week is passed to the node if it was never
+    processed, if the fingerprint of any of its inputs (the partitions of that week, the non-partitioned
+    files and the parameters of the node) changed, or if any of the output partitions produced from it
+    is missing. Weeks are dropped from the node inputs otherwise, and as Partitioned Datasets only write
+    the partitions returned by a node, the previous outputs are kept.
+
+    Nodes listed in ``spanning_nodes`` (``compile_raw_data_node``) can write an output week from the
+    inputs of several weeks, e.g. a raw tweets file with tweets from two weeks, so their outputs are
+    attributed to the processed weeks next to them. The weeks that wrote the same output partitions as
+    a stale week are processed with it. When a new week writes a partition already written by a week
+    that was not processed, the inputs of that week are forgotten from the manifest so both are
+    processed together in the next run.
+    """
+
+    def __init__(self) -> None:
+        """Creates the hook, disabled until the catalog is created with ``incremental.enabled`` set."""
+        self._options = {}
+        self._conf_catalog = {}
+        self._manifest = None
+        self._pending = {}
+
+    @hook_impl
+    def after_catalog_created(
+        self, conf_catalog: Dict[str, Any], feed_dict: Dict[str, Any]
+    ) -> None:
+        """Keeps the catalog configuration and loads the manifest if incremental runs are enabled.
+
+        Args:
+            conf_catalog (Dict[str, Any]): Configuration of the datasets, by name
+            feed_dict (Dict[str, Any]): Parameters added to the catalog, with the ``incremental`` options
+        """
+        self._conf_catalog = conf_catalog
+        self._options = feed_dict.get("parameters", {}).get("incremental", {})
+
+        if self._options.get("enabled", False):
+            self._manifest = PartitionManifest(self._options["manifest_path"])
+
+    @hook_impl
+    def before_node_run(
+        self, node: Node, inputs: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Drops the weeks that didn't change since the last run from the partitioned inputs of a node.
+
+        Args:
+            node (Node): Node about to run
+            inputs (Dict[str, Any]): Inputs of the node, by dataset name
+
+        Returns:
+            Optional[Dict[str, Any]]: Partitioned inputs with only the weeks to process, None to keep the
+                inputs unchanged
+        """
+        if self._manifest is None:
+            return None
+
+        partitioned_inputs = [name for name in node.inputs if self._is_partitioned(name)]
+
+        if not partitioned_inputs:
+            return None
+
+        shared_fingerprints = {
+            name: self._fingerprint_input(name, inputs[name])
+            for name in node.inputs
+            if name not in partitioned_inputs
+        }
+
+        fingerprints = defaultdict(dict)
+        for name in partitioned_inputs:
+            for partition_id in inputs[name]:
+                key = partition_key(partition_id) or partition_id
+                fingerprints[key][f"{name}/{partition_id}"] = self._fingerprint_file(
+                    self._partition_path(name, partition_id)
+                )
+
+        stale_keys = {
+            key
+            for key, key_fingerprints in fingerprints.items()
+            if self._is_stale(node.name, key, {**key_fingerprints, **shared_fingerprints})
+        }
+
+        if node.name in self._options.get("spanning_nodes", []):
+            stale_keys = self._add_overlapping_keys(node.name, stale_keys) & fingerprints.keys()
+
+        logger.info(
+            f"[bold blue]Incremental ->[/bold blue] {node.name}: "
+            f"{len(stale_keys)} of {len(fingerprints)} weeks to process",
+            extra={"markup": True},
+        )
+
+        self._pending[node.name] = {
+            key: {**fingerprints[key], **shared_fingerprints} for key in stale_keys
+        }
+
+        return {
+            name: {
+                partition_id: load_function
+                for partition_id, load_function in inputs[name].items()
+                if (partition_key(partition_id) or partition_id) in stale_keys
+            }
+            for name in partitioned_inputs
+        }
+
+    @hook_impl
+    def after_node_run(self, node: Node, outputs: Dict[str, Any]) -> None:
+        """Records the fingerprints of the weeks processed by a node and the partitions written from them.
+
+        Args:
+            node (Node): Node that ran
+            outputs (Dict[str, Any]): Outputs of the node, by dataset name
+        """
+        if self._manifest is None or node.name not in self._pending:
+            return
+
+        processed = self._pending.pop(node.name)
+
+        produced = defaultdict(lambda: defaultdict(list))
+        for name, partitions in outputs.items():
+            if not self._is_partitioned(name):
+                continue
+
+            for partition_id in partitions:
+                for processed_key in self._source_keys(node.name, partition_id, processed):
+                    produced[processed_key][name].append(partition_id)
+
+        if node.name in self._options.get("spanning_nodes", []):
+            self._invalidate_partial_outputs(node.name, processed.keys(), produced)
+
+        for key, key_fingerprints in processed.items():
+            self._manifest.record(
+                node.name, key, key_fingerprints, dict(produced.get(key, {}))
+            )
+
+        self._manifest.save()
+
+    def _source_keys(
+        self, node_name: str, partition_id: str, processed: Iterable[str]
+    ) -> List[str]:
+        """Returns the processed weeks an output partition is attributed to. Spanning nodes attribute it to
+        the processed weeks next to it, other nodes to the same week. Partitions without a matching week
+        are attributed to every processed week.
+        """
+        key = partition_key(partition_id)
+
+        if node_name in self._options.get("spanning_nodes", []) and key is not None:
+            source_keys = [
+                processed_key
+                for processed_key in processed
+                if partition_key(processed_key) is not None
+                and abs(weeks_between(key, processed_key)) <= 1
+            ]
+        else:
+            source_keys = [key or partition_id] if (key or partition_id) in processed else []
+
+        return source_keys or list(processed)
+
+    def _add_overlapping_keys(self, node_name: str, keys: Set[str]) -> Set[str]:
+        """Adds the weeks that wrote any of the output partitions written by ``keys``, as those partitions
+        need the inputs of all of them.
+        """
+        keys = set(keys)
+        entries = self._manifest.entries(node_name)
+
+        while True:
+            outputs = {
+                (name, partition_id)
+                for key in keys
+                for name, partition_ids in entries.get(key, {}).get("outputs", {}).items()
+                for partition_id in partition_ids
+            }
+            overlapping = {
+                key
+                for key, entry in entries.items()
+                if key not in keys
+                and any(
+                    (name, partition_id) in outputs
+                    for name, partition_ids in entry["outputs"].items()
+                    for partition_id in partition_ids
+                )
+            }
+
+            if not overlapping:
+                return keys
+
+            keys |= overlapping
+
+    def _invalidate_partial_outputs(
+        self, node_name: str, processed_keys: Iterable[str], produced: Dict[str, Any]
+    ) -> None:
+        """Forgets the inputs of the weeks not processed in this run that wrote an output partition that
+        was just written, so they are processed together in the next run.
+        """
+        written = {
+            (name, partition_id)
+            for outputs in produced.values()
+            for name, partition_ids in outputs.items()
+            for partition_id in partition_ids
+        }
+
+        for key, entry in list(self._manifest.entries(node_name).items()):
+            if key in processed_keys:
+                continue
+
+            if any(
+                (name, partition_id) in written
+                for name, partition_ids in entry["outputs"].items()
+                for partition_id in partition_ids
+            ):
+                logger.warning(
+                    f"{node_name}: week {key} also wrote partitions written in this run, "
+                    "it will be processed again in the next run"
+                )
+                self._manifest.invalidate(node_name, key)
+
+    def _is_partitioned(self, name: str) -> bool:
+        return self._conf_catalog.get(name, {}).get("type", "").endswith(
+            ("PartitionedDataset", "PartitionedDataSet")
+        )
+
+    def _partition_path(self, name: str, partition_id: str) -> str:
+        conf = self._conf_catalog[name]
+
+        # Hive partitioned datasets store each week in a directory, whatever the id of the partition
+        if conf["type"].endswith("HivePartitionedDataset"):
+            key = partition_key(partition_id)
+            if key is not None:
+                return f"{conf['path'].rstrip('/')}/{hive_week_directory(key)}"
+
+        return f"{conf['path'].rstrip('/')}/{partition_id}{conf.get('filename_suffix', '')}"
+
+    def _is_stale(self, node_name: str, key: str, fingerprints: Dict[str, str]) -> bool:
+        entry = self._manifest.get(node_name, key)
+
+        if entry is None or entry["inputs"] != fingerprints:
+            return True
+
+        return not all(
+            self._file_exists(self._partition_path(name, partition_id))
+            for name, partition_ids in entry["outputs"].items()
+            for partition_id in partition_ids
+        )
+
+    def _fingerprint_input(self, name: str, data: Any) -> str:
+        if name.startswith("params:") or name == "parameters":
+            return _hash(json.dumps(data, sort_keys=True, default=str).encode("utf-8"))
+
+        filepath = self._conf_catalog.get(name, {}).get("filepath")
+        return self._fingerprint_file(filepath) if filepath else ""
+
+    def _fingerprint_file(self, path: str) -> str:
+        """Returns the fingerprint of a file or of all the files of a directory.
+
+        Args:
+            path (str): Path of the file or directory, optionally prefixed with a protocol like `s3://`
+
+        Returns:
+            str: Fingerprint, from the size and modification time or from the content of the files
+        """
+        fs, fs_path = fsspec.core.url_to_fs(path)
+
+        # Directories, as the weeks of hive partitioned datasets, are fingerprinted by their files
+        if fs.isdir(fs_path):
+            files = [
+                [file_path[len(fs_path) :], self._fingerprint_fs_file(fs, file_path)]
+                for file_path in sorted(fs.find(fs_path))
+            ]
+            return _hash(json.dumps(files).encode("utf-8"))
+
+        return self._fingerprint_fs_file(fs, fs_path)
+
+    def _fingerprint_fs_file(self, fs: fsspec.AbstractFileSystem, fs_path: str) -> str:
+        """Returns the fingerprint of a file, with the ``fingerprint`` mode of the options.
+
+        Args:
+            fs (fsspec.AbstractFileSystem): Filesystem of the file
+            fs_path (str): Path of the file in the filesystem
+
+        Returns:
+            str: Hash of the content, or the size and modification time of the file
+        """
+        if self._options.get("fingerprint", "stat") == "content":
+            digest = hashlib.blake2b(digest_size=16)
+            with fs.open(fs_path, mode="rb") as fs_file:
+                for chunk in iter(lambda: fs_file.read(1 << 20), b""):
+                    digest.update(chunk)
+            return digest.hexdigest()
+
+        info = fs.info(fs_path)
+        modified = info.get("mtime") or info.get("LastModified") or info.get("ETag")
+        return f"{info['size']}-{modified}"
+
+    @staticmethod
+    def _file_exists(path: str) -> bool:
+        fs, fs_path = fsspec.core.url_to_fs(path)
+        return fs.exists(fs_path)
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -5,49 +5,47 @@ import re
 import string
 
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from num2words import num2words
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
-def _separate_weeks(raw_tweet_data: pd.DataFrame) -> defaultdict:
+def _separate_weeks(raw_tweet_data: pd.DataFrame) -> Dict[str, pd.DataFrame]:
     """Separates a file by week and returns a dict where the keys are year_week to be appended into the year week list.
 
     Args:
         raw_tweet_data (pd.DataFrame): Dataframe with raw tweet data to separate weeks
 
     Returns:
-        defaultdict: Dictionary with year_week as keys
+        Dict[str, pd.DataFrame]: Dictionary with year_week as keys and the tweets of the week as values
     """
-    weeks = defaultdict(list)
-
     raw_tweet_data["created_at"] = pd.to_datetime(raw_tweet_data["created_at"])
 
-    raw_tweet_data["year"] = raw_tweet_data["created_at"].dt.isocalendar()["year"]
-    raw_tweet_data["week"] = raw_tweet_data["created_at"].dt.isocalendar()["week"]
-
-    raw_tweet_data["year_week"] = raw_tweet_data.apply(
-        lambda x: f"{x['year']}_{x['week']}", axis=1
-    )
+    iso_calendar = raw_tweet_data["created_at"].dt.isocalendar()
 
-    unique_year_week = raw_tweet_data["year_week"].unique()
+    raw_tweet_data["year"] = iso_calendar["year"]
+    raw_tweet_data["week"] = iso_calendar["week"]
 
-    for year_week in unique_year_week:
-        weeks[year_week].append(
-            raw_tweet_data.loc[raw_tweet_data["year_week"] == year_week]
-        )
+    raw_tweet_data["year_week"] = (
+        raw_tweet_data["year"].astype("str") + "_" + raw_tweet_data["week"].astype("str")
+    )
 
-    return weeks
+    return {
+        year_week: week_data
+        for year_week, week_data in raw_tweet_data.groupby("year_week", sort=False)
+    }
 
 
 def compile_raw_data(
-    newspaper_raw_tweets: Dict[str, Callable[[], Any]]
+    newspaper_raw_tweets: Dict[str, Callable[[], Iterator[pd.DataFrame]]]
 ) -> Dict[str, Any]:
     """Node to process and compile raw tweet data into dataframes and then save as feather files.
 
     Args:
-        newspaper_raw_json_tweets (Dict[str, Callable[[], Any]]): Dictionary containing the part of a Partitioned Dataset of JSON files.
+        newspaper_raw_tweets (Dict[str, Callable[[], Iterator[pd.DataFrame]]]): Dictionary containing the part of a Partitioned Dataset of JSON or NDJSON files, each loaded as chunks of tweets.
 
     Returns:
         Dict[str, Any]: Dictionary containing the Dataframes to save as feather files. File name: data_raw-(timestamp tuple).feather
@@ -56,70 +54,87 @@ def compile_raw_data(
     data_raw = {}
 
     for filename, load_data_function in newspaper_raw_tweets.items():
-        newspaper_name = filename.replace(".json", "").split("_data_")[-1]
+        newspaper_name = filename.split("_data_")[-1].split(".")[0]
 
-        json_data = load_data_function()
-        raw_data = json_data["data"]
+        for newspaper_df in load_data_function():
+            newspaper_df["newspaper"] = newspaper_name
 
-        newspaper_df = pd.json_normalize(raw_data)
+            newspaper_weeks = _separate_weeks(newspaper_df)
 
-        newspaper_df["newspaper"] = newspaper_name
+            for year_week, data_frame in newspaper_weeks.items():
+                year_week = year_week.split("_")
+                compiled_data[f"data_raw-({year_week[0]}, {year_week[1]})"].append(
+                    data_frame
+                )
 
-        newspaper_df.columns = newspaper_df.columns.str.removeprefix("public_metrics.")
+    logger.debug(compiled_data.keys())
 
-        newspaper_weeks = _separate_weeks(newspaper_df)
+    for filename, df_list in compiled_data.items():
+        data_raw[f"{filename}.feather"] = pd.concat(df_list).reset_index()
 
-        logger.debug(f"{newspaper_weeks}")
+    return data_raw
 
-        for year_week, data_frame in newspaper_weeks.items():
-            year_week = year_week.split("_")
-            compiled_data[f"data_raw-({year_week[0]}, {year_week[1]})"] += data_frame
 
-        logger.debug(compiled_data.keys())
+def _non_relevant_pattern(non_relevant_phrases: List[str]) -> re.Pattern:
+    """Compiles the non relevant phrases into one case insensitive alternation, with a group per phrase.
 
-        for filename, df_list in compiled_data.items():
-            data_raw[f"{filename}.feather"] = pd.concat(df_list).reset_index()
+    Args:
+        non_relevant_phrases (List[str]): Regular expressions of the non relevant phrases
 
-    return data_raw
+    Returns:
+        re.Pattern: Pattern matching any of the phrases
+    """
+    return re.compile(
+        "|".join(
+            f"(?P<rule_{i}>{phrase})" for i, phrase in enumerate(non_relevant_phrases)
+        ),
+        flags=re.IGNORECASE,
+    )
 
 
-def _drop_non_relevant(data: pd.DataFrame) -> pd.DataFrame:
+def _drop_non_relevant(
+    data: pd.DataFrame, non_relevant_pattern: re.Pattern, non_relevant_phrases: List[str]
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
     """Removing the tweets that don't add to the sentiment of the newspaper.
 
     Args:
-        raw_data (pd.DataFrame): Consolidated raw data, with all tweets.
+        data (pd.DataFrame): Consolidated raw data, with all tweets.
+        non_relevant_pattern (re.Pattern): Pattern built by ``_non_relevant_pattern``
+        non_relevant_phrases (List[str]): Non relevant phrases, in the order of the pattern groups
 
     Returns:
-        pd.DataFrame: Data without non-relevant tweets.
+        Tuple[pd.DataFrame, Dict[str, int]]: Data without non-relevant tweets, and the number of tweets
+            dropped by each phrase (the first phrase found in the text)
     """
-    non_relevant_strings = [
-        "horóscopo diario",
-        "horóscopo de",
-        "horóscopo hoy",
-        "horóscopo y tarot",
-        "horóscopo",
-        "Buenos días",
-        "caricatura de",
-        "las caricaturas de",
-        "portada impresa",
-        "portada de hoy",
-        "en portada",
-        "trome gol",
-        "no te pierdas las chiquitas de hoy",
-        "esta es la portada",
-        "Aquí la portada del",
-        "yapaza",
-    ]
+    # An empty alternation would match every tweet
+    if not non_relevant_phrases:
+        return data, {}
 
-    for non_relevant in non_relevant_strings:
-        data.drop(
-            data[
-                data["text"].str.contains(non_relevant, flags=re.IGNORECASE, regex=True)
-            ].index,
-            inplace=True,
-        )
+    matches = data["text"].str.extract(non_relevant_pattern)
+    rule_columns = [f"rule_{i}" for i in range(len(non_relevant_phrases))]
+
+    matched_rules = matches[rule_columns].notna()
+    dropped = matched_rules.any(axis=1)
+
+    drop_counts = dict(zip(non_relevant_phrases, matched_rules.sum().tolist()))
 
-    return data
+    return data.drop(index=data.index[dropped.to_numpy()]), drop_counts
+
+
+_NUMBER_PATTERN = re.compile(r"\b\d+\b")
+
+
+@lru_cache(maxsize=8192)
+def _number_to_words(number: str) -> str:
+    """Converts a number to spanish words, caching the most used numbers (years, scores, prices).
+
+    Args:
+        number (str): Digits of the number
+
+    Returns:
+        str: Number in words
+    """
+    return num2words(float(number), lang="es")
 
 
 def _number_processing(text: str) -> str:
@@ -131,16 +146,55 @@ def _number_processing(text: str) -> str:
     Returns:
         str: string with numbers processed
     """
-    numbers = re.findall(r"\b\d+\b", text)
-
-    if numbers is []:
-        return text
+    return _NUMBER_PATTERN.sub(lambda number: _number_to_words(number.group()), text)
 
-    for number in numbers:
-        word_number = num2words(float(number), lang="es")
-        text = re.sub(number, word_number, text)
 
-    return text
+_FIRST_PASS_PATTERNS = [
+    re.compile(noise)
+    for noise in [
+        r"http[s]?(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+",  # Eliminates links
+        r"\w*\d\w*",  # Eliminates numbers
+        "[%s]" % re.escape(string.punctuation),  # Eliminates punctuarion
+        "[‘’“”…«»►¿¡|│]",
+    ]
+]
+
+_BOILERPLATE_PHRASES = [
+    "click aquí",
+    "opinión",
+    "rt ",
+    "lee aquí el blog de",
+    "vía gestionpe",
+    "entrevista exclusiva",
+    "en vivo",
+    "entérate más aquí",
+    "lee la columna de",
+    "lee y comenta",
+    "lea hoy la columna de",
+    "escrito por",
+    "lee la nota aquí",
+    "una nota de",
+    "aquí la nota",
+    "nota completa aquí",
+    "nota completa",
+    "lee más",
+    "lee aquí",
+]
+
+_BOILERPLATE_PATTERNS = [re.compile(phrase) for phrase in _BOILERPLATE_PHRASES]
+
+# Texts without any of the phrases skip their removal, which has to be sequential otherwise as
+# removing a phrase can join the text around it into another phrase
+_BOILERPLATE_GATE = re.compile("|".join(map(re.escape, _BOILERPLATE_PHRASES)))
+
+_SECOND_PASS_PATTERNS = [
+    (re.compile("  "), " "),
+    (re.compile(r" \w "), " "),
+    (re.compile("^(plusg)"), ""),
+    (re.compile("( video )$"), ""),
+    (re.compile("( lee )$"), ""),
+    (re.compile("( lee la )$"), ""),
+]
 
 
 def _clean_text_first_pass(text: str) -> str:
@@ -153,17 +207,10 @@ def _clean_text_first_pass(text: str) -> str:
     """
     text = text.lower()
 
-    string_remove = [
-        "http[s]?(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+",  # Eliminates links
-        "\w*\d\w*",  # Eliminates numbers
-        "[%s]" % re.escape(string.punctuation),  # Eliminates punctuarion
-        "[‘’“”…«»►¿¡|│]",
-    ]
+    for noise in _FIRST_PASS_PATTERNS:
+        text = noise.sub("", text)
 
-    for noise in string_remove:
-        text = re.sub(noise, "", text)
-
-    text = re.sub("\n", " ", text)
+    text = text.replace("\n", " ")
 
     return text
 
@@ -174,66 +221,104 @@ def _clean_text_second_pass(text: str) -> str:
     Args:
         text (string): text to be processed.
     """
-    text = re.sub("click aquí", "", text)
-    text = re.sub("opinión", "", text)
-    text = re.sub("rt ", "", text)
-    text = re.sub("lee aquí el blog de", "", text)
-    text = re.sub("vía gestionpe", "", text)
-    text = re.sub("entrevista exclusiva", "", text)
-    text = re.sub("en vivo", "", text)
-    text = re.sub("entérate más aquí", "", text)
-    text = re.sub("lee la columna de", "", text)
-    text = re.sub("lee y comenta", "", text)
-    text = re.sub("lea hoy la columna de", "", text)
-    text = re.sub("escrito por", "", text)
-    text = re.sub("lee la nota aquí", "", text)
-    text = re.sub("una nota de", "", text)
-    text = re.sub("aquí la nota", "", text)
-    text = re.sub("nota completa aquí", "", text)
-    text = re.sub("nota completa", "", text)
-    text = re.sub("lee más", "", text)
-    text = re.sub("lee aquí", "", text)
-
-    text = re.sub("  ", " ", text)
-    text = re.sub(" \w ", " ", text)
-    text = re.sub("^(plusg)", "", text)
-    text = re.sub("( video )$", "", text)
-    text = re.sub("( lee )$", "", text)
-    text = re.sub("( lee la )$", "", text)
+    if _BOILERPLATE_GATE.search(text):
+        for phrase in _BOILERPLATE_PATTERNS:
+            text = phrase.sub("", text)
+
+    for pattern, replacement in _SECOND_PASS_PATTERNS:
+        text = pattern.sub(replacement, text)
 
     return text
 
 
-def clean_data(raw_data: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
-    """_summary_
+def _normalize_text(text: str) -> str:
+    """Runs the whole cleaning chain over a tweet: numbers to words, first pass, emojis and second pass.
 
     Args:
-        raw_data (Dict[str, Callable[[], Any]]): _description_
+        text (str): Tweet text
 
     Returns:
-        Dict[str, Any]: _description_
+        str: Clean text
     """
-    clean_data = {}
+    text = _number_processing(text)
+    text = _clean_text_first_pass(text)
+    text = emoji.replace_emoji(text, "")
+    text = _clean_text_second_pass(text)
 
-    for filename, load_data_function in raw_data.items():
-        new_filename = filename.replace("raw", "clean")
-        data = _drop_non_relevant(load_data_function())
+    return text.strip()
 
-        data["mentions"] = data["text"].apply(lambda x: re.findall("@(\w+)", x))
-        data["hasthags"] = data["text"].apply(lambda x: re.findall("#(\w+)", x))
 
-        data["text_clean"] = data["text"].apply(_number_processing)
-        data["text_clean"] = data["text_clean"].apply(
-            lambda x: _clean_text_first_pass(x)
-        )
-        data["text_clean"] = data["text_clean"].apply(
-            lambda x: emoji.replace_emoji(x, "")
-        )
-        data["text_clean"] = data["text_clean"].apply(
-            lambda x: _clean_text_second_pass(x)
+def _normalize_texts(
+    texts: pd.Series, executor: Optional[ProcessPoolExecutor], normalizer_options: Dict[str, Any]
+) -> List[str]:
+    """Normalizes the texts of a partition, in the process pool if given and the partition is large enough.
+
+    Args:
+        texts (pd.Series): Tweet texts
+        executor (Optional[ProcessPoolExecutor]): Process pool, None to normalize in this process
+        normalizer_options (Dict[str, Any]): ``min_pool_texts`` and ``chunksize`` of the process pool
+
+    Returns:
+        List[str]: Clean texts, aligned with ``texts``
+    """
+    if executor is None or len(texts) < normalizer_options["min_pool_texts"]:
+        return [_normalize_text(text) for text in texts]
+
+    return list(
+        executor.map(
+            _normalize_text, texts, chunksize=normalizer_options["chunksize"]
         )
-        data["text_clean"] = data["text_clean"].str.strip()
+    )
+
+
+def clean_data(
+    raw_data: Dict[str, Callable[[], Any]],
+    non_relevant_phrases: List[str],
+    normalizer_options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Drops the non relevant tweets of each week and adds the mentions, hashtags and clean text of each tweet.
+
+    Args:
+        raw_data (Dict[str, Callable[[], Any]]): Dictionary with the raw data Dataframes of each week
+        non_relevant_phrases (List[str]): Regular expressions of the phrases of non relevant tweets,
+            matched case insensitive
+        normalizer_options (Dict[str, Any]): Number of worker processes used to clean the texts, and the
+            size of the partitions and chunks sent to them
+
+    Returns:
+        Dict[str, Any]: Dictionary with the clean data Dataframes of each week
+    """
+    clean_data = {}
+
+    non_relevant_pattern = _non_relevant_pattern(non_relevant_phrases)
+
+    n_workers = normalizer_options["n_workers"]
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+
+    try:
+        for filename, load_data_function in raw_data.items():
+            new_filename = filename.replace("raw", "clean")
+            data, drop_counts = _drop_non_relevant(
+                load_data_function(), non_relevant_pattern, non_relevant_phrases
+            )
+
+            rule_counts = ", ".join(
+                f"{phrase}: {count}" for phrase, count in drop_counts.items() if count
+            )
+            logger.info(
+                f"{new_filename}: dropped {sum(drop_counts.values())} non relevant tweets ({rule_counts})"
+            )
+
+            data["mentions"] = data["text"].str.findall(r"@(\w+)")
+            data["hasthags"] = data["text"].str.findall(r"#(\w+)")
+
+            data["text_clean"] = _normalize_texts(
+                data["text"], executor, normalizer_options
+            )
 
-        clean_data[new_filename] = data
+            clean_data[new_filename] = data
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     return clean_data
@@ -19,7 +19,7 @@ def create_pipeline(**kwargs) -> Pipeline:
             ),
             node(
                 func=clean_data,
-                inputs="raw_data",
+                inputs=["raw_data", "params:non_relevant_phrases", "params:normalizer"],
                 outputs="clean_data",
                 name="clean_data_node",
             ),
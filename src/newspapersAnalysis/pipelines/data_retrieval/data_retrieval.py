@@ -1,309 +1,1098 @@
-import boto3
-import json
-import logging
-import requests
-import sys
-
-from datetime import datetime, timedelta
-from dotenv import dotenv_values, find_dotenv
-from pathlib import Path
-from urllib.parse import urlencode
-
-
-def get_users_id(
-    newspapers: list, BASE_DIR: str | None, BEARER_TOKEN: str | None
-) -> dict:
-    """Gets user id from target newspapers and saves it to a json file.
-
-    Args:
-        newspapers (list): Twitter handle for target newspapers
-    """
-    newspapers_id = {}
-    headers = {"Authorization": f"Bearer {BEARER_TOKEN}"}
-
-    for newspaper in newspapers:
-        username_url = f"https://api.twitter.com/2/users/by/username/{newspaper}"
-        response = requests.get(username_url, headers=headers)
-
-        newspapers_id[newspaper] = response.json()["data"]["id"]
-
-    with open(f"{BASE_DIR}/data/raw/newspapers_id.json", "w") as fp:
-        json.dump(newspapers_id, fp)
-
-    return newspapers_id
-
-
-def save_to_S3(
-    newspaper: str,
-    newspaper_data: dict,
-    SAVED_DATE: datetime,
-    AWS_KEY_ID: str,
-    AWS_SECRET: str,
-    replies: str = "",
-) -> None:
-    """Saved recorded data to S3 bucket.
-
-    Args:
-        newspaper (str): Name of the newspaper
-        newspaper_data (list): Data pulled from the Tweeter API
-        saved_date (datetime): Date that the data is being saved
-        AWSAccessKeyId (str): AWS access key
-        AWSSecretKey (str): AWS secret key
-    """
-    boto_session = boto3.Session(
-        aws_access_key_id=AWS_KEY_ID, aws_secret_access_key=AWS_SECRET
-    )
-
-    s3 = boto_session.resource("s3")
-
-    s3_object = s3.Object(
-        "nlp-newspapersanalysis",
-        f"raw_data/{SAVED_DATE.isocalendar().year}w{SAVED_DATE.isocalendar().week}_data_{newspaper}{replies}.json",
-    )
-
-    s3_object.put(
-        Body=(bytes(json.dumps(newspaper_data).encode("UTF-8"))),
-        ContentType="application/json",
-    )
-
-
-def get_users_tweets(
-    newspapers_id: dict[str, str],
-    start_time: str,
-    end_time: str,
-    BASE_DIR: str | None,
-    BEARER_TOKEN: str | None,
-    AWS_KEY_ID: str,
-    AWS_SECRET: str,
-) -> None:
-    """Gets tweets for newspapers specified between start and end times.
-
-    Args:
-        newspapers_id (dict): Dictionary containing tweeter handle and user_id for target newspapers.
-        start_time (str): Start date for tweets with '%Y-%m-%dT%H:%M:%sZ' format
-        end_time (str): End date for tweets with '%Y-%m-%dT%H:%M:%sZ' format
-    """
-    headers = {"Authorization": f"Bearer {BEARER_TOKEN}"}
-
-    DATA_DIR = f"{BASE_DIR}/data/raw"
-    SAVED_DATE = datetime.fromisoformat(end_time)
-
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-
-    logging.basicConfig(stream=sys.stdout, format=log_format, level=logging.INFO)
-
-    logger = logging.getLogger()
-
-    for newspaper, newspaper_id in newspapers_id.items():
-        query = {
-            "max_results": 100,
-            "tweet.fields": "id,conversation_id,text,created_at,public_metrics,possibly_sensitive,referenced_tweets",
-            "start_time": f"{start_time}Z",
-            "end_time": f"{end_time}Z",
-        }
-        payload = urlencode(query, safe=",:")
-
-        tweets_url = f"https://api.twitter.com/2/users/{newspaper_id}/tweets"
-        response = requests.get(tweets_url, headers=headers, params=payload)
-
-        logger.info(f"{newspaper}: status code {response.status_code}")
-
-        try:
-            response_data = response.json()["data"]  # List of tweets
-            response_meta = response.json()["meta"]
-        except KeyError:
-            logger.info(f"{newspaper}: No data found!")
-            continue
-
-        try:
-            next_token = response_meta["next_token"]
-            query["pagination_token"] = next_token
-            payload = urlencode(query, safe=",:")
-        except KeyError:
-            logger.info(f"{newspaper}: No MORE data found!")
-
-            # get_responses_to_user(
-            #     newspaper,
-            #     response_data,
-            #     BASE_DIR,
-            #     BEARER_TOKEN,
-            #     AWS_KEY_ID,
-            #     AWS_SECRET,
-            #     SAVED_DATE,
-            # )
-
-            with open(
-                f"{DATA_DIR}/{SAVED_DATE.isocalendar().year}w{SAVED_DATE.isocalendar().week}_data_{newspaper}.json",
-                "w",
-            ) as write_file:
-                json.dump({"data": response_data}, write_file)
-
-            save_to_S3(
-                newspaper, {"data": response_data}, SAVED_DATE, AWS_KEY_ID, AWS_SECRET
-            )
-
-            logging.info(f"{newspaper}: Saved! FIRST")
-            continue
-
-        while True:
-            logger.info(f"{newspaper}: New page")
-            new_response = requests.get(tweets_url, headers=headers, params=payload)
-
-            try:
-                response_data += new_response.json()["data"]
-                response_meta = new_response.json()["meta"]
-
-                next_token = response_meta["next_token"]
-                query["pagination_token"] = next_token
-                payload = urlencode(query, safe=",:")
-            except KeyError:
-                logger.info(f"{newspaper}: No MORE data found!")
-
-                # get_responses_to_user(
-                #     newspaper,
-                #     response_data,
-                #     BASE_DIR,
-                #     BEARER_TOKEN,
-                #     AWS_KEY_ID,
-                #     AWS_SECRET,
-                #     SAVED_DATE,
-                # )
-
-                with open(
-                    f"{DATA_DIR}/{SAVED_DATE.isocalendar().year}w{SAVED_DATE.isocalendar().week}_data_{newspaper}.json",
-                    "w",
-                ) as write_file:
-                    json.dump({"data": response_data}, write_file)
-
-                save_to_S3(
-                    newspaper,
-                    {"data": response_data},
-                    SAVED_DATE,
-                    AWS_KEY_ID,
-                    AWS_SECRET,
-                )
-
-                logging.info(f"{newspaper}: Saved!")
-                break
-
-
-def get_responses_to_user(
-    newspaper: str,
-    user_tweets: list,
-    BASE_DIR: str | None,
-    BEARER_TOKEN: str | None,
-    AWS_KEY_ID: str,
-    AWS_SECRET: str,
-    SAVED_DATE: datetime,
-) -> None:
-    """Check the lastest stream and gets the replys for each user, then saves it to a S3 bucket
-
-    Args:
-        newspaper (str): name of the newspaper
-        user_tweets (dict): tweets recovered by newspaper
-        BASE_DIR (str | None): local directory to save to
-        BEARER_TOKEN (str | None): Twitter API key to make the call
-        AWS_KEY_ID (str): ASW key to save to bucket
-        AWS_SECRET (str): AWS Secret to save to bucket
-    """
-    headers = {"Authorization": f"Bearer {BEARER_TOKEN}"}
-
-    DATA_DIR = f"{BASE_DIR}/data/raw"
-
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-
-    logging.basicConfig(stream=sys.stdout, format=log_format, level=logging.INFO)
-
-    logger = logging.getLogger()
-
-    response_data = []
-
-    logging.info(f"Searching for replies to {newspaper}")
-
-    for tweet in user_tweets:
-        if tweet["public_metrics"]["reply_count"] > 0:
-            logging.info(
-                f"Conversation {tweet['conversation_id']}: {tweet['public_metrics']['reply_count']} replies"
-            )
-
-            query = {
-                "conversation_id": tweet["conversation_id"],
-                "tweet.fields": "id,text,public_metrics",
-            }
-            payload = urlencode(query, safe=",:")
-
-            tweets_url = "https://api.twitter.com/2/tweets/search/recent"
-            response = requests.get(tweets_url, headers=headers, params=payload)
-
-            logger.info(
-                f"{tweet['conversation_id']}: status code {response.status_code}"
-            )
-
-            response_data.append(response.json()["data"])  # List of responses to user
-
-    with open(
-        f"{DATA_DIR}/{SAVED_DATE.isocalendar().year}w{SAVED_DATE.isocalendar().week}_data_{newspaper}_replies.json",
-        "w",
-    ) as write_file:
-        json.dump({"data": response_data}, write_file)
-
-    save_to_S3(
-        newspaper,
-        {"data": response_data},
-        SAVED_DATE,
-        AWS_KEY_ID,
-        AWS_SECRET,
-        replies="_replies",
-    )
-
-    logging.info(f"{newspaper}: Replies saved!")
-
-
-def get_data() -> None:
-    """Gets data from twitter API. Takes today's date and gets all data from the past week"""
-
-    dotenv_path = find_dotenv()
-    env_variables = dotenv_values(dotenv_path)
-
-    AWSAccessKeyId = env_variables["AWSAccessKeyId"]
-    AWSSecretKey = env_variables["AWSSecretKey"]
-
-    BASE_DIR = env_variables["BASE_DIR"]
-    BEARER_TOKEN = env_variables["BEARER_TOKEN"]
-
-    newspapers = [
-        "elcomercio_peru",
-        "larepublica_pe",
-        "peru21noticias",
-        "tromepe",
-        "Gestionpe",
-        "diariocorreo",
-        "ExpresoPeru",
-        "diarioojo",
-        "DiarioElPeruano",
-        "larazon_pe",
-    ]
-
-    if Path(f"{BASE_DIR}/data/raw/newspapers_id.json").exists():
-        with open(f"{BASE_DIR}/data/raw/newspapers_id.json", "r") as read_file:
-            newspapers_id = json.load(read_file)
-    else:
-        newspapers_id = get_users_id(newspapers, BASE_DIR, BEARER_TOKEN)
-
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    this_monday = today - timedelta(days=today.weekday())
-    last_monday = this_monday - timedelta(days=7)
-
-    get_users_tweets(
-        newspapers_id,
-        last_monday.isoformat(),
-        this_monday.isoformat(),
-        BASE_DIR,
-        BEARER_TOKEN,
-        AWSAccessKeyId,
-        AWSSecretKey,
-    )
-
-
-if __name__ == "__main__":
-    get_data()
+import boto3
+import botocore.config
+import json
+import logging
+import os
+import random
+import requests
+import sys
+import threading
+import time
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from dotenv import dotenv_values, find_dotenv
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import urlencode
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+
+TWITTER_API_URL = "https://api.twitter.com/2"
+
+# Requests allowed by the API in each rate limit window, for the user Tweet timeline and the recent search
+RATE_LIMIT_REQUESTS = 1500
+SEARCH_RATE_LIMIT_REQUESTS = 450
+RATE_LIMIT_WINDOW = 15 * 60
+
+# Maximum characters of a recent search query
+SEARCH_QUERY_LENGTH = 512
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+S3_BUCKET = "nlp-newspapersanalysis"
+
+# Compressed bytes sent in each part of a multipart upload, S3 needs at least 5 MiB but for the last part
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+
+class TokenBucket:
+    """Thread safe token bucket shared by the requests of all the newspapers.
+
+    Tokens are refilled at ``rate`` per second up to ``capacity``, and the bucket is synced with the
+    rate limit headers of the responses, so the requests stop when the API says the window is spent
+    and resume with a full bucket when it resets.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """Creates a full bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum number of tokens
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Takes a token, waiting until there is one available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated_at) * self._rate
+                )
+                self._updated_at = now
+
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._blocked_until:
+                    # The window has reset
+                    self._blocked_until = 0.0
+                    self._tokens = self._capacity - 1
+                    return
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self._rate
+
+            time.sleep(wait)
+
+    def sync(self, remaining: int, reset_at: float) -> None:
+        """Updates the bucket with the rate limit state reported by the API.
+
+        Args:
+            remaining (int): Requests left in the current window
+            reset_at (float): Epoch time in seconds when the window resets
+        """
+        with self._lock:
+            if remaining > 0:
+                if not self._blocked_until:
+                    self._tokens = min(self._capacity, remaining)
+                return
+
+            self._tokens = 0
+            self._blocked_until = max(
+                self._blocked_until,
+                time.monotonic() + max(reset_at - time.time(), 0) + 1,
+            )
+
+
+class TwitterClient:
+    """Client of the Twitter API that reuses keep-alive connections across threads, waits for the rate
+    limits and retries transient failures with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        BEARER_TOKEN: str | None,
+        base_url: str = TWITTER_API_URL,
+        max_connections: int = 10,
+        token_bucket: TokenBucket | None = None,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+    ) -> None:
+        """Creates a client with a pool of connections.
+
+        Args:
+            BEARER_TOKEN (str | None): Twitter API key to make the calls
+            base_url (str, optional): URL of the API, can point to a local server. Defaults to TWITTER_API_URL.
+            max_connections (int, optional): Connections kept in the pool, one per thread. Defaults to 10.
+            token_bucket (TokenBucket | None, optional): Bucket shared by the requests. Defaults to one with
+                the rate limit of the user Tweet timeline.
+            max_retries (int, optional): Retries of a request after a transient failure. Defaults to 5.
+            backoff (float, optional): Seconds waited before the first retry, doubled for each retry. Defaults to 1.0.
+            timeout (float, optional): Seconds waited for a response. Defaults to 30.0.
+        """
+        self._base_url = base_url.rstrip("/")
+        self._token_bucket = token_bucket or TokenBucket(
+            RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW, RATE_LIMIT_REQUESTS
+        )
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._timeout = timeout
+
+        self._session = requests.Session()
+        self._session.headers["Authorization"] = f"Bearer {BEARER_TOKEN}"
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connections
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def get(self, path: str, query: dict | None = None) -> requests.Response:
+        """Makes a GET request to an endpoint of the API.
+
+        Args:
+            path (str): Path of the endpoint, relative to the base URL
+            query (dict | None, optional): Query parameters. Defaults to None.
+
+        Returns:
+            requests.Response: Response of the API, raises the last error if the retries run out
+        """
+        payload = urlencode(query or {}, safe=",:")
+
+        for attempt in range(self._max_retries + 1):
+            self._token_bucket.acquire()
+
+            try:
+                response = self._session.get(
+                    f"{self._base_url}/{path}", params=payload, timeout=self._timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self._max_retries:
+                    raise
+                self._wait_backoff(attempt)
+                continue
+
+            reset_at = response.headers.get("x-rate-limit-reset")
+            rate_limited = response.status_code == 429 and reset_at is not None
+
+            if rate_limited:
+                # The window is spent, even if the remaining requests are not reported
+                self._token_bucket.sync(0, float(reset_at))
+            elif "x-rate-limit-remaining" in response.headers:
+                self._token_bucket.sync(
+                    int(response.headers["x-rate-limit-remaining"]),
+                    float(reset_at or time.time()),
+                )
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+
+            if attempt == self._max_retries:
+                response.raise_for_status()
+
+            logging.info(f"{path}: status code {response.status_code}, retrying")
+
+            # The token bucket already waits for the reset of a spent window
+            if not rate_limited:
+                self._wait_backoff(attempt)
+
+        return response
+
+    def _wait_backoff(self, attempt: int) -> None:
+        time.sleep(self._backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+    def close(self) -> None:
+        """Closes the connections of the pool."""
+        self._session.close()
+
+
+def get_users_id(
+    newspapers: list,
+    BASE_DIR: str | None,
+    BEARER_TOKEN: str | None,
+    base_url: str = TWITTER_API_URL,
+) -> dict:
+    """Gets user id from target newspapers and saves it to a json file.
+
+    All the usernames are looked up in a single request.
+
+    Args:
+        newspapers (list): Twitter handle for target newspapers
+        BASE_DIR (str | None): local directory to save to
+        BEARER_TOKEN (str | None): Twitter API key to make the call
+        base_url (str, optional): URL of the API. Defaults to TWITTER_API_URL.
+    """
+    client = TwitterClient(BEARER_TOKEN, base_url, max_connections=1)
+
+    try:
+        newspapers_id = {}
+
+        # The users lookup accepts up to 100 usernames per request
+        for start in range(0, len(newspapers), 100):
+            response = client.get(
+                "users/by", {"usernames": ",".join(newspapers[start : start + 100])}
+            )
+
+            for user in response.json()["data"]:
+                newspapers_id[user["username"]] = user["id"]
+    finally:
+        client.close()
+
+    # Keep the handles as written, the API can return them with a different case
+    users_id = {username.lower(): user_id for username, user_id in newspapers_id.items()}
+    newspapers_id = {
+        newspaper: users_id[newspaper.lower()]
+        for newspaper in newspapers
+        if newspaper.lower() in users_id
+    }
+
+    for newspaper in newspapers:
+        if newspaper not in newspapers_id:
+            logging.warning(f"{newspaper}: User not found!")
+
+    with open(f"{BASE_DIR}/data/raw/newspapers_id.json", "w") as fp:
+        json.dump(newspapers_id, fp)
+
+    return newspapers_id
+
+
+class S3Uploader:
+    """Uploads compressed files to the S3 bucket of the project through a single client.
+
+    The uploader is created once per run and shared by the threads of all the newspapers, boto3
+    clients being thread safe, with a pool of connections for each of them. Files are compressed
+    with gzip, or zstd when ``zstandard`` is installed and selected, as they are uploaded.
+    """
+
+    def __init__(
+        self,
+        AWS_KEY_ID: str,
+        AWS_SECRET: str,
+        endpoint_url: str | None = None,
+        compression: str = "gzip",
+        max_connections: int = 10,
+        bucket: str = S3_BUCKET,
+    ) -> None:
+        """Creates the S3 client.
+
+        Args:
+            AWS_KEY_ID (str): AWS key to save to bucket
+            AWS_SECRET (str): AWS Secret to save to bucket
+            endpoint_url (str | None, optional): URL of the S3 service, can point to a local server. Defaults to AWS.
+            compression (str, optional): ``gzip``, ``zstd`` or ``none``. Defaults to ``gzip``.
+            max_connections (int, optional): Connections kept in the pool. Defaults to 10.
+            bucket (str, optional): Bucket of the files. Defaults to S3_BUCKET.
+        """
+        if compression == "zstd" and zstandard is None:
+            logging.warning("zstandard is not installed, using gzip")
+            compression = "gzip"
+
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(
+                f"Unknown compression '{compression}', expected one of {list(COMPRESSION_SUFFIXES)}"
+            )
+
+        self.compression = compression
+        self.bucket = bucket
+
+        self._client = boto3.client(
+            "s3",
+            aws_access_key_id=AWS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET,
+            endpoint_url=endpoint_url,
+            config=botocore.config.Config(max_pool_connections=max_connections),
+        )
+
+    def key(self, filename: str) -> str:
+        """Returns the key of a file in the bucket, with the extension of the compression.
+
+        Args:
+            filename (str): Name of the file
+
+        Returns:
+            str: Key of the file
+        """
+        return f"raw_data/{filename}{COMPRESSION_SUFFIXES[self.compression]}"
+
+    def compressor(self) -> Any:
+        """Returns a new compressor, with ``compress`` and ``flush`` methods.
+
+        The output of each compressor is a complete gzip member or zstd frame, and several of them
+        concatenated are still a valid file, so they can be uploaded as the parts of a multipart upload.
+
+        Returns:
+            Any: Compressor
+        """
+        if self.compression == "gzip":
+            return zlib.compressobj(wbits=31)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compressobj()
+        return _Uncompressed()
+
+    def upload(self, key: str, chunks: Iterable[bytes], content_type: str) -> None:
+        """Compresses and uploads a file given as chunks of bytes.
+
+        Args:
+            key (str): Key of the file
+            chunks (Iterable[bytes]): Content of the file
+            content_type (str): Content type of the uncompressed file
+        """
+        compressor = self.compressor()
+        body = b"".join(compressor.compress(chunk) for chunk in chunks)
+        body += compressor.flush()
+
+        self.upload_compressed(key, body, content_type)
+
+    def upload_compressed(self, key: str, body: bytes, content_type: str) -> None:
+        """Uploads a file already compressed with the compression of the uploader.
+
+        Args:
+            key (str): Key of the file
+            body (bytes): Compressed content of the file
+            content_type (str): Content type of the uncompressed file
+        """
+        self._client.put_object(
+            Bucket=self.bucket, Key=key, Body=body, ContentType=content_type
+        )
+
+    def create_multipart_upload(self, key: str, content_type: str) -> str:
+        """Starts a multipart upload.
+
+        Args:
+            key (str): Key of the file
+            content_type (str): Content type of the uncompressed file
+
+        Returns:
+            str: Id of the upload
+        """
+        return self._client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type
+        )["UploadId"]
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> dict:
+        """Uploads an already compressed part of a multipart upload.
+
+        Args:
+            key (str): Key of the file
+            upload_id (str): Id of the upload
+            part_number (int): Number of the part, from 1
+            body (bytes): Compressed part
+
+        Returns:
+            dict: Part number and ETag of the part
+        """
+        response = self._client.upload_part(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: list) -> None:
+        """Completes a multipart upload.
+
+        Args:
+            key (str): Key of the file
+            upload_id (str): Id of the upload
+            parts (list): Part number and ETag of each part
+        """
+        self._client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+
+class _Uncompressed:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class NDJSONPageWriter:
+    """Writes the pages of tweets of a newspaper as they arrive, one tweet per line, to a local file
+    and to a compressed multipart upload to S3, so memory use doesn't grow with the number of pages.
+
+    After each page a checkpoint keeps the pagination token of the next page, the size of the file
+    and the parts already uploaded, so a retrieval that stops mid-week resumes from the last page
+    written. The file is written as ``{filepath}.part`` and renamed once the last page is written.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        checkpoint_path: str,
+        uploader: S3Uploader | None = None,
+    ) -> None:
+        """Points to the file and checkpoint of a newspaper.
+
+        Args:
+            filepath (str): Path of the NDJSON file
+            checkpoint_path (str): Path of the JSON checkpoint
+            uploader (S3Uploader | None, optional): Uploader of the run, None to write only the local file.
+                Defaults to None.
+        """
+        self._filepath = Path(filepath)
+        self._part_path = Path(f"{filepath}.part")
+        self._checkpoint_path = Path(checkpoint_path)
+        self._uploader = uploader
+        self._s3_key = uploader.key(self._filepath.name) if uploader else None
+
+        self._checkpoint = {
+            "pagination_token": None,
+            "pages": 0,
+            "offset": 0,
+            "tweets": 0,
+            "upload_id": None,
+            "parts": [],
+            "uploaded_offset": 0,
+        }
+        # Compressed bytes of the part being filled, the tweets after ``uploaded_offset``
+        self._compressor = None
+        self._compressed = []
+        self._compressed_size = 0
+
+    def open(self) -> str | None:
+        """Prepares the file, resuming from the checkpoint if there is one.
+
+        Returns:
+            str | None: Pagination token of the next page, None to start from the first page
+        """
+        if self._checkpoint_path.exists() and self._part_path.exists():
+            self._checkpoint = json.loads(self._checkpoint_path.read_text())
+        else:
+            self._part_path.unlink(missing_ok=True)
+
+        self._part_path.parent.mkdir(parents=True, exist_ok=True)
+        self._part_path.touch()
+        # Drop the lines of a page written after the last checkpoint
+        os.truncate(self._part_path, self._checkpoint["offset"])
+
+        if self._uploader is not None:
+            self._compressor = self._uploader.compressor()
+
+            # The compressed part being filled is lost with the process, so it is compressed again
+            with open(self._part_path, "rb") as part_file:
+                part_file.seek(self._checkpoint["uploaded_offset"])
+                for block in iter(lambda: part_file.read(MULTIPART_CHUNK_SIZE), b""):
+                    self._compress(block)
+
+        return self._checkpoint["pagination_token"]
+
+    @property
+    def tweets(self) -> int:
+        return self._checkpoint["tweets"]
+
+    @property
+    def finished(self) -> bool:
+        """Whether the last page was already written."""
+        return self._checkpoint["pages"] > 0 and self._checkpoint["pagination_token"] is None
+
+    def write_page(self, tweets: list, next_token: str | None) -> None:
+        """Appends a page of tweets and checkpoints the token of the next page.
+
+        Args:
+            tweets (list): Tweets of the page
+            next_token (str | None): Pagination token of the next page
+        """
+        lines = "".join(
+            json.dumps(tweet, ensure_ascii=False) + "\n" for tweet in tweets
+        ).encode("utf-8")
+
+        with open(self._part_path, "ab") as part_file:
+            part_file.write(lines)
+            part_file.flush()
+            os.fsync(part_file.fileno())
+
+            self._checkpoint["offset"] = part_file.tell()
+
+        self._checkpoint["pages"] += 1
+        self._checkpoint["tweets"] += len(tweets)
+        self._checkpoint["pagination_token"] = next_token
+
+        if self._uploader is not None:
+            self._compress(lines)
+
+            if self._compressed_size >= MULTIPART_CHUNK_SIZE:
+                self._upload_part()
+
+        self._save_checkpoint()
+
+    def close(self) -> None:
+        """Uploads the rest of the file, renames it and removes the checkpoint, after the last page."""
+        if self.tweets:
+            if self._uploader is not None:
+                if self._checkpoint["upload_id"] is None:
+                    # The file fits in a single part, already compressed
+                    self._compressed.append(self._compressor.flush())
+                    self._uploader.upload_compressed(
+                        self._s3_key, b"".join(self._compressed), "application/x-ndjson"
+                    )
+                else:
+                    if self._checkpoint["offset"] > self._checkpoint["uploaded_offset"]:
+                        self._upload_part()
+
+                    self._uploader.complete_multipart_upload(
+                        self._s3_key,
+                        self._checkpoint["upload_id"],
+                        self._checkpoint["parts"],
+                    )
+
+            self._part_path.replace(self._filepath)
+        else:
+            self._part_path.unlink()
+
+        self._checkpoint_path.unlink(missing_ok=True)
+
+    def _compress(self, data: bytes) -> None:
+        compressed = self._compressor.compress(data)
+        self._compressed.append(compressed)
+        self._compressed_size += len(compressed)
+
+    def _upload_part(self) -> None:
+        if self._checkpoint["upload_id"] is None:
+            self._checkpoint["upload_id"] = self._uploader.create_multipart_upload(
+                self._s3_key, "application/x-ndjson"
+            )
+
+        self._compressed.append(self._compressor.flush())
+
+        self._checkpoint["parts"].append(
+            self._uploader.upload_part(
+                self._s3_key,
+                self._checkpoint["upload_id"],
+                len(self._checkpoint["parts"]) + 1,
+                b"".join(self._compressed),
+            )
+        )
+        self._checkpoint["uploaded_offset"] = self._checkpoint["offset"]
+
+        self._compressor = self._uploader.compressor()
+        self._compressed = []
+        self._compressed_size = 0
+
+    def _save_checkpoint(self) -> None:
+        self._checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+
+        temporary_path = self._checkpoint_path.with_name(
+            f"{self._checkpoint_path.name}.tmp"
+        )
+        temporary_path.write_text(json.dumps(self._checkpoint))
+        temporary_path.replace(self._checkpoint_path)
+
+
+def get_user_tweets(
+    client: TwitterClient,
+    newspaper: str,
+    newspaper_id: str,
+    start_time: str,
+    end_time: str,
+    writer: NDJSONPageWriter,
+) -> int:
+    """Gets every page of tweets of a newspaper between start and end times, writing each page as it arrives.
+
+    Args:
+        client (TwitterClient): Client of the Twitter API
+        newspaper (str): Name of the newspaper
+        newspaper_id (str): User id of the newspaper
+        start_time (str): Start date for tweets with '%Y-%m-%dT%H:%M:%S' format
+        end_time (str): End date for tweets with '%Y-%m-%dT%H:%M:%S' format
+        writer (NDJSONPageWriter): Writer of the pages of the newspaper
+
+    Returns:
+        int: Number of tweets of the newspaper
+    """
+    logger = logging.getLogger()
+
+    query = {
+        "max_results": 100,
+        "tweet.fields": "id,conversation_id,text,created_at,public_metrics,possibly_sensitive,referenced_tweets",
+        "start_time": f"{start_time}Z",
+        "end_time": f"{end_time}Z",
+    }
+
+    pagination_token = writer.open()
+
+    if pagination_token is not None:
+        logger.info(f"{newspaper}: Resuming after {writer.tweets} tweets")
+
+    while not writer.finished:
+        if pagination_token is not None:
+            query["pagination_token"] = pagination_token
+
+        response = client.get(f"users/{newspaper_id}/tweets", query)
+
+        logger.info(f"{newspaper}: status code {response.status_code}")
+
+        # The pages written so far are kept, and the next run resumes from this page
+        response.raise_for_status()
+        page = response.json()
+
+        pagination_token = page.get("meta", {}).get("next_token")
+        writer.write_page(page.get("data", []), pagination_token)  # List of tweets
+
+        if pagination_token is None:
+            logger.info(f"{newspaper}: No MORE data found!")
+        else:
+            logger.info(f"{newspaper}: New page")
+
+    writer.close()
+
+    return writer.tweets
+
+
+class ReplyWriter:
+    """Appends the replies to the tweets of a newspaper to a newline-delimited JSON file as the pages of
+    the searches arrive, from several threads, skipping the replies already written.
+
+    A checkpoint keeps the conversations whose replies were fully retrieved, so a crawl that stops
+    resumes with the remaining conversations. The file is written as ``{filepath}.part`` and renamed
+    once every conversation is retrieved.
+    """
+
+    def __init__(self, filepath: str, checkpoint_path: str) -> None:
+        """Points to the file and checkpoint of the replies of a newspaper.
+
+        Args:
+            filepath (str): Path of the NDJSON file
+            checkpoint_path (str): Path of the JSON checkpoint
+        """
+        self._filepath = Path(filepath)
+        self._part_path = Path(f"{filepath}.part")
+        self._checkpoint_path = Path(checkpoint_path)
+
+        self._lock = threading.Lock()
+        self._reply_ids = set()
+        self._done_conversations = set()
+
+    def open(self) -> set:
+        """Prepares the file, resuming from the checkpoint if there is one.
+
+        Returns:
+            set: Conversations whose replies were already retrieved
+        """
+        if self._checkpoint_path.exists() and self._part_path.exists():
+            self._done_conversations = set(json.loads(self._checkpoint_path.read_text()))
+
+            with open(self._part_path, "rb+") as part_file:
+                content = part_file.read()
+                # Drop a line cut by the end of the previous run
+                part_file.truncate(content.rfind(b"\n") + 1)
+
+            self._reply_ids = {
+                json.loads(line)["id"]
+                for line in content.splitlines(keepends=True)
+                if line.endswith(b"\n")
+            }
+        else:
+            self._part_path.parent.mkdir(parents=True, exist_ok=True)
+            self._part_path.write_bytes(b"")
+
+        return set(self._done_conversations)
+
+    @property
+    def replies(self) -> int:
+        return len(self._reply_ids)
+
+    def write_page(self, replies: list) -> None:
+        """Appends the replies of a page that were not written yet.
+
+        Args:
+            replies (list): Replies of the page
+        """
+        with self._lock:
+            new_replies = {
+                reply["id"]: reply for reply in replies if reply["id"] not in self._reply_ids
+            }
+            self._reply_ids.update(new_replies)
+
+            with open(self._part_path, "ab") as part_file:
+                part_file.write(
+                    "".join(
+                        json.dumps(reply, ensure_ascii=False) + "\n"
+                        for reply in new_replies.values()
+                    ).encode("utf-8")
+                )
+                part_file.flush()
+                os.fsync(part_file.fileno())
+
+    def finish_conversations(self, conversation_ids: list) -> None:
+        """Checkpoints conversations whose replies were fully retrieved.
+
+        Args:
+            conversation_ids (list): Ids of the conversations
+        """
+        with self._lock:
+            self._done_conversations.update(conversation_ids)
+
+            self._checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = self._checkpoint_path.with_name(
+                f"{self._checkpoint_path.name}.tmp"
+            )
+            temporary_path.write_text(json.dumps(sorted(self._done_conversations)))
+            temporary_path.replace(self._checkpoint_path)
+
+    def close(self, uploader: S3Uploader | None = None) -> None:
+        """Uploads the file, renames it and removes the checkpoint, once every conversation is retrieved.
+
+        Args:
+            uploader (S3Uploader | None, optional): Uploader of the run, None to keep only the local file.
+                Defaults to None.
+        """
+        if self.replies:
+            if uploader is not None:
+                with open(self._part_path, "rb") as part_file:
+                    uploader.upload(
+                        uploader.key(self._filepath.name),
+                        iter(lambda: part_file.read(MULTIPART_CHUNK_SIZE), b""),
+                        "application/x-ndjson",
+                    )
+
+            self._part_path.replace(self._filepath)
+        else:
+            self._part_path.unlink()
+
+        self._checkpoint_path.unlink(missing_ok=True)
+
+
+def _reply_conversations(tweets_path: str) -> list:
+    """Returns the conversations of the tweets of a newspaper that have replies, reading the file line by line.
+
+    Args:
+        tweets_path (str): Path of the NDJSON file of tweets
+
+    Returns:
+        list: Ids of the conversations, in the order of the file
+    """
+    conversation_ids = {}
+
+    with open(tweets_path, encoding="utf-8") as tweets_file:
+        for line in tweets_file:
+            tweet = json.loads(line)
+
+            if tweet.get("public_metrics", {}).get("reply_count", 0) > 0:
+                conversation_ids[tweet["conversation_id"]] = None
+
+    return list(conversation_ids)
+
+
+def _conversation_queries(conversation_ids: list, max_query_length: int) -> list:
+    """Groups conversations in search queries joined with ``OR``, as long as each query fits the API limit.
+
+    Args:
+        conversation_ids (list): Ids of the conversations
+        max_query_length (int): Maximum number of characters of a query
+
+    Returns:
+        list: Conversation ids of each query
+    """
+    batches = []
+    batch = []
+    length = 0
+
+    for conversation_id in conversation_ids:
+        term_length = len(f"conversation_id:{conversation_id}") + len(" OR ") * bool(batch)
+
+        if batch and length + term_length > max_query_length:
+            batches.append(batch)
+            batch = []
+            term_length -= len(" OR ")
+            length = 0
+
+        batch.append(conversation_id)
+        length += term_length
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def _search_replies(
+    client: TwitterClient, conversation_ids: list, writer: ReplyWriter
+) -> None:
+    """Gets every page of replies to a group of conversations, writing each page as it arrives.
+
+    Args:
+        client (TwitterClient): Client of the Twitter API, with the rate limit of the search endpoint
+        conversation_ids (list): Ids of the conversations
+        writer (ReplyWriter): Writer of the replies of the newspaper
+    """
+    query = {
+        "query": " OR ".join(
+            f"conversation_id:{conversation_id}" for conversation_id in conversation_ids
+        ),
+        "max_results": 100,
+        "tweet.fields": "id,conversation_id,text,created_at,public_metrics,author_id,in_reply_to_user_id,referenced_tweets",
+    }
+
+    while True:
+        response = client.get("tweets/search/recent", query)
+        response.raise_for_status()
+        page = response.json()
+
+        writer.write_page(page.get("data", []))
+
+        next_token = page.get("meta", {}).get("next_token")
+        if next_token is None:
+            break
+
+        query["next_token"] = next_token
+
+    writer.finish_conversations(conversation_ids)
+
+
+def get_responses_to_user(
+    client: TwitterClient,
+    executor: ThreadPoolExecutor,
+    newspaper: str,
+    tweets_path: str,
+    writer: ReplyWriter,
+    uploader: S3Uploader | None = None,
+    max_query_length: int = SEARCH_QUERY_LENGTH,
+) -> int:
+    """Gets the replies to the tweets of a newspaper that have replies, then saves them to a S3 bucket.
+
+    The conversations are grouped in search queries joined with ``OR`` and the queries are paginated
+    concurrently in ``executor``, which bounds the number of searches at a time. Replies are written
+    as the pages arrive, and a crawl that stops resumes with the conversations not retrieved yet.
+
+    Args:
+        client (TwitterClient): Client of the Twitter API, with the rate limit of the search endpoint
+        executor (ThreadPoolExecutor): Pool of the searches, shared by the newspapers
+        newspaper (str): name of the newspaper
+        tweets_path (str): Path of the NDJSON file of tweets of the newspaper
+        writer (ReplyWriter): Writer of the replies of the newspaper
+        uploader (S3Uploader | None, optional): Uploader of the run. Defaults to None.
+        max_query_length (int, optional): Maximum number of characters of a search query. Defaults to
+            SEARCH_QUERY_LENGTH.
+
+    Returns:
+        int: Number of replies of the newspaper
+    """
+    logger = logging.getLogger()
+
+    done_conversations = writer.open()
+    conversation_ids = [
+        conversation_id
+        for conversation_id in _reply_conversations(tweets_path)
+        if conversation_id not in done_conversations
+    ]
+
+    logger.info(
+        f"{newspaper}: Searching replies to {len(conversation_ids)} conversations"
+        + (f", {len(done_conversations)} already retrieved" if done_conversations else "")
+    )
+
+    futures = [
+        executor.submit(_search_replies, client, batch, writer)
+        for batch in _conversation_queries(conversation_ids, max_query_length)
+    ]
+
+    try:
+        for future in as_completed(futures):
+            future.result()
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+
+    writer.close(uploader)
+
+    logger.info(f"{newspaper}: {writer.replies} replies saved!")
+
+    return writer.replies
+
+
+def get_users_tweets(
+    newspapers_id: dict[str, str],
+    start_time: str,
+    end_time: str,
+    BASE_DIR: str | None,
+    BEARER_TOKEN: str | None,
+    AWS_KEY_ID: str,
+    AWS_SECRET: str,
+    base_url: str = TWITTER_API_URL,
+    max_workers: int | None = None,
+    endpoint_url: str | None = None,
+    compression: str = "gzip",
+    replies: bool = False,
+    reply_workers: int = 4,
+) -> None:
+    """Gets tweets for newspapers specified between start and end times.
+
+    The newspapers are paginated concurrently, one thread each, over a shared pool of keep-alive
+    connections, so the whole run takes about as long as the newspaper with the most pages. The pages
+    are streamed to a newline-delimited JSON file per newspaper and to S3, and a newspaper that didn't
+    finish in a previous run resumes from its last page.
+
+    Args:
+        newspapers_id (dict): Dictionary containing tweeter handle and user_id for target newspapers.
+        start_time (str): Start date for tweets with '%Y-%m-%dT%H:%M:%sZ' format
+        end_time (str): End date for tweets with '%Y-%m-%dT%H:%M:%sZ' format
+        base_url (str, optional): URL of the API. Defaults to TWITTER_API_URL.
+        max_workers (int | None, optional): Newspapers retrieved at a time. Defaults to all of them.
+        endpoint_url (str | None, optional): URL of the S3 service, can point to a local server. Defaults to AWS.
+        compression (str, optional): Compression of the files uploaded to S3, ``gzip``, ``zstd`` or ``none``.
+            Defaults to ``gzip``.
+        replies (bool, optional): Whether to get the replies to the tweets of each newspaper. Defaults to False.
+        reply_workers (int, optional): Reply searches at a time, across all the newspapers. Defaults to 4.
+    """
+    DATA_DIR = f"{BASE_DIR}/data/raw"
+    CHECKPOINT_DIR = f"{BASE_DIR}/data/checkpoints"
+    SAVED_DATE = datetime.fromisoformat(end_time)
+
+    log_format = "%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s"
+
+    logging.basicConfig(stream=sys.stdout, format=log_format, level=logging.INFO)
+
+    logger = logging.getLogger()
+
+    max_workers = max_workers or max(len(newspapers_id), 1)
+    client = TwitterClient(BEARER_TOKEN, base_url, max_connections=max_workers)
+
+    uploader = S3Uploader(
+        AWS_KEY_ID, AWS_SECRET, endpoint_url, compression, max_connections=max_workers
+    )
+
+    # The search endpoint has its own rate limit
+    search_client = TwitterClient(
+        BEARER_TOKEN,
+        base_url,
+        max_connections=reply_workers,
+        token_bucket=TokenBucket(
+            SEARCH_RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW, SEARCH_RATE_LIMIT_REQUESTS
+        ),
+    )
+    search_executor = ThreadPoolExecutor(
+        max_workers=reply_workers, thread_name_prefix="replies"
+    )
+
+    def get_and_save(newspaper: str, newspaper_id: str) -> None:
+        filename = f"{SAVED_DATE.isocalendar().year}w{SAVED_DATE.isocalendar().week}_data_{newspaper}.ndjson"
+
+        writer = NDJSONPageWriter(
+            f"{DATA_DIR}/{filename}",
+            f"{CHECKPOINT_DIR}/{filename}.checkpoint.json",
+            uploader,
+        )
+
+        if not get_user_tweets(
+            client, newspaper, newspaper_id, start_time, end_time, writer
+        ):
+            logger.info(f"{newspaper}: No data found!")
+            return
+
+        logger.info(f"{newspaper}: Saved!")
+
+        if replies:
+            replies_filename = filename.replace(".ndjson", "_replies.ndjson")
+
+            get_responses_to_user(
+                search_client,
+                search_executor,
+                newspaper,
+                f"{DATA_DIR}/{filename}",
+                ReplyWriter(
+                    f"{DATA_DIR}/{replies_filename}",
+                    f"{CHECKPOINT_DIR}/{replies_filename}.checkpoint.json",
+                ),
+                uploader,
+            )
+
+    failed_newspapers = []
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tweets"
+        ) as executor:
+            futures = {
+                executor.submit(get_and_save, newspaper, newspaper_id): newspaper
+                for newspaper, newspaper_id in newspapers_id.items()
+            }
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception(f"{futures[future]}: Failed!")
+                    failed_newspapers.append(futures[future])
+    finally:
+        search_executor.shutdown(cancel_futures=True)
+        search_client.close()
+        client.close()
+
+    # The other newspapers are saved before failing the run
+    if failed_newspapers:
+        raise RuntimeError(f"Could not retrieve tweets of {', '.join(failed_newspapers)}")
+
+
+def get_data() -> None:
+    """Gets data from twitter API. Takes today's date and gets all data from the past week"""
+
+    dotenv_path = find_dotenv()
+    env_variables = dotenv_values(dotenv_path)
+
+    AWSAccessKeyId = env_variables["AWSAccessKeyId"]
+    AWSSecretKey = env_variables["AWSSecretKey"]
+
+    BASE_DIR = env_variables["BASE_DIR"]
+    BEARER_TOKEN = env_variables["BEARER_TOKEN"]
+    TWITTER_URL = env_variables.get("TWITTER_API_URL") or TWITTER_API_URL
+    S3_ENDPOINT_URL = env_variables.get("S3_ENDPOINT_URL")
+    S3_COMPRESSION = env_variables.get("S3_COMPRESSION") or "gzip"
+    GET_REPLIES = (env_variables.get("GET_REPLIES") or "").lower() in ("1", "true", "yes")
+
+    newspapers = [
+        "elcomercio_peru",
+        "larepublica_pe",
+        "peru21noticias",
+        "tromepe",
+        "Gestionpe",
+        "diariocorreo",
+        "ExpresoPeru",
+        "diarioojo",
+        "DiarioElPeruano",
+        "larazon_pe",
+    ]
+
+    if Path(f"{BASE_DIR}/data/raw/newspapers_id.json").exists():
+        with open(f"{BASE_DIR}/data/raw/newspapers_id.json", "r") as read_file:
+            newspapers_id = json.load(read_file)
+    else:
+        newspapers_id = get_users_id(newspapers, BASE_DIR, BEARER_TOKEN, TWITTER_URL)
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    this_monday = today - timedelta(days=today.weekday())
+    last_monday = this_monday - timedelta(days=7)
+
+    get_users_tweets(
+        newspapers_id,
+        last_monday.isoformat(),
+        this_monday.isoformat(),
+        BASE_DIR,
+        BEARER_TOKEN,
+        AWSAccessKeyId,
+        AWSSecretKey,
+        TWITTER_URL,
+        endpoint_url=S3_ENDPOINT_URL,
+        compression=S3_COMPRESSION,
+        replies=GET_REPLIES,
+    )
+
+
+if __name__ == "__main__":
+    get_data()
@@ -2,9 +2,13 @@
 This is a boilerplate pipeline 'eda'
 generated using Kedro 0.18.14
 """
+import numpy as np
 import pandas as pd
 
-from typing import Any, Callable, Dict
+from scipy import sparse
+from typing import Any, Callable, Dict, Tuple
+
+from newspapersAnalysis.extras.partitions import align_partitions
 
 
 def create_stats_summary(
@@ -77,13 +81,63 @@ def create_stats_summary(
     return stats_summary_results
 
 
+def _top_k_entries(
+    matrix: sparse.csr_matrix, k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the ``k`` largest non zero counts of each row, sorted by count. Ties are sorted by column.
+
+    Only the stored values of each row are ranked, so the matrix is never densified.
+
+    Args:
+        matrix (sparse.csr_matrix): Counts matrix
+        k (int): Maximum number of counts for each row
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Row, column and count of the largest counts, grouped by row
+    """
+    n_columns = matrix.shape[1]
+    rows, columns, counts = [], [], []
+
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        row_counts = matrix.data[start:end].astype(np.int64)
+        row_columns = matrix.indices[start:end]
+
+        non_zero = row_counts > 0
+        row_counts, row_columns = row_counts[non_zero], row_columns[non_zero]
+        row_k = min(k, row_counts.size)
+
+        if row_k == 0:
+            continue
+
+        # Unique keys, ranking by count and then by column, so the tied columns kept are deterministic
+        keys = row_counts * n_columns + (n_columns - 1 - row_columns)
+
+        top = np.argpartition(-keys, row_k - 1)[:row_k]
+        top = top[np.argsort(-keys[top])]
+
+        rows.append(np.full(row_k, row))
+        columns.append(row_columns[top])
+        counts.append(row_counts[top])
+
+    if not rows:
+        return (
+            np.empty(0, dtype=np.intp),
+            np.empty(0, dtype=np.intp),
+            np.empty(0, dtype=np.int64),
+        )
+
+    return np.concatenate(rows), np.concatenate(columns), np.concatenate(counts)
+
+
 def create_top30(
-    dtm_newspaper_data: Dict[str, Callable[[], Any]]
+    dtm_newspaper_data: Dict[str, Callable[[], Any]], top_words_options: Dict[str, Any]
 ) -> Dict[str, Callable[[], Any]]:
     """Returns a Dictionary of Dataframes with the Top 30 words form every newspaper by week.
 
     Args:
-        dtm_newspaper_data (Dict[str, Callable[[], Any]]): Dictionary of DTM per newspaper per week
+        dtm_newspaper_data (Dict[str, Callable[[], Any]]): Dictionary of sparse DTM per newspaper per week
+        top_words_options (Dict[str, Any]): Number of words ``k`` kept for each newspaper and week
 
     Returns:
         Dict[str, Callable[[], Any]]: Dictionary of Top30 words per newspaper per week
@@ -91,39 +145,26 @@ def create_top30(
     top30_results = {}
 
     for filename, dtm_newspaper_load in dtm_newspaper_data.items():
-        new_filename = filename.replace("dtm_newspaper", "top30")
+        new_filename = filename.replace("dtm_newspaper", "top30").replace(
+            "npz", "feather"
+        )
 
         dtm_newspaper = dtm_newspaper_load()
 
-        top30_dict = {}
-
-        for newspaper in dtm_newspaper.columns:
-            top = dtm_newspaper[newspaper].sort_values(ascending=False).head(30)
-            top30_dict[newspaper] = list(zip(top.index, top.values))
-
-        top30_df = pd.DataFrame.from_records(top30_dict)
-
-        top30_df = top30_df.melt(
-            value_vars=top30_df.columns,
-            var_name="newspaper_date",
-            value_name="word_count",
+        rows, columns, counts = _top_k_entries(
+            dtm_newspaper.matrix, top_words_options["k"]
         )
 
-        top30_df[["newspaper", "year_week"]] = top30_df["newspaper_date"].str.split(
-            r"-", expand=True
-        )
-        top30_df[["year", "week"]] = top30_df["year_week"].str.split(r"_", expand=True)
-        top30_df[["word", "count"]] = pd.DataFrame(
-            top30_df["word_count"].to_list(), index=top30_df.index
+        top30_df = pd.DataFrame(
+            {
+                "newspaper": dtm_newspaper.rows["newspaper"].to_numpy()[rows],
+                "year": dtm_newspaper.rows["year"].to_numpy()[rows],
+                "week": dtm_newspaper.rows["week"].to_numpy()[rows],
+                "word": dtm_newspaper.vocabulary[columns],
+                "count": counts,
+            }
         )
 
-        top30_df.drop(
-            ["word_count", "newspaper_date", "year_week"], axis=1, inplace=True
-        )
-
-        top30_df["year"] = pd.to_numeric(top30_df["year"])
-        top30_df["week"] = pd.to_numeric(top30_df["week"])
-
         top30_df["hot_topics"] = ""
 
         top30_results[new_filename] = top30_df
@@ -138,7 +179,7 @@ def create_unique_words(
     """Returns a dictionary with Dataframes containting data about number of unique words and the ratio words to Tweets.
 
     Args:
-        dtm_newspaper_data (Dict[str, Callable[[], Any]]): Dictionary of DTM per newspaper data
+        dtm_newspaper_data (Dict[str, Callable[[], Any]]): Dictionary of sparse DTM per newspaper data
         corpus_data (Dict[str, Callable[[], Any]]): Dictionary of corpus data
 
     Returns:
@@ -146,44 +187,24 @@ def create_unique_words(
     """
     unique_words_dict = {}
 
-    for (filename, dtm_newspaper_data_load), corpus_data_load in zip(
-        dtm_newspaper_data.items(), corpus_data.values()
-    ):
-        new_filename = filename.replace("dtm_newspaper", "unique_words")
+    for filename, corpus_filename in align_partitions(
+        dtm_newspaper_data, corpus_data
+    ).values():
+        new_filename = filename.replace("dtm_newspaper", "unique_words").replace(
+            "npz", "feather"
+        )
 
-        dtm_newspaper = dtm_newspaper_data_load()
-        corpus = corpus_data_load()
+        dtm_newspaper = dtm_newspaper_data[filename]()
+        corpus = corpus_data[corpus_filename]()
 
         corpus["year"] = corpus["created_at"].dt.isocalendar().year
         corpus["week"] = corpus["created_at"].dt.isocalendar().week
 
-        unique_list = []
-
-        # Identify the non-zero items in the document-term matrix
-        for newspaper in dtm_newspaper.columns:
-            uniques = dtm_newspaper[newspaper].to_numpy().nonzero()[0].size
-            unique_list.append(uniques)
-
-        # Create a new datafra,e that contains this unique word count
-        data_words = pd.DataFrame(
-            list(zip(dtm_newspaper.columns, unique_list)),
-            columns=["newspaper", "unique_words"],
-        )
-        data_words.set_index("newspaper", inplace=True)
-        data_words.sort_values(by="unique_words", ascending=False)
-        data_words.reset_index(inplace=True)
-
-        data_words[["newspaper", "year_week"]] = data_words["newspaper"].str.split(
-            r"-", expand=True
-        )
-        data_words[["year", "week"]] = data_words["year_week"].str.split(
-            r"_", expand=True
-        )
-
-        data_words.drop(["year_week"], axis=1, inplace=True)
-
-        data_words["year"] = pd.to_numeric(data_words["year"])
-        data_words["week"] = pd.to_numeric(data_words["week"])
+        # Count the non-zero items in each row of the document-term matrix
+        data_words = dtm_newspaper.rows[["newspaper"]].copy()
+        data_words["unique_words"] = dtm_newspaper.matrix.getnnz(axis=1)
+        data_words["year"] = dtm_newspaper.rows["year"]
+        data_words["week"] = dtm_newspaper.rows["week"]
 
         tweet_number = pd.DataFrame(
             corpus.groupby(by=["newspaper", "year", "week"]).count()["id"]
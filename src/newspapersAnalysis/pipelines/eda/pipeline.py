@@ -19,7 +19,7 @@ def create_pipeline(**kwargs) -> Pipeline:
             ),
             node(
                 func=create_top30,
-                inputs="dtm_newspaper",
+                inputs=["dtm_newspaper", "params:top_words"],
                 outputs="top30_df",
                 name="create_top30_df_node",
             ),
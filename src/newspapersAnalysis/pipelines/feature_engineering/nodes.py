@@ -3,11 +3,17 @@ This is a boilerplate pipeline 'feature_engineering'
 generated using Kedro 0.18.14
 """
 import logging
+import numpy as np
 import pandas as pd
 import spacy
 
-from typing import Any, Callable, Dict
 from itertools import product
+from scipy import sparse
+from spacy.tokens import Doc
+from typing import Any, Callable, Dict, List, Tuple
+
+from newspapersAnalysis.extras.datasets.sparse_dtm_dataset import SparseDTM
+from newspapersAnalysis.extras.partitions import align_partitions
 
 
 logger = logging.getLogger("nlp-newpapersAnalysis")
@@ -41,22 +47,42 @@ def make_corpus(clean_data: Dict[str, Callable[[], Any]]) -> Dict[str, pd.DataFr
     return corpus_data
 
 
-def make_data_dtm(corpus_data: Dict[str, Callable[[], Any]]) -> Dict[str, pd.DataFrame]:
+def _tokens_and_lemmas(doc: Doc) -> Tuple[List[str], List[str]]:
+    """Returns the tokens and lemmas of a document, leaving out punctuation, stop words and spaces.
+
+    Args:
+        doc (Doc): Spacy processed document
+
+    Returns:
+        Tuple[List[str], List[str]]: Tokens and lemmas of the document
+    """
+    words = [t for t in doc if not t.is_punct | t.is_stop | t.is_space]
+
+    return [t.orth_ for t in words], [t.lemma_ for t in words]
+
+
+def make_data_dtm(
+    corpus_data: Dict[str, Callable[[], Any]], spacy_options: Dict[str, Any]
+) -> Dict[str, pd.DataFrame]:
     """Returns a dictionary of data to make Document-Term Matrices per week.
 
     Args:
         corpus_data (Dict[str, Callable[[], Any]]): Data from a Partitiones Dataset with files containtin corpus information
+        spacy_options (Dict[str, Any]): Spacy model to load and ``nlp.pipe`` options (``batch_size``, ``n_process``
+            and ``disable``, the pipeline components not needed to get tokens and lemmas)
 
     Returns:
-        Dict[str, pd.DataFrame]: Dictionary of Dataframes to be pickled. Contains NLP Spacy data.
+        Dict[str, pd.DataFrame]: Dictionary of Dataframes with the tokens and lemmas of each tweet as list columns.
     """
-    nlp = spacy.load("es_core_news_sm")
+    nlp = spacy.load(spacy_options["model"], disable=spacy_options["disable"])
     logger.info("Spacy loaded!")
 
     data_dtm_data = {}
 
     for filename, load_data_function in corpus_data.items():
-        new_filename = filename.replace("feather", "pkl").replace("corpus", "data_dtm")
+        new_filename = filename.replace("feather", "parquet").replace(
+            "corpus", "data_dtm"
+        )
 
         logger.info(
             f"[bold blue]Data DTM ->[/bold blue] {new_filename} starts",
@@ -65,19 +91,17 @@ def make_data_dtm(corpus_data: Dict[str, Callable[[], Any]]) -> Dict[str, pd.Dat
 
         data_dtm = load_data_function()
 
-        data_dtm["doc"] = data_dtm["corpus"].apply(lambda x: nlp(x))
-
-        data_dtm["token"] = data_dtm["doc"].apply(
-            lambda doc: [
-                t.orth_ for t in doc if not t.is_punct | t.is_stop | t.is_space
-            ]
-        )
-        data_dtm["lemma"] = data_dtm["doc"].apply(
-            lambda doc: [
-                t.lemma_ for t in doc if not t.is_punct | t.is_stop | t.is_space
-            ]
+        docs = nlp.pipe(
+            data_dtm["corpus"],
+            batch_size=spacy_options["batch_size"],
+            n_process=spacy_options["n_process"],
         )
 
+        tokens_lemmas = [_tokens_and_lemmas(doc) for doc in docs]
+
+        data_dtm["token"] = [tokens for tokens, _ in tokens_lemmas]
+        data_dtm["lemma"] = [lemmas for _, lemmas in tokens_lemmas]
+
         data_dtm = data_dtm.loc[data_dtm["corpus"] != ""]
         data_dtm = data_dtm.loc[data_dtm["token"].map(lambda d: len(d)) > 0]
 
@@ -91,19 +115,19 @@ def make_data_dtm(corpus_data: Dict[str, Callable[[], Any]]) -> Dict[str, pd.Dat
     return data_dtm_data
 
 
-def make_dtm(data_dtm_data: Dict[str, Callable[[], Any]]) -> Dict[str, pd.DataFrame]:
-    """Returns a dictionary of Document-Term Matrices per week.
+def make_dtm(data_dtm_data: Dict[str, Callable[[], Any]]) -> Dict[str, SparseDTM]:
+    """Returns a dictionary of sparse Document-Term Matrices per week.
 
     Args:
-        data_dtm_data (Dict[str, Callable[[], Any]]): Dictionary with Spacy data to make a Document Term Matrix
+        data_dtm_data (Dict[str, Callable[[], Any]]): Dictionary with the lemmas of each tweet to make a Document Term Matrix
 
     Returns:
-        Dict[str, pd.DataFrame]: Dictionary of Document Term Matrices per week
+        Dict[str, SparseDTM]: Dictionary of sparse Document Term Matrices per week, one row per tweet ``id``
     """
     dtm_data = {}
 
     for filename, load_data_function in data_dtm_data.items():
-        new_filename = filename.replace("data_dtm", "dtm").replace("pkl", "feather")
+        new_filename = filename.replace("data_dtm", "dtm").replace("parquet", "npz")
 
         logger.info(
             f"[bold blue]DTM ->[/bold blue] {new_filename} started",
@@ -112,14 +136,7 @@ def make_dtm(data_dtm_data: Dict[str, Callable[[], Any]]) -> Dict[str, pd.DataFr
 
         data_dtm = load_data_function()
 
-        dtm = pd.DataFrame(
-            data_dtm[["id", "lemma"]].explode("lemma").groupby(by="id").value_counts()
-        )
-        dtm.rename({0: "count"}, axis=1, inplace=True)
-        dtm = dtm.reset_index()
-
-        dtm = dtm.pivot(index="id", columns="lemma", values="count")
-        dtm.fillna(0.00, inplace=True)
+        dtm = SparseDTM.from_documents(data_dtm["id"], data_dtm["lemma"])
 
         logger.info(
             f"[bold blue]DTM ->[/bold blue] {new_filename} finished",
@@ -133,59 +150,66 @@ def make_dtm(data_dtm_data: Dict[str, Callable[[], Any]]) -> Dict[str, pd.DataFr
 
 def make_dtm_newspaper(
     corpus_data: Dict[str, Callable[[], Any]], dtm_data: Dict[str, Callable[[], Any]]
-) -> Dict[str, pd.DataFrame]:
+) -> Dict[str, SparseDTM]:
     """Returns a dictionary of DTM per newspaper per week.
 
     Args:
         corpus_data (Dict[str, Callable[[], Any]]): Dictionary with Corpus data
-        dtm_data (Dict[str, Callable[[], Any]]): Dictionary with DTM data
+        dtm_data (Dict[str, Callable[[], Any]]): Dictionary with sparse DTM data, with the same weeks as the Corpus data
 
     Returns:
-        Dict[str, pd.DataFrame]: Dictionary with Dataframes with the Top 30 words per Newspaper.
+        Dict[str, SparseDTM]: Dictionary with sparse DTMs with one row per newspaper and week.
     """
     dtm_newspaper_dict = {}
 
-    for (filename, corpus_data_function), dtm_data_function in zip(
-        corpus_data.items(), dtm_data.values()
-    ):
-        new_filename = filename.replace("corpus", "dtm_newspaper")
+    for filename, dtm_filename in align_partitions(corpus_data, dtm_data).values():
+        new_filename = filename.replace("corpus", "dtm_newspaper").replace(
+            "feather", "npz"
+        )
 
         logger.info(
             f"[bold blue]DTM per newspaper ->[/bold blue] {new_filename} started",
             extra={"markup": True},
         )
 
-        corpus = corpus_data_function()
-        dtm = dtm_data_function()
-
-        corpus.set_index("index", inplace=True)
-
-        newspapers = corpus["newspaper"].unique()
+        corpus = corpus_data[filename]()
+        dtm = dtm_data[dtm_filename]()
 
         year_weeks = corpus["created_at"].dt.isocalendar()[["year", "week"]]
-        year_weeks.drop_duplicates(inplace=True)
-        year_weeks = year_weeks.to_numpy()
 
-        dtm_newspaper = pd.DataFrame(index=dtm.columns)
+        # Groups are every (week, newspaper) combination, weeks and newspapers in order of appearance
+        week_codes, weeks = pd.factorize(pd.MultiIndex.from_frame(year_weeks))
+        newspaper_codes, newspapers = pd.factorize(corpus["newspaper"])
+        group_codes = week_codes * len(newspapers) + newspaper_codes
+
+        dtm_positions = pd.Index(dtm.rows["id"]).get_indexer(corpus["id"])
 
-        corpus["year"] = corpus["created_at"].dt.isocalendar().year
-        corpus["week"] = corpus["created_at"].dt.isocalendar().week
+        memberships = pd.DataFrame(
+            {"group": group_codes, "position": dtm_positions}
+        ).drop_duplicates()
+        memberships = memberships[memberships["position"] >= 0]
 
-        dtm_newspaper = pd.DataFrame(index=dtm.columns)
+        indicator = sparse.csr_matrix(
+            (
+                np.ones(len(memberships), dtype=dtm.matrix.dtype),
+                (memberships["group"].to_numpy(), memberships["position"].to_numpy()),
+            ),
+            shape=(len(weeks) * len(newspapers), dtm.matrix.shape[0]),
+        )
 
-        for year_week, newspaper in product(year_weeks, newspapers):
-            data_ids = corpus.loc[
-                (corpus["newspaper"] == newspaper)
-                & (corpus["year"] == year_week[0])
-                & (corpus["week"] == year_week[1]),
-                ["id"],
-            ]
-            filtered_data = dtm.filter(items=data_ids["id"], axis=0)
-            dtm_newspaper[
-                f"{newspaper}-{year_week[0]}_{year_week[1]}"
-            ] = filtered_data.sum(axis=0)
+        group_rows = pd.DataFrame(
+            [
+                {"newspaper": newspaper, "year": int(year), "week": int(week)}
+                for (year, week), newspaper in product(weeks, newspapers)
+            ],
+            columns=["newspaper", "year", "week"],
+        )
 
-        dtm_newspaper_dict[new_filename] = dtm_newspaper
+        dtm_newspaper_dict[new_filename] = SparseDTM(
+            matrix=(indicator @ dtm.matrix).tocsr(),
+            vocabulary=dtm.vocabulary,
+            rows=group_rows,
+        )
 
         logger.info(
             f"[bold blue]DTM per newspaper ->[/bold blue] {new_filename} finished",
@@ -19,11 +19,16 @@ def create_pipeline(**kwargs) -> Pipeline:
             ),
             node(
                 func=make_data_dtm,
-                inputs="corpus",
-                outputs="data_dtm",
+                inputs=["corpus", "params:spacy"],
+                outputs="data_dtm@parquet",
                 name="make_data_dtm_node",
             ),
-            node(func=make_dtm, inputs="data_dtm", outputs="dtm", name="make_dtm_node"),
+            node(
+                func=make_dtm,
+                inputs="data_dtm@lemmas",
+                outputs="dtm",
+                name="make_dtm_node",
+            ),
             node(
                 func=make_dtm_newspaper,
                 inputs=["corpus", "dtm"],
@@ -0,0 +1,136 @@
+"""
+Persistent cache of the probabilities predicted by the sentiment and emotion models
+"""
+import hashlib
+import numpy as np
+import sqlite3
+import time
+import unicodedata
+
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+# Keeps the number of parameters per query under SQLite's limit
+_QUERY_CHUNK_SIZE = 500
+
+
+class InferenceCache:
+    """SQLite backed cache of model probabilities keyed by (model identifier, normalized text hash).
+
+    Entries keep the time they were last used, and the least recently used entries are evicted once
+    the cache holds more than ``max_entries`` predictions.
+    """
+
+    def __init__(self, filepath: str, max_entries: int) -> None:
+        """Opens (or creates) the cache stored in ``filepath``.
+
+        Args:
+            filepath (str): Path to the SQLite file of the cache
+            max_entries (int): Maximum number of predictions kept in the cache
+        """
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+
+        self._max_entries = max_entries
+        self._connection = sqlite3.connect(filepath)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS predictions (
+                model TEXT NOT NULL,
+                text_hash BLOB NOT NULL,
+                probas BLOB NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> bytes:
+        """Returns the hash of a text after normalizing its unicode form and whitespace.
+
+        Args:
+            text (str): Text to hash
+
+        Returns:
+            bytes: 16 bytes digest of the normalized text
+        """
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, model: str, text_hashes: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """Returns the cached probabilities of a model for the given text hashes.
+
+        Args:
+            model (str): Model identifier
+            text_hashes (Iterable[bytes]): Hashes of the texts to look up
+
+        Returns:
+            Dict[bytes, np.ndarray]: Probabilities of the texts found in the cache, by text hash
+        """
+        found = {}
+
+        for chunk in _chunks(list(text_hashes)):
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._connection.execute(
+                f"SELECT text_hash, probas FROM predictions "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [model, *chunk],
+            )
+            for text_hash, probas in rows:
+                found[text_hash] = np.frombuffer(probas, dtype=np.float32)
+
+        now = time.time_ns()
+        self._connection.executemany(
+            "UPDATE predictions SET last_used = ? WHERE model = ? AND text_hash = ?",
+            [(now, model, text_hash) for text_hash in found],
+        )
+        self._connection.commit()
+
+        return found
+
+    def put_many(self, model: str, text_hashes: List[bytes], probas: np.ndarray) -> None:
+        """Stores the probabilities of a model for the given text hashes and evicts the oldest entries.
+
+        Args:
+            model (str): Model identifier
+            text_hashes (List[bytes]): Hashes of the texts
+            probas (np.ndarray): Probabilities of each text (rows), aligned with ``text_hashes``
+        """
+        now = time.time_ns()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+            [
+                (model, text_hash, np.asarray(row, dtype=np.float32).tobytes(), now)
+                for text_hash, row in zip(text_hashes, probas)
+            ],
+        )
+
+        (entries,) = self._connection.execute(
+            "SELECT COUNT(*) FROM predictions"
+        ).fetchone()
+
+        if entries > self._max_entries:
+            self._connection.execute(
+                """
+                DELETE FROM predictions WHERE (model, text_hash) IN (
+                    SELECT model, text_hash FROM predictions ORDER BY last_used LIMIT ?
+                )
+                """,
+                [entries - self._max_entries],
+            )
+
+        self._connection.commit()
+
+    def close(self) -> None:
+        """Closes the connection to the cache."""
+        self._connection.close()
+
+
+def _chunks(items: List[bytes]) -> Iterable[List[bytes]]:
+    for start in range(0, len(items), _QUERY_CHUNK_SIZE):
+        yield items[start : start + _QUERY_CHUNK_SIZE]
@@ -3,18 +3,177 @@ This is a boilerplate pipeline 'sentiment_emotion_analysis'
 generated using Kedro 0.18.14
 """
 import logging
+import numpy as np
+import pandas as pd
+import time
+import torch
 
 from pysentimiento.analyzer import AnalyzerForSequenceClassification
-from typing import Dict, Any, Callable
+from pysentimiento.preprocessing import preprocess_tweet
+from typing import Dict, Any, Callable, List, Optional
 
+from .inference_cache import InferenceCache
 
 logger = logging.getLogger("nlp-newpapersAnalysis")
 
 
+def _batched_predict(
+    analyzer: AnalyzerForSequenceClassification,
+    texts: List[str],
+    inference_options: Dict[str, Any],
+) -> np.ndarray:
+    """Predicts a list of texts on CPU in batches, grouping texts of similar length to reduce padding.
+
+    Args:
+        analyzer (AnalyzerForSequenceClassification): Model from PySentimiento
+        texts (List[str]): Texts to be analyzed
+        inference_options (Dict[str, Any]): ``batch_size`` and ``sort_by_length`` options
+
+    Returns:
+        np.ndarray: Probability of each label (columns, in the order of ``_labels``) for each text (rows)
+    """
+    sentences = [preprocess_tweet(text, **analyzer.preprocessing_args) for text in texts]
+
+    encodings = analyzer.tokenizer(
+        sentences,
+        truncation=True,
+        max_length=analyzer.tokenizer.model_max_length,
+    )
+
+    if inference_options["sort_by_length"]:
+        order = np.argsort(
+            [len(input_ids) for input_ids in encodings["input_ids"]], kind="stable"
+        )
+    else:
+        order = np.arange(len(sentences))
+
+    model = analyzer.model.to("cpu")
+    model.eval()
+
+    probas = np.empty((len(sentences), len(analyzer.id2label)), dtype=np.float32)
+    batch_size = inference_options["batch_size"]
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start : start + batch_size]
+
+            inputs = analyzer.tokenizer.pad(
+                [{key: values[i] for key, values in encodings.items()} for i in batch],
+                return_tensors="pt",
+            )
+            logits = model(**inputs).logits
+
+            if analyzer.problem_type == "multi_label_classification":
+                probas[batch] = torch.sigmoid(logits).numpy()
+            else:
+                probas[batch] = torch.softmax(logits, dim=1).numpy()
+
+    return probas
+
+
+def _labels(analyzer: AnalyzerForSequenceClassification) -> List[str]:
+    """Returns the labels of a model in the order of its output columns, as set in the model config.
+
+    Args:
+        analyzer (AnalyzerForSequenceClassification): Model from PySentimiento
+
+    Returns:
+        List[str]: Labels of the model
+    """
+    return [analyzer.id2label[i] for i in range(len(analyzer.id2label))]
+
+
+def _model_id(analyzer: AnalyzerForSequenceClassification) -> str:
+    """Returns the identifier of a model used as key in the inference cache.
+
+    Args:
+        analyzer (AnalyzerForSequenceClassification): Model from PySentimiento
+
+    Returns:
+        str: Name or path of the model followed by its labels
+    """
+    return f"{analyzer.model.config.name_or_path}:{','.join(_labels(analyzer))}"
+
+
+def _cached_predict(
+    analyzer: AnalyzerForSequenceClassification,
+    texts: List[str],
+    inference_options: Dict[str, Any],
+    cache: Optional[InferenceCache],
+) -> np.ndarray:
+    """Predicts a list of texts, running the model only on the texts not found in the cache.
+
+    Args:
+        analyzer (AnalyzerForSequenceClassification): Model from PySentimiento
+        texts (List[str]): Texts to be analyzed
+        inference_options (Dict[str, Any]): Options for batched inference
+        cache (Optional[InferenceCache]): Inference cache, if None every text is predicted
+
+    Returns:
+        np.ndarray: Probability of each label (columns, in the order of ``_labels``) for each text (rows)
+    """
+    if cache is None:
+        return _batched_predict(analyzer, texts, inference_options)
+
+    model_id = _model_id(analyzer)
+    text_hashes = [InferenceCache.text_hash(text) for text in texts]
+
+    found = cache.get_many(model_id, set(text_hashes))
+
+    # Each unseen text is predicted once, even if it is repeated in the partition
+    missing = {}
+    for text_hash, text in zip(text_hashes, texts):
+        if text_hash not in found:
+            missing.setdefault(text_hash, text)
+
+    if missing:
+        missing_probas = _batched_predict(
+            analyzer, list(missing.values()), inference_options
+        )
+        cache.put_many(model_id, list(missing.keys()), missing_probas)
+        found.update(zip(missing.keys(), missing_probas))
+
+    hits = sum(text_hash not in missing for text_hash in text_hashes)
+
+    logger.info(
+        f"[bold blue]Inference cache ->[/bold blue] {model_id} "
+        f"{hits}/{len(texts)} hits ({hits / max(len(texts), 1):.1%})",
+        extra={"markup": True},
+    )
+
+    return np.array(
+        [found[text_hash] for text_hash in text_hashes],
+        dtype=np.float32,
+    ).reshape(len(texts), len(analyzer.id2label))
+
+
+def _probas_frame(
+    probas: np.ndarray, labels: List[str], output_column: str, probas_prefix: str
+) -> pd.DataFrame:
+    """Builds the output and probability columns of a model from its probability matrix.
+
+    Args:
+        probas (np.ndarray): Probability of each label (columns) for each text (rows)
+        labels (List[str]): Labels of the probability columns
+        output_column (str): Name of the column with the most likely label
+        probas_prefix (str): Prefix of the probability columns, followed by the label
+
+    Returns:
+        pd.DataFrame: Dataframe with the most likely label and the probability of each label
+    """
+    probas_df = pd.DataFrame(
+        probas, columns=[f"{probas_prefix}{label}" for label in labels]
+    )
+    probas_df.insert(0, output_column, np.asarray(labels)[probas.argmax(axis=1)])
+
+    return probas_df
+
+
 def sentiment_emotion_analysis(
     emotion_analyzer: AnalyzerForSequenceClassification,
     sentiment_analyzer: AnalyzerForSequenceClassification,
     corpus: Dict[str, Callable[[], Any]],
+    inference_options: Dict[str, Any],
 ) -> Dict[str, Callable[[], Any]]:
     """Returns a dict with Corpus Dataframes with the results of sentiment and emotion analysis.
 
@@ -22,76 +181,87 @@ def sentiment_emotion_analysis(
         emotion_analyzer (AnalyzerForSequenceClassification): Model from PySentimiento Emotion Analyzer
         sentiment_analyzer (AnalyzerForSequenceClassification): Model from Pysentimiento Sentiment Analyzer
         corpus (Dict[str, Callable[[], Any]]): Dictionary with Corpus Dataframes to be analyzed
+        inference_options (Dict[str, Any]): Batch size, length sorting and CPU threads for batched inference, and
+            the settings of the inference cache
 
     Returns:
         Dict[str, Callable[[], Any]]: Dicttionary of Dataframes with the Emotion and Sentiment Analyzer
     """
     sentiment_emotion = {}
 
-    for filename, corpus_data_load in corpus.items():
-        new_filename = filename.replace("corpus", "corpus_emotion")
+    if inference_options["num_threads"]:
+        torch.set_num_threads(inference_options["num_threads"])
 
-        logger.info(
-            f"[bold blue]Sentiment - Emotion Analysis ->[/bold blue] {new_filename} starts",
-            extra={"markup": True},
-        )
+    cache_options = inference_options["cache"]
+    cache = (
+        InferenceCache(cache_options["filepath"], cache_options["max_entries"])
+        if cache_options["enabled"]
+        else None
+    )
 
-        corpus_df = corpus_data_load()
+    try:
+        for filename, corpus_data_load in corpus.items():
+            new_filename = filename.replace("corpus", "corpus_emotion")
 
-        corpus_df["sentiment"] = corpus_df["corpus"].apply(
-            lambda x: sentiment_analyzer.predict(x)
-        )
-        corpus_df["emotion"] = corpus_df["corpus"].apply(
-            lambda x: emotion_analyzer.predict(x)
-        )
+            logger.info(
+                f"[bold blue]Sentiment - Emotion Analysis ->[/bold blue] {new_filename} starts",
+                extra={"markup": True},
+            )
 
-        corpus_df["sentiment_output"] = corpus_df["sentiment"].apply(lambda x: x.output)
-        corpus_df["sentiment_prob_NEG"] = corpus_df["sentiment"].apply(
-            lambda x: x.probas["NEG"]
-        )
-        corpus_df["sentiment_prob_NEU"] = corpus_df["sentiment"].apply(
-            lambda x: x.probas["NEU"]
-        )
-        corpus_df["sentiment_prob_POS"] = corpus_df["sentiment"].apply(
-            lambda x: x.probas["POS"]
-        )
+            corpus_df = corpus_data_load()
 
-        corpus_df["emotion_output"] = corpus_df["emotion"].apply(lambda x: x.output)
-        corpus_df["emotion_probas_others"] = corpus_df["emotion"].apply(
-            lambda x: x.probas["others"]
-        )
-        corpus_df["emotion_probas_joy"] = corpus_df["emotion"].apply(
-            lambda x: x.probas["joy"]
-        )
-        corpus_df["emotion_probas_surprise"] = corpus_df["emotion"].apply(
-            lambda x: x.probas["surprise"]
-        )
-        corpus_df["emotion_probas_sadness"] = corpus_df["emotion"].apply(
-            lambda x: x.probas["sadness"]
-        )
-        corpus_df["emotion_probas_fear"] = corpus_df["emotion"].apply(
-            lambda x: x.probas["fear"]
-        )
-        corpus_df["emotion_probas_anger"] = corpus_df["emotion"].apply(
-            lambda x: x.probas["anger"]
-        )
-        corpus_df["emotion_probas_disgust"] = corpus_df["emotion"].apply(
-            lambda x: x.probas["disgust"]
-        )
+            start_time = time.perf_counter()
 
-        corpus_df["year"] = corpus_df["created_at"].dt.isocalendar().year
-        corpus_df["week"] = corpus_df["created_at"].dt.isocalendar().week
-        corpus_df["year_week"] = (
-            corpus_df["year"].astype("str") + "w" + corpus_df["week"].astype("str")
-        )
+            texts = corpus_df["corpus"].tolist()
+            sentiment_probas = _cached_predict(
+                sentiment_analyzer, texts, inference_options, cache
+            )
+            emotion_probas = _cached_predict(
+                emotion_analyzer, texts, inference_options, cache
+            )
 
-        sentiment_emotion[new_filename] = corpus_df.drop(
-            labels=["sentiment", "emotion"], axis=1
-        ).reset_index()
+            elapsed_time = time.perf_counter() - start_time
 
-        logger.info(
-            f"[bold blue]Sentiment - Emotion Analysis ->[/bold blue] {new_filename} finish",
-            extra={"markup": True},
-        )
+            logger.info(
+                f"[bold blue]Sentiment - Emotion Analysis ->[/bold blue] {new_filename} "
+                f"{len(texts)} tweets in {elapsed_time:.1f}s "
+                f"({len(texts) / max(elapsed_time, 1e-9):.1f} tweets/s)",
+                extra={"markup": True},
+            )
+
+            corpus_df = pd.concat(
+                [
+                    corpus_df.reset_index(drop=True),
+                    _probas_frame(
+                        sentiment_probas,
+                        _labels(sentiment_analyzer),
+                        "sentiment_output",
+                        "sentiment_prob_",
+                    ),
+                    _probas_frame(
+                        emotion_probas,
+                        _labels(emotion_analyzer),
+                        "emotion_output",
+                        "emotion_probas_",
+                    ),
+                ],
+                axis=1,
+            )
+
+            corpus_df["year"] = corpus_df["created_at"].dt.isocalendar().year
+            corpus_df["week"] = corpus_df["created_at"].dt.isocalendar().week
+            corpus_df["year_week"] = (
+                corpus_df["year"].astype("str") + "w" + corpus_df["week"].astype("str")
+            )
+
+            sentiment_emotion[new_filename] = corpus_df.reset_index()
+
+            logger.info(
+                f"[bold blue]Sentiment - Emotion Analysis ->[/bold blue] {new_filename} finish",
+                extra={"markup": True},
+            )
+    finally:
+        if cache is not None:
+            cache.close()
 
     return sentiment_emotion
@@ -13,7 +13,12 @@ def create_pipeline(**kwargs) -> Pipeline:
         [
             node(
                 func=sentiment_emotion_analysis,
-                inputs=["emotion_analyzer", "sentiment_analyzer", "corpus"],
+                inputs=[
+                    "emotion_analyzer",
+                    "sentiment_analyzer",
+                    "corpus",
+                    "params:inference",
+                ],
                 outputs="corpus_sentiment-emotion",
                 name="sentiment_emotion_analysis_node",
             )
@@ -2,81 +2,485 @@
 This is a boilerplate pipeline 'topic_modeling'
 generated using Kedro 0.18.14
 """
+import logging
+import numpy as np
 import pandas as pd
+import zlib
 
-from gensim import matutils, models
+from collections import defaultdict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from gensim import corpora, matutils, models
 from scipy import sparse
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
+from newspapersAnalysis.extras.datasets.sparse_dtm_dataset import SparseDTM
+from newspapersAnalysis.extras.datasets.topic_terms_dataset import TopicTerms
+from newspapersAnalysis.extras.partitions import align_partitions, partition_week
 
-def topic_modeling(
-    data_dtm_data: Dict[str, Callable[[], Any]], dtm_data: Dict[str, Callable[[], Any]]
-) -> Dict[str, Callable[[], Any]]:
-    """Returns a Dict with Dataframes after Topic Modeling
+from .online_lda import (
+    OnlineLdaCheckpoint,
+    grow_vocabulary,
+    load_absorbed_weeks,
+    new_online_lda,
+    save_absorbed_weeks,
+)
+
+logger = logging.getLogger("nlp-newpapersAnalysis")
+
+
+def _lda_seed(partition_key: str, newspaper: str, random_state: int) -> int:
+    """Returns the seed of the LDA model of a newspaper in a week, which doesn't depend on the order of
+    the training jobs.
 
     Args:
-        data_dtm (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with Data DTM per week.
-        dtm (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with DTM per week.
+        partition_key (str): Week key of the partition
+        newspaper (str): Newspaper name
+        random_state (int): Base seed
+
+    Returns:
+        int: Seed of the model
+    """
+    return (zlib.crc32(f"{partition_key}:{newspaper}".encode("utf-8")) + random_state) % 2**32
+
+
+def _train_lda(
+    newspaper_tweets: sparse.csr_matrix,
+    vocabulary: np.ndarray,
+    lda_options: Dict[str, Any],
+    seed: int,
+) -> Tuple[models.LdaModel, int]:
+    """Trains the LDA model of a newspaper in a week.
+
+    With early stopping, the model is trained one pass at a time and training stops once the relative
+    improvement of the log perplexity bound on the tweets is below ``tol``, after ``min_passes``.
+
+    Args:
+        newspaper_tweets (sparse.csr_matrix): DTM rows of the tweets of the newspaper, one column per term used
+        vocabulary (np.ndarray): Term of each column of ``newspaper_tweets``
+        lda_options (Dict[str, Any]): ``num_topics``, maximum ``passes`` and ``early_stopping`` options
+        seed (int): Seed of the model
+
+    Returns:
+        Tuple[models.LdaModel, int]: Trained model and number of passes used
+    """
+    tweet_corpus = matutils.Sparse2Corpus(newspaper_tweets, documents_columns=False)
+
+    id2word = corpora.Dictionary.from_corpus(
+        tweet_corpus, id2word=dict(enumerate(vocabulary))
+    )
+
+    early_stopping = lda_options["early_stopping"]
+
+    if not early_stopping["enabled"]:
+        lda = models.LdaModel(
+            corpus=tweet_corpus,
+            id2word=id2word,
+            num_topics=lda_options["num_topics"],
+            passes=lda_options["passes"],
+            random_state=seed,
+        )
+        return lda, lda_options["passes"]
+
+    lda = models.LdaModel(
+        id2word=id2word,
+        num_topics=lda_options["num_topics"],
+        random_state=seed,
+    )
+
+    previous_bound = None
+
+    for passes in range(1, lda_options["passes"] + 1):
+        lda.update(tweet_corpus, passes=1)
+        bound = lda.log_perplexity(tweet_corpus)
+
+        if (
+            previous_bound is not None
+            and passes >= early_stopping["min_passes"]
+            and bound - previous_bound < early_stopping["tol"] * abs(previous_bound)
+        ):
+            break
+
+        previous_bound = bound
+
+    return lda, passes
+
+
+def _update_online_lda(
+    checkpoint_dir: str,
+    newspaper: str,
+    weeks: List[Tuple[str, sparse.csr_matrix, np.ndarray]],
+    lda_options: Dict[str, Any],
+    seed: int,
+) -> Dict[str, Tuple[TopicTerms, int]]:
+    """Updates the online LDA model of a newspaper with the tweets of each week, in chronological order,
+    and checkpoints it. Weeks already absorbed by the model are skipped.
+
+    Args:
+        checkpoint_dir (str): Directory with the checkpoints of the online models
+        newspaper (str): Newspaper name
+        weeks (List[Tuple[str, sparse.csr_matrix, np.ndarray]]): Week key, DTM rows of the tweets of the
+            newspaper and term of each column, for each week
+        lda_options (Dict[str, Any]): ``num_topics`` and the ``online`` options
+        seed (int): Seed of the model, used when the newspaper has no checkpoint yet
 
     Returns:
-        Dict[str, Callable[[], Any]]: Dictionary with Partitioned Dataset with the results of Topic Modeling
+        Dict[str, Tuple[TopicTerms, int]]: Topic-term matrix of the model after each week absorbed and
+            passes used, by week key
     """
-    topic_modeling_results = {}
+    checkpoint = OnlineLdaCheckpoint(checkpoint_dir, newspaper)
+    lda, absorbed_weeks = checkpoint.load()
 
-    for (filename, data_dtm_data_function), dtm_data_function in zip(
-        data_dtm_data.items(), dtm_data.values()
+    results = {}
+
+    for key, newspaper_tweets, vocabulary in sorted(
+        weeks, key=lambda week: partition_week(week[0])
     ):
-        new_filename = filename.replace("data_dtm", "topic_modeling")
+        if key in absorbed_weeks:
+            logger.debug(
+                f"Topic Modeling -> {newspaper} already absorbed week {key}, skipping it"
+            )
+            continue
+
+        if lda is None:
+            lda = new_online_lda(vocabulary, lda_options["num_topics"], seed)
+
+        term_ids = grow_vocabulary(lda, vocabulary)
+
+        week_tweets = sparse.csr_matrix(
+            (newspaper_tweets.data, term_ids[newspaper_tweets.indices], newspaper_tweets.indptr),
+            shape=(newspaper_tweets.shape[0], lda.num_terms),
+        )
 
-        data_dtm = data_dtm_data_function()
-        dtm = dtm_data_function()
+        lda.update(
+            matutils.Sparse2Corpus(week_tweets, documents_columns=False),
+            passes=lda_options["online"]["passes"],
+        )
+        absorbed_weeks.append(key)
 
-        data_dtm["year"] = data_dtm["created_at"].dt.isocalendar().year
-        data_dtm["week"] = data_dtm["created_at"].dt.isocalendar().week
-        data_dtm["year_week"] = (
-            data_dtm["year"].astype("str") + "w" + data_dtm["week"].astype("str")
+        results[key] = (
+            TopicTerms(
+                topics=lda.get_topics().astype(np.float32),
+                vocabulary=np.asarray(
+                    [lda.id2word[term_id] for term_id in range(lda.num_terms)],
+                    dtype=str,
+                ),
+            ),
+            lda_options["online"]["passes"],
         )
 
-        newspapers = data_dtm["newspaper"].unique()
+    if results:
+        checkpoint.save(lda, absorbed_weeks)
 
-        newspapers_dtm = {}
+    return results
 
-        newspapers_models = {}
 
-        for newspaper in newspapers:
-            ids = data_dtm.loc[
-                data_dtm["newspaper"] == newspaper,
-                "id",
-            ].tolist()
+def _submit(executor: Optional[Executor], function: Callable, *args: Any) -> Future:
+    """Submits a job to the executor, or runs it right away if there is no executor."""
+    if executor is not None:
+        return executor.submit(function, *args)
+
+    future = Future()
+    future.set_result(function(*args))
+    return future
+
+
+def _top_terms_frame(
+    newspaper: str, topic_terms: TopicTerms, top_terms: int, passes: int
+) -> pd.DataFrame:
+    """Builds the long table of the top terms of each topic of a model.
+
+    Args:
+        newspaper (str): Newspaper of the model
+        topic_terms (TopicTerms): Topic-term matrix of the model
+        top_terms (int): Number of terms kept for each topic
+        passes (int): Number of passes used to train the model
+
+    Returns:
+        pd.DataFrame: Dataframe with one row per topic and rank, with the term and its weight
+    """
+    num_topics, n_terms = topic_terms.topics.shape
+    top_terms = min(top_terms, n_terms)
+
+    top = np.argsort(-topic_terms.topics, axis=1, kind="stable")[:, :top_terms]
+
+    return pd.DataFrame(
+        {
+            "newspaper": newspaper,
+            "topic": np.repeat(np.arange(1, num_topics + 1), top_terms),
+            "rank": np.tile(np.arange(1, top_terms + 1), num_topics),
+            "term": topic_terms.vocabulary[top.ravel()],
+            "weight": np.take_along_axis(topic_terms.topics, top, axis=1).ravel(),
+            "passes": passes,
+        }
+    )
+
+
+def _newspapers_tweets(
+    data_dtm: pd.DataFrame, dtm: SparseDTM
+) -> Dict[str, Tuple[sparse.csr_matrix, np.ndarray]]:
+    """Returns the DTM rows of the tweets of each newspaper, keeping only the terms used by the newspaper.
+
+    Args:
+        data_dtm (pd.DataFrame): Data DTM of a week
+        dtm (SparseDTM): Sparse DTM of the same week
+
+    Returns:
+        Dict[str, Tuple[sparse.csr_matrix, np.ndarray]]: DTM rows and term of each column, by newspaper
+    """
+    newspapers_tweets = {}
+
+    for newspaper in data_dtm["newspaper"].unique():
+        ids = data_dtm.loc[
+            data_dtm["newspaper"] == newspaper,
+            "id",
+        ]
 
-            newspaper_tweets = dtm.T[ids]
+        newspaper_tweets = dtm.matrix[dtm.row_positions("id", ids)]
 
-            newspapers_dtm[newspaper] = newspaper_tweets
+        # Only the terms used by the newspaper are sent to the model
+        used_terms = np.flatnonzero(newspaper_tweets.getnnz(axis=0))
+
+        newspapers_tweets[newspaper] = (
+            newspaper_tweets[:, used_terms],
+            dtm.vocabulary[used_terms],
+        )
+
+    return newspapers_tweets
+
+
+def _online_topic_modeling(
+    data_dtm_data: Dict[str, Callable[[], Any]],
+    dtm_data: Dict[str, Callable[[], Any]],
+    lda_options: Dict[str, Any],
+    executor: Optional[Executor],
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, TopicTerms]]]:
+    """Updates the online model of each newspaper with each week, and returns the topics after each week.
+
+    The weeks absorbed by all the newspapers in previous runs are skipped before their partitions are loaded.
+
+    Args:
+        data_dtm_data (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with Data DTM per week.
+        dtm_data (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with sparse DTM per week.
+        lda_options (Dict[str, Any]): LDA options
+        executor (Optional[Executor]): Process pool, None to train in this process
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, TopicTerms]]]: Dictionaries with the top terms of
+            each topic per week and the topic-term matrices of each newspaper per week
+    """
+    checkpoint_dir = lda_options["online"]["checkpoint_dir"]
+    absorbed_weeks = load_absorbed_weeks(checkpoint_dir)
+
+    filenames = {}
+    newspapers_weeks = defaultdict(list)
+
+    for key, (filename, dtm_filename) in align_partitions(
+        data_dtm_data, dtm_data
+    ).items():
+        if key in absorbed_weeks:
+            logger.debug(f"Topic Modeling -> week {key} already absorbed, skipping it")
+            continue
+
+        filenames[key] = filename
+
+        newspapers_tweets = _newspapers_tweets(
+            data_dtm_data[filename](), dtm_data[dtm_filename]()
+        )
+
+        for newspaper, (newspaper_tweets, vocabulary) in newspapers_tweets.items():
+            newspapers_weeks[newspaper].append((key, newspaper_tweets, vocabulary))
+
+    futures = {
+        newspaper: _submit(
+            executor,
+            _update_online_lda,
+            checkpoint_dir,
+            newspaper,
+            weeks,
+            lda_options,
+            _lda_seed("online", newspaper, lda_options["random_state"]),
+        )
+        for newspaper, weeks in newspapers_weeks.items()
+    }
+
+    weeks_results = defaultdict(dict)
+    for newspaper, future in futures.items():
+        for key, result in future.result().items():
+            weeks_results[key][newspaper] = result
+
+    # Every newspaper with tweets in these weeks has absorbed them
+    save_absorbed_weeks(checkpoint_dir, absorbed_weeks | filenames.keys())
+
+    corpus_topic = {}
+    topic_terms = {}
+
+    for key, newspapers_results in weeks_results.items():
+        filename = filenames[key]
+
+        corpus_topic[
+            filename.replace("data_dtm", "corpus_topic").replace("parquet", "feather")
+        ] = pd.concat(
+            [
+                _top_terms_frame(
+                    newspaper, newspaper_topic_terms, lda_options["top_terms"], passes
+                )
+                for newspaper, (newspaper_topic_terms, passes) in newspapers_results.items()
+            ],
+            ignore_index=True,
+        )
+        topic_terms[
+            filename.replace("data_dtm", "topic_terms").replace("parquet", "npz")
+        ] = {
+            newspaper: newspaper_topic_terms
+            for newspaper, (newspaper_topic_terms, _) in newspapers_results.items()
+        }
+
+        logger.info(
+            f"[bold blue]Topic Modeling ->[/bold blue] {filename} absorbed by the online models of "
+            f"{len(newspapers_results)} newspapers",
+            extra={"markup": True},
+        )
+
+    return corpus_topic, topic_terms
 
-            sparse_dtm = sparse.csc_matrix(newspaper_tweets)
-            tweet_corpus = matutils.Sparse2Corpus(sparse_dtm)
 
-            id2word = {}
+def _weekly_topic_modeling(
+    data_dtm_data: Dict[str, Callable[[], Any]],
+    dtm_data: Dict[str, Callable[[], Any]],
+    lda_options: Dict[str, Any],
+    executor: Optional[Executor],
+) -> Tuple[
+    Dict[str, pd.DataFrame], Dict[str, Dict[str, TopicTerms]], Dict[str, Dict[str, Any]]
+]:
+    """Trains a new model for each newspaper and week, and returns its topics.
 
-            for index, word in enumerate(newspaper_tweets.T.columns):
-                id2word[index] = word
+    Args:
+        data_dtm_data (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with Data DTM per week.
+        dtm_data (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with sparse DTM per week.
+        lda_options (Dict[str, Any]): LDA options
+        executor (Optional[Executor]): Process pool, None to train in this process
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, TopicTerms]], Dict[str, Dict[str, Any]]]: Dictionaries
+            with the top terms of each topic per week, the topic-term matrices of each newspaper per week and,
+            if ``save_models`` is set, the LDA models of each newspaper per week
+    """
+    corpus_topic = {}
+    topic_terms = {}
+    lda_models = {}
+    newspapers_futures = {}
 
-            newspapers_models[newspaper] = models.LdaModel(
-                corpus=tweet_corpus, id2word=id2word, num_topics=3, passes=80
+    for key, (filename, dtm_filename) in align_partitions(
+        data_dtm_data, dtm_data
+    ).items():
+        newspapers_tweets = _newspapers_tweets(
+            data_dtm_data[filename](), dtm_data[dtm_filename]()
+        )
+
+        newspapers_futures[filename] = {
+            newspaper: _submit(
+                executor,
+                _train_lda,
+                newspaper_tweets,
+                vocabulary,
+                lda_options,
+                _lda_seed(key, newspaper, lda_options["random_state"]),
             )
+            for newspaper, (newspaper_tweets, vocabulary) in newspapers_tweets.items()
+        }
+
+        logger.info(
+            f"[bold blue]Topic Modeling ->[/bold blue] {filename} "
+            f"{len(newspapers_tweets)} models scheduled",
+            extra={"markup": True},
+        )
+
+    for filename, futures in newspapers_futures.items():
+        new_filename = filename.replace("data_dtm", "corpus_topic").replace(
+            "parquet", "feather"
+        )
 
-        newspaper_lda = pd.DataFrame.from_dict(newspapers_models, orient="index")
-        newspaper_lda.reset_index(inplace=True)
-        newspaper_lda.rename({0: "lda_model"}, axis=1, inplace=True)
+        newspapers_topic_terms = {}
+        newspapers_top_terms = []
+        newspapers_models = {}
+        passes_used = {}
+
+        for newspaper, future in futures.items():
+            lda, passes = future.result()
+            passes_used[newspaper] = passes
+
+            newspapers_topic_terms[newspaper] = TopicTerms(
+                topics=lda.get_topics().astype(np.float32),
+                vocabulary=np.asarray(
+                    [lda.id2word[term_id] for term_id in range(lda.num_terms)],
+                    dtype=str,
+                ),
+            )
+            newspapers_top_terms.append(
+                _top_terms_frame(
+                    newspaper,
+                    newspapers_topic_terms[newspaper],
+                    lda_options["top_terms"],
+                    passes,
+                )
+            )
+            newspapers_models[newspaper] = lda
 
-        newspaper_lda["topics"] = newspaper_lda["lda_model"].apply(
-            lambda lda: lda.print_topics()
+        logger.info(
+            f"[bold blue]Topic Modeling ->[/bold blue] {new_filename} passes used: "
+            f"{passes_used}",
+            extra={"markup": True},
         )
 
-        newspaper_lda["topic_1"] = newspaper_lda["topics"].apply(lambda x: x[0])
-        newspaper_lda["topic_2"] = newspaper_lda["topics"].apply(lambda x: x[1])
-        newspaper_lda["topic_3"] = newspaper_lda["topics"].apply(lambda x: x[2])
+        corpus_topic[new_filename] = pd.concat(newspapers_top_terms, ignore_index=True)
+        topic_terms[
+            filename.replace("data_dtm", "topic_terms").replace("parquet", "npz")
+        ] = newspapers_topic_terms
+
+        if lda_options["save_models"]:
+            lda_models[
+                filename.replace("data_dtm", "lda_models").replace("parquet", "pkl")
+            ] = newspapers_models
+
+    return corpus_topic, topic_terms, lda_models
+
+
+def topic_modeling(
+    data_dtm_data: Dict[str, Callable[[], Any]],
+    dtm_data: Dict[str, Callable[[], Any]],
+    lda_options: Dict[str, Any],
+) -> Tuple[
+    Dict[str, pd.DataFrame], Dict[str, Dict[str, TopicTerms]], Dict[str, Dict[str, Any]]
+]:
+    """Returns the topics of each newspaper per week.
+
+    By default a new model is trained for each newspaper and week. In online mode, each newspaper keeps
+    a persistent model that is updated with the tweets of each new week, so the topics of the weeks
+    are comparable and the cost of a run depends only on the new weeks.
 
-        topic_modeling_results[new_filename] = newspaper_lda
+    Args:
+        data_dtm (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with Data DTM per week.
+        dtm (Dict[str, Callable[[], Any]]): Dictionary with Partitioned Dataset with sparse DTM per week.
+        lda_options (Dict[str, Any]): Number of topics, passes, base seed and number of worker processes
+            used to train the models, number of top terms kept for each topic, whether the models are saved
+            and the ``online`` mode options
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, TopicTerms]], Dict[str, Dict[str, Any]]]: Dictionaries
+            with the top terms of each topic per week, the topic-term matrices of each newspaper per week and,
+            if ``save_models`` is set and not in online mode, the LDA models of each newspaper per week
+    """
+    n_workers = lda_options["n_workers"]
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+
+    try:
+        if lda_options["online"]["enabled"]:
+            corpus_topic, topic_terms = _online_topic_modeling(
+                data_dtm_data, dtm_data, lda_options, executor
+            )
+            return corpus_topic, topic_terms, {}
 
-    return topic_modeling_results
+        return _weekly_topic_modeling(data_dtm_data, dtm_data, lda_options, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,172 @@
+"""
+Persistent LDA models updated online with the tweets of each new week
+"""
+import json
+import numpy as np
+import os
+import re
+import shutil
+
+from gensim import corpora, models
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+
+class OnlineLdaCheckpoint:
+    """Checkpoint of the online LDA model of a newspaper, with the weeks it has absorbed.
+
+    The model is stored with gensim's native format in ``{checkpoint_dir}/{newspaper}``, and it is
+    replaced only once the new checkpoint is fully written. The previous checkpoint is kept in
+    ``{newspaper}.old`` while they are swapped, and loaded if the swap didn't finish.
+    """
+
+    def __init__(self, checkpoint_dir: str, newspaper: str) -> None:
+        """Points to the checkpoint of a newspaper.
+
+        Args:
+            checkpoint_dir (str): Directory with the checkpoints of every newspaper
+            newspaper (str): Newspaper name
+        """
+        self._path = Path(checkpoint_dir) / re.sub(r"[^\w-]", "_", newspaper)
+        self._previous_path = self._path.with_name(f"{self._path.name}.old")
+
+    def load(self) -> Tuple[Optional[models.LdaModel], List[str]]:
+        """Loads the model and the weeks it has absorbed.
+
+        Returns:
+            Tuple[Optional[models.LdaModel], List[str]]: Model, None if there is no checkpoint yet, and
+                week keys absorbed by the model, in the order they were absorbed
+        """
+        # The weeks are written last, so a checkpoint with them is complete
+        for path in (self._path, self._previous_path):
+            if (path / "weeks.json").exists():
+                lda = models.LdaModel.load(str(path / "model"))
+                absorbed_weeks = json.loads((path / "weeks.json").read_text())
+
+                return lda, absorbed_weeks
+
+        return None, []
+
+    def save(self, lda: models.LdaModel, absorbed_weeks: List[str]) -> None:
+        """Replaces the checkpoint with a new model state.
+
+        Args:
+            lda (models.LdaModel): Model
+            absorbed_weeks (List[str]): Week keys absorbed by the model
+        """
+        temporary_path = self._path.with_name(f"{self._path.name}.tmp")
+
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        temporary_path.mkdir(parents=True)
+
+        lda.save(str(temporary_path / "model"))
+        (temporary_path / "weeks.json").write_text(json.dumps(absorbed_weeks))
+
+        # A complete checkpoint is kept at every step, in the path or as the previous checkpoint
+        if self._path.exists():
+            shutil.rmtree(self._previous_path, ignore_errors=True)
+            self._path.rename(self._previous_path)
+        temporary_path.rename(self._path)
+        shutil.rmtree(self._previous_path, ignore_errors=True)
+
+
+def load_absorbed_weeks(checkpoint_dir: str) -> Set[str]:
+    """Loads the weeks absorbed by the online models of all the newspapers in previous runs.
+
+    Args:
+        checkpoint_dir (str): Directory with the checkpoints of every newspaper
+
+    Returns:
+        Set[str]: Week keys
+    """
+    weeks_path = Path(checkpoint_dir) / "absorbed_weeks.json"
+
+    if not weeks_path.exists():
+        return set()
+
+    return set(json.loads(weeks_path.read_text()))
+
+
+def save_absorbed_weeks(checkpoint_dir: str, weeks: Iterable[str]) -> None:
+    """Saves the weeks absorbed by the online models of all the newspapers, replacing the previous file
+    only once it is fully written.
+
+    Args:
+        checkpoint_dir (str): Directory with the checkpoints of every newspaper
+        weeks (Iterable[str]): Week keys
+    """
+    weeks_path = Path(checkpoint_dir) / "absorbed_weeks.json"
+    weeks_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temporary_path = weeks_path.with_name(f"{weeks_path.name}.tmp")
+    temporary_path.write_text(json.dumps(sorted(weeks)))
+    os.replace(temporary_path, weeks_path)
+
+
+def new_online_lda(terms: np.ndarray, num_topics: int, seed: int) -> models.LdaModel:
+    """Creates an untrained LDA model with the terms of its first week as vocabulary.
+
+    Args:
+        terms (np.ndarray): Terms of the first week
+        num_topics (int): Number of topics
+        seed (int): Seed of the model
+
+    Returns:
+        models.LdaModel: Untrained model
+    """
+    return models.LdaModel(
+        id2word=corpora.Dictionary([list(terms)]),
+        num_topics=num_topics,
+        random_state=seed,
+    )
+
+
+def grow_vocabulary(lda: models.LdaModel, terms: np.ndarray) -> np.ndarray:
+    """Adds the terms not known by the model to its vocabulary and returns the model ids of the terms.
+
+    The new terms get the mean prior of the known terms and sufficient statistics initialized as in a
+    new gensim model, so the topics learned from the previous weeks are kept.
+
+    Args:
+        lda (models.LdaModel): Model
+        terms (np.ndarray): Terms of the new week
+
+    Returns:
+        np.ndarray: Model id of each term
+    """
+    dictionary = lda.id2word
+    new_terms = [term for term in terms if term not in dictionary.token2id]
+
+    if new_terms:
+        dictionary.add_documents([new_terms])
+
+        n_new_terms = len(dictionary) - lda.num_terms
+        eta_fill = lda.eta.mean(axis=-1, keepdims=True)
+
+        if lda.eta.ndim == 1:
+            lda.eta = np.concatenate(
+                [lda.eta, np.full(n_new_terms, eta_fill, dtype=lda.dtype)]
+            )
+        else:
+            lda.eta = np.hstack(
+                [
+                    lda.eta,
+                    np.broadcast_to(eta_fill, (lda.num_topics, n_new_terms)).astype(
+                        lda.dtype
+                    ),
+                ]
+            )
+
+        lda.state.eta = lda.eta
+        lda.state.sstats = np.hstack(
+            [
+                lda.state.sstats,
+                lda.random_state.gamma(
+                    100.0, 1.0 / 100.0, (lda.num_topics, n_new_terms)
+                ).astype(lda.dtype),
+            ]
+        )
+        lda.num_terms = len(dictionary)
+        lda.sync_state()
+
+    return np.array([dictionary.token2id[term] for term in terms], dtype=np.int32)
@@ -13,8 +13,8 @@ def create_pipeline(**kwargs) -> Pipeline:
         [
             node(
                 func=topic_modeling,
-                inputs=["data_dtm", "dtm"],
-                outputs="corpus_topic",
+                inputs=["data_dtm@lemmas", "dtm", "params:lda"],
+                outputs=["corpus_topic", "topic_terms", "lda_models"],
                 name="topic_modeling_node",
             )
         ]
@@ -1,3 +1,7 @@
 from kedro.config import OmegaConfigLoader  # new import
 
+from newspapersAnalysis.hooks import IncrementalPartitionsHook
+
 CONFIG_LOADER_CLASS = OmegaConfigLoader
+
+HOOKS = (IncrementalPartitionsHook(),)
@@ -0,0 +1,127 @@
+"""
+Tests of the partitioning, pruning and pushdown of the ``HivePartitionedDataset``.
+"""
+
+import pandas as pd
+import pytest
+
+from kedro.io.core import DatasetError
+
+from newspapersAnalysis.extras.datasets.hive_partitioned_dataset import (
+    HivePartitionedDataset,
+)
+
+PARTITION_ID = "corpus-({year}, {week}).feather"
+
+
+def _week(week: int, newspapers: list, start: int = 0) -> pd.DataFrame:
+    size = len(newspapers)
+    created_at = pd.Timestamp.fromisocalendar(2023, week, 1).tz_localize("UTC")
+
+    # Newest first, so the order of the rows differs from the order of the files
+    return pd.DataFrame(
+        {
+            "id": [str(week * 100 + i) for i in range(size)],
+            "created_at": [
+                created_at + pd.Timedelta(hours=size - i) for i in range(size)
+            ],
+            "newspaper": newspapers,
+            "retweet_count": list(range(size)),
+        },
+        index=pd.RangeIndex(start, start + size),
+    )
+
+
+def _dataset(tmp_path, **kwargs) -> HivePartitionedDataset:
+    return HivePartitionedDataset(
+        path=str(tmp_path / "corpus"), partition_id=PARTITION_ID, **kwargs
+    )
+
+
+@pytest.fixture
+def saved(tmp_path):
+    data = {
+        "corpus-(2023, 10).feather": _week(
+            10, ["rpp", "elcomercio", "rpp", "larepublica"]
+        ),
+        "corpus-(2023, 9).feather": _week(
+            9, ["elcomercio", "rpp", "elcomercio"], start=5
+        ),
+    }
+    _dataset(tmp_path).save(data)
+    return data
+
+
+def test_round_trip_keeps_the_index_and_order(tmp_path, saved):
+    partitions = _dataset(tmp_path).load()
+
+    # Weeks are in chronological order, not in the order of the ids as strings
+    assert list(partitions) == ["corpus-(2023, 9).feather", "corpus-(2023, 10).feather"]
+    for partition_id, load_function in partitions.items():
+        pd.testing.assert_frame_equal(load_function(), saved[partition_id])
+
+    assert sorted(
+        path.relative_to(tmp_path / "corpus").as_posix()
+        for path in (tmp_path / "corpus").rglob("*.parquet")
+    ) == [
+        "year=2023/week=10/newspaper=elcomercio/part-0.parquet",
+        "year=2023/week=10/newspaper=larepublica/part-0.parquet",
+        "year=2023/week=10/newspaper=rpp/part-0.parquet",
+        "year=2023/week=9/newspaper=elcomercio/part-0.parquet",
+        "year=2023/week=9/newspaper=rpp/part-0.parquet",
+    ]
+
+
+def test_casts_the_values_of_the_partition_filters(tmp_path, saved):
+    dataset = _dataset(
+        tmp_path,
+        load_args={"filters": [["year", "==", "2023"], ["week", "in", ["10"]]]},
+    )
+
+    partitions = dataset.load()
+
+    assert list(partitions) == ["corpus-(2023, 10).feather"]
+    assert len(partitions["corpus-(2023, 10).feather"]()) == 4
+
+
+def test_raises_when_a_partition_filter_can_not_be_cast(tmp_path):
+    with pytest.raises(DatasetError, match="of type int"):
+        _dataset(tmp_path, load_args={"filters": [["week", "==", "last"]]})
+
+
+def test_filters_any_of_the_conjunctions(tmp_path, saved):
+    dataset = _dataset(tmp_path)
+
+    data = dataset.query(
+        columns=["id", "newspaper"],
+        filters=[
+            [("newspaper", "==", "elcomercio"), ("week", "==", 9)],
+            [("newspaper", "==", "rpp"), ("retweet_count", ">=", 2)],
+        ],
+    )
+
+    assert data.values.tolist() == [
+        ["900", "elcomercio"],
+        ["902", "elcomercio"],
+        ["1002", "rpp"],
+    ]
+
+
+def test_stores_the_rows_without_newspaper(tmp_path):
+    dataset = _dataset(tmp_path)
+    data = _week(9, ["elcomercio", None, "rpp"])
+    dataset.save({"corpus-(2023, 9).feather": data})
+
+    loaded = dataset.load()["corpus-(2023, 9).feather"]()
+
+    pd.testing.assert_frame_equal(loaded, data)
+    assert (
+        tmp_path / "corpus/year=2023/week=9/newspaper=__HIVE_DEFAULT_PARTITION__"
+    ).is_dir()
+
+    # As in Arrow, only ``not in`` keeps the nulls
+    assert dataset.query(["id"], [("newspaper", "!=", "rpp")])["id"].tolist() == ["900"]
+    assert dataset.query(["id"], [("newspaper", "not in", ["rpp"])])["id"].tolist() == [
+        "900",
+        "901",
+    ]
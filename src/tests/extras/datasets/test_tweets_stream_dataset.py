@@ -0,0 +1,69 @@
+"""
+Tests of the incremental parsing of the ``TweetsStreamDataset``.
+"""
+
+import json
+import pytest
+
+from newspapersAnalysis.extras.datasets import tweets_stream_dataset
+from newspapersAnalysis.extras.datasets.tweets_stream_dataset import TweetsStreamDataset
+
+
+def _tweet(tweet_id: int, text: str = "tweet") -> dict:
+    return {
+        "edit_history_tweet_ids": [str(tweet_id)],
+        "created_at": "2023-06-05T10:00:00.000Z",
+        "id": str(tweet_id),
+        "conversation_id": str(tweet_id),
+        "possibly_sensitive": False,
+        "text": text,
+        "public_metrics": {"retweet_count": tweet_id, "reply_count": 1},
+    }
+
+
+def _load(tmp_path, content: str, **kwargs) -> list:
+    filepath = tmp_path / "tweets.json"
+    filepath.write_text(content, encoding="utf-8")
+
+    return list(TweetsStreamDataset(filepath=str(filepath), **kwargs).load())
+
+
+def test_loads_an_empty_data_array(tmp_path):
+    chunks = _load(tmp_path, '{"data": [ ], "meta": {"result_count": 0}}')
+
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert "text" in chunks[0].columns
+
+
+def test_loads_the_data_after_the_meta(tmp_path):
+    content = json.dumps(
+        {
+            "meta": {"result_count": 3, "next_token": "abc"},
+            "data": [_tweet(i) for i in range(3)],
+        }
+    )
+
+    chunks = _load(tmp_path, content, chunk_size=2)
+
+    assert [chunk["id"].tolist() for chunk in chunks] == [["0", "1"], ["2"]]
+    assert [chunk.index.tolist() for chunk in chunks] == [[0, 1], [2]]
+    assert chunks[1]["retweet_count"].tolist() == [2]
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7])
+def test_parses_values_split_across_blocks(tmp_path, monkeypatch, read_size):
+    monkeypatch.setattr(tweets_stream_dataset, "_READ_SIZE", read_size)
+    texts = ['comillas \\"citadas\\"', "línea\nnueva \\ barra", "emoji 😀 y año"]
+    tweets = [_tweet(123456789 + i, text) for i, text in enumerate(texts)]
+    # Escape the non ASCII characters so the escapes are split too
+    content = json.dumps(
+        {"meta": {"result_count": 3}, "data": tweets}, ensure_ascii=True
+    )
+
+    chunks = _load(tmp_path, content)
+
+    assert len(chunks) == 1
+    assert chunks[0]["text"].tolist() == texts
+    assert chunks[0]["id"].tolist() == ["123456789", "123456790", "123456791"]
+    assert chunks[0]["retweet_count"].tolist() == [123456789, 123456790, 123456791]
@@ -0,0 +1,626 @@
+"""
+Tests of the data retrieval script, against a stub of the Twitter API and a mocked S3.
+"""
+
+import boto3
+import gzip
+import json
+import pytest
+import requests
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from moto import mock_aws
+from typing import Callable, Dict, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from newspapersAnalysis.pipelines.data_retrieval import data_retrieval
+from newspapersAnalysis.pipelines.data_retrieval.data_retrieval import (
+    S3_BUCKET,
+    NDJSONPageWriter,
+    ReplyWriter,
+    S3Uploader,
+    TokenBucket,
+    TwitterClient,
+    get_responses_to_user,
+    get_user_tweets,
+    get_users_id,
+    get_users_tweets,
+)
+
+START_TIME = "2023-06-05T00:00:00"
+
+END_TIME = "2023-06-12T00:00:00"
+
+TIMELINE_PATH = "/2/users/1/tweets"
+
+SEARCH_PATH = "/2/tweets/search/recent"
+
+
+class StubAPI:
+    """Stub of the Twitter API, answering each path with a handler that returns the status, headers and
+    body of the response, and recording the requests received.
+    """
+
+    def __init__(self) -> None:
+        self.handlers: Dict[str, Callable[[dict], Tuple[int, dict, dict]]] = {}
+        self.requests = []
+        self.url = None
+
+    def request_handler(self) -> type:
+        """Returns the request handler class of the server."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802
+                url = urlsplit(self.path)
+                query = dict(parse_qsl(url.query))
+                stub.requests.append((url.path, query))
+
+                status, headers, body = stub.handlers[url.path](query)
+                content = json.dumps(body).encode("utf-8")
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+    def paths(self, path: str) -> list:
+        """Returns the queries of the requests received by a path."""
+        return [query for request_path, query in self.requests if request_path == path]
+
+
+@pytest.fixture
+def api():
+    """Stub of the Twitter API served on a local port."""
+    stub = StubAPI()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub.request_handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    stub.url = f"http://127.0.0.1:{server.server_port}/2"
+    yield stub
+
+    server.shutdown()
+    server.server_close()
+
+
+def _tweets(start: int, count: int) -> list:
+    return [
+        {
+            "id": str(tweet_id),
+            "conversation_id": str(tweet_id),
+            "created_at": "2023-06-05T10:00:00.000Z",
+            "text": f"Noticia número {tweet_id}",
+            "public_metrics": {"reply_count": tweet_id % 3},
+        }
+        for tweet_id in range(start, start + count)
+    ]
+
+
+def _timeline(failing: set) -> Callable[[dict], Tuple[int, dict, dict]]:
+    """Returns a handler of the user timeline with three pages, failing once on the tokens in ``failing``."""
+    pages = {
+        None: (_tweets(0, 10), "p1"),
+        "p1": (_tweets(10, 10), "p2"),
+        "p2": (_tweets(20, 5), None),
+    }
+
+    def handler(query: dict) -> Tuple[int, dict, dict]:
+        token = query.get("pagination_token")
+
+        if token in failing:
+            failing.discard(token)
+            return 503, {}, {}
+
+        tweets, next_token = pages[token]
+        meta = {"result_count": len(tweets)}
+        if next_token is not None:
+            meta["next_token"] = next_token
+
+        return 200, {}, {"data": tweets, "meta": meta}
+
+    return handler
+
+
+def _search(failing: set) -> Callable[[dict], Tuple[int, dict, dict]]:
+    """Returns a handler of the recent search, with two replies to each conversation and a reply found by
+    every query, in pages of two replies. Queries with a conversation in ``failing`` fail once.
+    """
+
+    def handler(query: dict) -> Tuple[int, dict, dict]:
+        conversation_ids = [term.split(":")[1] for term in query["query"].split(" OR ")]
+
+        if failing & set(conversation_ids):
+            failing.difference_update(conversation_ids)
+            return 503, {}, {}
+
+        replies = [
+            {"id": f"{conversation_id}-{reply}", "conversation_id": conversation_id}
+            for conversation_id in conversation_ids
+            for reply in range(2)
+        ] + [{"id": "shared", "conversation_id": conversation_ids[0]}]
+
+        page = int(query.get("next_token", 0))
+        meta = {} if (page + 1) * 2 >= len(replies) else {"next_token": str(page + 1)}
+
+        return 200, {}, {"data": replies[page * 2 : (page + 1) * 2], "meta": meta}
+
+    return handler
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Mocked S3 with the bucket of the project."""
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket=S3_BUCKET)
+        yield client
+
+
+def _s3_object(s3, key: str) -> bytes:
+    return s3.get_object(Bucket=S3_BUCKET, Key=key)["Body"].read()
+
+
+def test_small_file_is_compressed_once(tmp_path, s3):
+    """A file smaller than a part is uploaded with a single PUT, decompressing to the local file."""
+    filepath = tmp_path / "2023w24_data_diarioojo.ndjson"
+    writer = NDJSONPageWriter(
+        str(filepath),
+        str(tmp_path / "checkpoint.json"),
+        S3Uploader("testing", "testing"),
+    )
+
+    writer.open()
+    writer.write_page(_tweets(0, 5), "next")
+    writer.write_page(_tweets(5, 4), None)
+    writer.close()
+
+    body = gzip.decompress(_s3_object(s3, "raw_data/2023w24_data_diarioojo.ndjson.gz"))
+
+    assert body == filepath.read_bytes()
+    assert len(body.splitlines()) == 9
+
+
+def test_retries_rate_limited_requests(api):
+    """Requests answered with 429 are retried with backoff until they succeed."""
+    statuses = iter([429, 429, 200])
+    api.handlers["/2/users/1/tweets"] = lambda query: (next(statuses), {}, {"data": []})
+
+    client = TwitterClient("token", api.url, backoff=0.01)
+    response = client.get("users/1/tweets", {"max_results": 100})
+    client.close()
+
+    assert response.status_code == 200
+    assert len(api.paths("/2/users/1/tweets")) == 3
+
+
+def test_raises_when_retries_run_out(api):
+    """The last error is raised once the retries run out."""
+    api.handlers["/2/users/1/tweets"] = lambda query: (503, {}, {})
+
+    client = TwitterClient("token", api.url, max_retries=2, backoff=0.01)
+
+    with pytest.raises(requests.HTTPError):
+        client.get("users/1/tweets")
+    client.close()
+
+    assert len(api.paths("/2/users/1/tweets")) == 3
+
+
+def test_waits_for_the_rate_limit_reset(api):
+    """A spent rate limit window blocks the requests until it resets."""
+    responses = iter(
+        [
+            (
+                429,
+                {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(time.time())},
+                {},
+            ),
+            (200, {"x-rate-limit-remaining": "10"}, {"data": []}),
+        ]
+    )
+    api.handlers["/2/users/1/tweets"] = lambda query: next(responses)
+
+    client = TwitterClient("token", api.url, backoff=0.01)
+    start = time.monotonic()
+    response = client.get("users/1/tweets")
+    client.close()
+
+    assert response.status_code == 200
+    # The bucket waits for the reset, one second after the time given by the API
+    assert time.monotonic() - start >= 0.9
+
+
+def test_waits_for_the_reset_without_remaining_header(api, monkeypatch):
+    """A 429 with the reset time but without the remaining requests waits for the reset, not the backoff."""
+    responses = iter(
+        [
+            (429, {"x-rate-limit-reset": str(time.time())}, {}),
+            (200, {}, {"data": []}),
+        ]
+    )
+    api.handlers["/2/users/1/tweets"] = lambda query: next(responses)
+    monkeypatch.setattr(
+        TwitterClient, "_wait_backoff", lambda self, attempt: pytest.fail("Backoff")
+    )
+
+    client = TwitterClient("token", api.url)
+    start = time.monotonic()
+    response = client.get("users/1/tweets")
+    client.close()
+
+    assert response.status_code == 200
+    assert time.monotonic() - start >= 0.9
+
+
+def test_token_bucket_paces_requests():
+    """Once the capacity is spent, tokens are handed out at the rate of the bucket."""
+    token_bucket = TokenBucket(rate=20, capacity=2)
+
+    start = time.monotonic()
+    for _ in range(6):
+        token_bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # Two tokens are available at once, the other four are refilled at 20 per second
+    assert 0.18 <= elapsed < 1
+
+
+def test_token_bucket_is_shared_by_threads():
+    """The threads sharing a bucket don't take more tokens than it refills."""
+    token_bucket = TokenBucket(rate=50, capacity=5)
+
+    start = time.monotonic()
+    threads = [
+        threading.Thread(target=lambda: [token_bucket.acquire() for _ in range(5)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 tokens, 5 available at once and 15 refilled at 50 per second
+    assert time.monotonic() - start >= 0.27
+
+
+def test_resumes_from_the_checkpoint_after_a_stop(tmp_path, api):
+    """A retrieval that stops mid-week resumes from the page after the last one written."""
+    api.handlers[TIMELINE_PATH] = _timeline({"p2"})
+    client = TwitterClient("token", api.url, max_retries=0)
+
+    filepath = tmp_path / "raw" / "2023w24_data_tromepe.ndjson"
+    checkpoint_path = (
+        tmp_path / "checkpoints" / "2023w24_data_tromepe.ndjson.checkpoint.json"
+    )
+
+    with pytest.raises(requests.HTTPError):
+        get_user_tweets(
+            client,
+            "tromepe",
+            "1",
+            START_TIME,
+            END_TIME,
+            NDJSONPageWriter(str(filepath), str(checkpoint_path)),
+        )
+
+    assert json.loads(checkpoint_path.read_text())["pagination_token"] == "p2"
+    assert not filepath.exists()
+
+    # A line written after the last checkpoint, cut by the stop
+    with open(f"{filepath}.part", "ab") as part_file:
+        part_file.write(b'{"id": "20", "te')
+
+    tweets = get_user_tweets(
+        client,
+        "tromepe",
+        "1",
+        START_TIME,
+        END_TIME,
+        NDJSONPageWriter(str(filepath), str(checkpoint_path)),
+    )
+    client.close()
+
+    assert tweets == 25
+    assert [query.get("pagination_token") for query in api.paths(TIMELINE_PATH)] == [
+        None,
+        "p1",
+        "p2",
+        "p2",
+    ]
+    assert [json.loads(line)["id"] for line in filepath.read_text().splitlines()] == [
+        str(tweet_id) for tweet_id in range(25)
+    ]
+    assert not checkpoint_path.exists()
+
+
+def test_multipart_upload_resumes(tmp_path, api, s3, monkeypatch):
+    """The parts uploaded before a stop are kept, and the S3 file decompresses to the local file."""
+    # A part for each page
+    monkeypatch.setattr(data_retrieval, "MULTIPART_CHUNK_SIZE", 1)
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 1)
+
+    api.handlers[TIMELINE_PATH] = _timeline({"p2"})
+    client = TwitterClient("token", api.url, max_retries=0)
+    uploader = S3Uploader("testing", "testing")
+
+    filepath = tmp_path / "2023w24_data_tromepe.ndjson"
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    with pytest.raises(requests.HTTPError):
+        get_user_tweets(
+            client,
+            "tromepe",
+            "1",
+            START_TIME,
+            END_TIME,
+            NDJSONPageWriter(str(filepath), str(checkpoint_path), uploader),
+        )
+
+    assert len(json.loads(checkpoint_path.read_text())["parts"]) == 2
+
+    get_user_tweets(
+        client,
+        "tromepe",
+        "1",
+        START_TIME,
+        END_TIME,
+        NDJSONPageWriter(str(filepath), str(checkpoint_path), uploader),
+    )
+    client.close()
+
+    key = "raw_data/2023w24_data_tromepe.ndjson.gz"
+    body = _s3_object(s3, key)
+
+    # The ETag of a multipart upload ends with its number of parts
+    assert s3.head_object(Bucket=S3_BUCKET, Key=key)["ETag"].strip('"').endswith("-3")
+    assert gzip.decompress(body) == filepath.read_bytes()
+    assert len(filepath.read_text().splitlines()) == 25
+
+
+def test_gets_the_tweets_of_several_newspapers_at_a_time(tmp_path, api, s3):
+    """The newspapers are retrieved concurrently, sharing the wait for a spent rate limit window."""
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+
+    def concurrent(handler: Callable) -> Callable:
+        def concurrent_handler(query: dict) -> Tuple[int, dict, dict]:
+            with lock:
+                in_flight.append(query)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(query)
+            return handler(query)
+
+        return concurrent_handler
+
+    newspapers_id = {"tromepe": "1", "diarioojo": "2", "elcomercio_peru": "3"}
+    for newspaper_id in newspapers_id.values():
+        api.handlers[f"/2/users/{newspaper_id}/tweets"] = concurrent(_timeline(set()))
+
+    # The first page of a newspaper spends the window, reporting only when it resets
+    rate_limited = {"p1"}
+    timeline = api.handlers["/2/users/2/tweets"]
+
+    def rate_limited_timeline(query: dict) -> Tuple[int, dict, dict]:
+        if query.get("pagination_token") in rate_limited:
+            rate_limited.discard(query["pagination_token"])
+            return 429, {"x-rate-limit-reset": str(time.time())}, {}
+        return timeline(query)
+
+    api.handlers["/2/users/2/tweets"] = rate_limited_timeline
+
+    get_users_tweets(
+        newspapers_id,
+        START_TIME,
+        END_TIME,
+        str(tmp_path),
+        "token",
+        "testing",
+        "testing",
+        api.url,
+    )
+
+    assert max(max_in_flight) > 1
+    assert len(api.paths("/2/users/2/tweets")) == 4
+    for newspaper in newspapers_id:
+        filepath = tmp_path / "data" / "raw" / f"2023w24_data_{newspaper}.ndjson"
+        body = _s3_object(s3, f"raw_data/2023w24_data_{newspaper}.ndjson.gz")
+
+        assert len(filepath.read_text().splitlines()) == 25
+        assert gzip.decompress(body) == filepath.read_bytes()
+    assert not list((tmp_path / "data" / "checkpoints").glob("*"))
+
+
+def test_gets_users_id(tmp_path, api):
+    """The handles are looked up in a single request, matched without case and saved."""
+    api.handlers["/2/users/by"] = lambda query: (
+        200,
+        {},
+        {
+            "data": [
+                {"username": "TromePe", "id": "1"},
+                {"username": "diarioojo", "id": "2"},
+            ]
+        },
+    )
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+
+    newspapers_id = get_users_id(
+        ["tromepe", "diarioojo", "missing"], str(tmp_path), "token", api.url
+    )
+
+    assert newspapers_id == {"tromepe": "1", "diarioojo": "2"}
+    assert api.paths("/2/users/by") == [{"usernames": "tromepe,diarioojo,missing"}]
+    assert (
+        json.loads((tmp_path / "data" / "raw" / "newspapers_id.json").read_text())
+        == newspapers_id
+    )
+
+
+def _write_tweets(filepath) -> None:
+    # Tweets 1, 2, 4, 5, 7 and 8 have replies
+    filepath.write_text("".join(json.dumps(tweet) + "\n" for tweet in _tweets(0, 10)))
+
+
+def test_paginates_replies_without_duplicates(tmp_path, api):
+    """Conversations are searched in batches, every page is retrieved and repeated replies are written once."""
+    api.handlers[SEARCH_PATH] = _search(set())
+    tweets_path = tmp_path / "2023w24_data_tromepe.ndjson"
+    _write_tweets(tweets_path)
+
+    replies_path = tmp_path / "2023w24_data_tromepe_replies.ndjson"
+    client = TwitterClient("token", api.url)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        replies = get_responses_to_user(
+            client,
+            executor,
+            "tromepe",
+            str(tweets_path),
+            ReplyWriter(str(replies_path), str(tmp_path / "checkpoint.json")),
+            max_query_length=len("conversation_id:1 OR conversation_id:2"),
+        )
+    client.close()
+
+    queries = api.paths(SEARCH_PATH)
+    reply_ids = [
+        json.loads(line)["id"] for line in replies_path.read_text().splitlines()
+    ]
+
+    # Three queries of two conversations, with three pages each
+    assert len({query["query"] for query in queries}) == 3
+    assert len(queries) == 9
+    assert replies == 13
+    assert sorted(reply_ids) == sorted(
+        [f"{tweet_id}-{reply}" for tweet_id in [1, 2, 4, 5, 7, 8] for reply in range(2)]
+        + ["shared"]
+    )
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_resumes_replies_with_the_remaining_conversations(tmp_path, api):
+    """A crawl that stops only searches the conversations not retrieved yet in the next run."""
+    api.handlers[SEARCH_PATH] = _search({"7"})
+    tweets_path = tmp_path / "2023w24_data_tromepe.ndjson"
+    _write_tweets(tweets_path)
+
+    replies_path = tmp_path / "2023w24_data_tromepe_replies.ndjson"
+    checkpoint_path = tmp_path / "checkpoint.json"
+    client = TwitterClient("token", api.url, max_retries=0)
+
+    def get_replies() -> int:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return get_responses_to_user(
+                client,
+                executor,
+                "tromepe",
+                str(tweets_path),
+                ReplyWriter(str(replies_path), str(checkpoint_path)),
+                max_query_length=len("conversation_id:1 OR conversation_id:2"),
+            )
+
+    with pytest.raises(requests.HTTPError):
+        get_replies()
+
+    assert json.loads(checkpoint_path.read_text()) == ["1", "2", "4", "5"]
+
+    api.requests.clear()
+    replies = get_replies()
+    client.close()
+
+    assert {query["query"] for query in api.paths(SEARCH_PATH)} == {
+        "conversation_id:7 OR conversation_id:8"
+    }
+    assert replies == 13
+    assert len(replies_path.read_text().splitlines()) == 13
+
+
+def test_resumes_replies_through_the_rate_limit(tmp_path, api):
+    """Searches that spend the rate limit wait for its reset, and a crawl stopped by it resumes from the
+    checkpoint.
+    """
+    search = _search(set())
+    # Rate limited responses left for the queries of each conversation
+    rate_limited = {"4": 1, "7": 2}
+
+    def handler(query: dict) -> Tuple[int, dict, dict]:
+        conversation_ids = [term.split(":")[1] for term in query["query"].split(" OR ")]
+
+        for conversation_id in conversation_ids:
+            if rate_limited.get(conversation_id):
+                rate_limited[conversation_id] -= 1
+                return (
+                    429,
+                    {
+                        "x-rate-limit-remaining": "0",
+                        "x-rate-limit-reset": str(time.time()),
+                    },
+                    {},
+                )
+
+        status, headers, body = search(query)
+        reset = str(time.time() + 900)
+        return (
+            status,
+            {"x-rate-limit-remaining": "100", "x-rate-limit-reset": reset, **headers},
+            body,
+        )
+
+    api.handlers[SEARCH_PATH] = handler
+    tweets_path = tmp_path / "2023w24_data_tromepe.ndjson"
+    _write_tweets(tweets_path)
+
+    replies_path = tmp_path / "2023w24_data_tromepe_replies.ndjson"
+    checkpoint_path = tmp_path / "checkpoint.json"
+    client = TwitterClient("token", api.url, max_retries=1)
+
+    def get_replies() -> int:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return get_responses_to_user(
+                client,
+                executor,
+                "tromepe",
+                str(tweets_path),
+                ReplyWriter(str(replies_path), str(checkpoint_path)),
+                max_query_length=len("conversation_id:1 OR conversation_id:2"),
+            )
+
+    start = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        get_replies()
+
+    # Each 429 waits for the reset before its retry, until the second one of conversation 7 runs out of retries
+    assert time.monotonic() - start >= 1.8
+    assert [query["query"] for query in api.paths(SEARCH_PATH)].count(
+        "conversation_id:4 OR conversation_id:5"
+    ) == 4
+    assert json.loads(checkpoint_path.read_text()) == ["1", "2", "4", "5"]
+
+    api.requests.clear()
+    replies = get_replies()
+    client.close()
+
+    assert {query["query"] for query in api.paths(SEARCH_PATH)} == {
+        "conversation_id:7 OR conversation_id:8"
+    }
+    assert replies == 13
+    assert len(set(replies_path.read_text().splitlines())) == 13
+    assert not checkpoint_path.exists()
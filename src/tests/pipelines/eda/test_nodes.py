@@ -0,0 +1,94 @@
+"""
+Tests of the nodes of the 'eda' pipeline.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scipy import sparse
+
+from newspapersAnalysis.extras.datasets.sparse_dtm_dataset import SparseDTM
+from newspapersAnalysis.pipelines.eda.nodes import create_top30, create_unique_words
+
+
+def _dtm_newspaper(week: int, unique_words: int) -> SparseDTM:
+    return SparseDTM(
+        matrix=sparse.csr_matrix(np.ones((1, unique_words), dtype=np.int32)),
+        vocabulary=np.array([f"word{i}" for i in range(unique_words)]),
+        rows=pd.DataFrame(
+            {"newspaper": ["elcomercio"], "year": [2023], "week": [week]}
+        ),
+    )
+
+
+def _corpus(week: int, tweets: int) -> pd.DataFrame:
+    created_at = pd.Timestamp.fromisocalendar(2023, week, 1)
+    return pd.DataFrame(
+        {
+            "id": range(tweets),
+            "newspaper": "elcomercio",
+            "created_at": [created_at] * tweets,
+        }
+    )
+
+
+class _SparseOnlyMatrix(sparse.csr_matrix):
+    def toarray(self, *args, **kwargs):
+        raise AssertionError("The DTM was densified")
+
+
+def test_unique_words_pairs_partitions_by_week():
+    # Hive partitions are ordered by week number, the feather partitions by their name
+    dtm_newspaper_data = {
+        "dtm_newspaper-(2023, 9).npz": lambda: _dtm_newspaper(9, 4),
+        "dtm_newspaper-(2023, 10).npz": lambda: _dtm_newspaper(10, 6),
+    }
+    corpus_data = {
+        "corpus-(2023, 10).feather": lambda: _corpus(10, 3),
+        "corpus-(2023, 9).feather": lambda: _corpus(9, 2),
+    }
+
+    unique_words = create_unique_words(dtm_newspaper_data, corpus_data)
+
+    week_9 = unique_words["unique_words-(2023, 9).feather"]
+    week_10 = unique_words["unique_words-(2023, 10).feather"]
+
+    assert week_9[["week", "unique_words", "tweet_number"]].values.tolist() == [
+        [9, 4, 2]
+    ]
+    assert week_10[["week", "unique_words", "tweet_number"]].values.tolist() == [
+        [10, 6, 3]
+    ]
+    assert week_10["word_tweet_ratio"].tolist() == [2.0]
+
+
+def test_top30_keeps_the_largest_non_zero_counts_of_each_row():
+    matrix = _SparseOnlyMatrix(
+        np.array([[3, 5, 0, 5, 1], [0, 0, 2, 0, 0], [0, 0, 0, 0, 0]], dtype=np.int32)
+    )
+    # Stored zeros are not words used by the newspaper
+    matrix.data[matrix.indices == 4] = 0
+    dtm_newspaper = SparseDTM(
+        matrix=matrix,
+        vocabulary=np.array(["a", "b", "c", "d", "e"]),
+        rows=pd.DataFrame(
+            {
+                "newspaper": ["elcomercio", "larepublica", "rpp"],
+                "year": [2023] * 3,
+                "week": [9] * 3,
+            }
+        ),
+    )
+
+    top30 = create_top30(
+        {"dtm_newspaper-(2023, 9).npz": lambda: dtm_newspaper}, {"k": 3}
+    )["top30-(2023, 9).feather"]
+
+    # Ties are sorted by column, so "b" comes before "d"
+    assert top30[["newspaper", "word", "count"]].values.tolist() == [
+        ["elcomercio", "b", 5],
+        ["elcomercio", "d", 5],
+        ["elcomercio", "a", 3],
+        ["larepublica", "c", 2],
+    ]
+    assert top30.index.tolist() == [0, 1, 2, 3]
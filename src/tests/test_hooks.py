@@ -0,0 +1,149 @@
+"""
+Tests of the incremental runs of the nodes over Partitioned Datasets.
+"""
+
+import pytest
+
+from kedro.framework.hooks.manager import _create_hook_manager
+from kedro.io import DataCatalog
+from kedro.pipeline import node, pipeline
+from kedro.runner import SequentialRunner
+from typing import Callable, Dict, List
+
+from newspapersAnalysis.extras.partitions import partition_key
+from newspapersAnalysis.hooks import IncrementalPartitionsHook
+
+
+def _partitioned(path) -> dict:
+    return {
+        "type": "PartitionedDataset",
+        "path": str(path),
+        "dataset": "text.TextDataset",
+        "filename_suffix": ".txt",
+    }
+
+
+class Project:
+    """Runs a pipeline in a new session each time, as ``kedro run`` with incremental runs enabled."""
+
+    def __init__(self, tmp_path) -> None:
+        self.tmp_path = tmp_path
+        self.processed: List[List[str]] = []
+        self.conf_catalog = {
+            "weekly": _partitioned(tmp_path / "weekly"),
+            "upper": _partitioned(tmp_path / "upper"),
+            "raw": _partitioned(tmp_path / "raw"),
+            "compiled": _partitioned(tmp_path / "compiled"),
+        }
+        self.options = {
+            "enabled": True,
+            "manifest_path": str(tmp_path / "manifest.json"),
+            "fingerprint": "content",
+            "spanning_nodes": ["compile_raw_data_node"],
+        }
+
+    def write(self, name: str, partition_id: str, text: str) -> None:
+        directory = self.tmp_path / name
+        directory.mkdir(exist_ok=True)
+        (directory / f"{partition_id}.txt").write_text(text)
+
+    def read(self, name: str, partition_id: str) -> str:
+        return (self.tmp_path / name / f"{partition_id}.txt").read_text()
+
+    def _upper(self, weekly: Dict[str, Callable[[], str]]) -> Dict[str, str]:
+        self.processed.append(sorted(weekly))
+        return {
+            partition_id.replace("weekly", "upper"): load_function().upper()
+            for partition_id, load_function in weekly.items()
+        }
+
+    def _compile(self, raw: Dict[str, Callable[[], str]]) -> Dict[str, str]:
+        # Each raw file has the weeks of its tweets, e.g. a file retrieved on week 10 has tweets of week 9
+        self.processed.append(sorted(raw))
+        tweets = {}
+        for partition_id, load_function in sorted(raw.items()):
+            for week in load_function().split(","):
+                tweets.setdefault(f"compiled-(2023, {week})", []).append(partition_id)
+        return {partition_id: ",".join(files) for partition_id, files in tweets.items()}
+
+    def run(self, node_name: str) -> List[str]:
+        """Runs a node and returns the weeks it processed."""
+        nodes = {
+            "upper_node": node(self._upper, "weekly", "upper", name="upper_node"),
+            "compile_raw_data_node": node(
+                self._compile, "raw", "compiled", name="compile_raw_data_node"
+            ),
+        }
+        hook = IncrementalPartitionsHook()
+        hook.after_catalog_created(
+            self.conf_catalog, {"parameters": {"incremental": self.options}}
+        )
+        hook_manager = _create_hook_manager()
+        hook_manager.register(hook)
+
+        self.processed = []
+        SequentialRunner().run(
+            pipeline([nodes[node_name]]),
+            DataCatalog.from_config(self.conf_catalog),
+            hook_manager,
+        )
+
+        return sorted(partition_key(partition_id) for partition_id in self.processed[0])
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = Project(tmp_path)
+    project.write("weekly", "weekly-(2023, 9)", "semana nueve")
+    project.write("weekly", "weekly-(2023, 10)", "semana diez")
+    project.run("upper_node")
+    return project
+
+
+def test_rerun_skips_every_week(project):
+    assert project.run("upper_node") == []
+    assert project.read("upper", "upper-(2023, 9)") == "SEMANA NUEVE"
+
+
+def test_new_week_runs_only_that_week(project):
+    project.write("weekly", "weekly-(2023, 11)", "semana once")
+
+    assert project.run("upper_node") == ["(2023, 11)"]
+    assert project.read("upper", "upper-(2023, 11)") == "SEMANA ONCE"
+    assert project.run("upper_node") == []
+
+
+def test_changed_input_is_processed_again(project):
+    project.write("weekly", "weekly-(2023, 9)", "semana 9")
+
+    assert project.run("upper_node") == ["(2023, 9)"]
+    assert project.read("upper", "upper-(2023, 9)") == "SEMANA 9"
+
+
+def test_missing_output_is_processed_again(project):
+    (project.tmp_path / "upper" / "upper-(2023, 10).txt").unlink()
+
+    assert project.run("upper_node") == ["(2023, 10)"]
+    assert project.read("upper", "upper-(2023, 10)") == "SEMANA DIEZ"
+
+
+def test_spanning_node_processes_the_weeks_sharing_an_output_together(project):
+    project.write("raw", "2023w10_data_elcomercio", "9,10")
+    assert project.run("compile_raw_data_node") == ["(2023, 10)"]
+
+    # The new file also has tweets of week 10, so it rewrites that week with only its own tweets
+    project.write("raw", "2023w11_data_elcomercio", "10,11")
+    assert project.run("compile_raw_data_node") == ["(2023, 11)"]
+
+    # Both files are processed together once, and then the compiled weeks are complete
+    assert project.run("compile_raw_data_node") == ["(2023, 10)", "(2023, 11)"]
+    assert (
+        project.read("compiled", "compiled-(2023, 10)")
+        == "2023w10_data_elcomercio,2023w11_data_elcomercio"
+    )
+    assert project.run("compile_raw_data_node") == []
+
+    # A changed file is processed with the files it shares weeks with
+    project.write("raw", "2023w10_data_elcomercio", "8,9,10")
+    assert project.run("compile_raw_data_node") == ["(2023, 10)", "(2023, 11)"]
+    assert project.read("compiled", "compiled-(2023, 8)") == "2023w10_data_elcomercio"